@@ -0,0 +1,114 @@
+"""Benchmark: memory held by parsed orders, as DotDict trees vs. compact models.
+
+Parses one large page of ListOrders results three ways, and reports the memory
+still held by the orders afterwards (the cost of keeping them around), along
+with the peak memory and wall time of building them:
+
+- ``DotDict``: ``MWSResponse.parsed``, as returned by the API classes;
+- ``Order.from_parsed``: models built from that tree, once the tree is dropped;
+- ``ModelPage``: models built straight from the XML, with no tree at all.
+
+Usage::
+
+    python -m benchmarks.bench_models [number_of_orders]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from requests import Response
+
+from mws import MWSResponse
+from mws.models.results import ModelPage, Order
+
+ORDER_TEMPLATE = """
+      <Order>
+        <AmazonOrderId>111-{n:07d}-1111111</AmazonOrderId>
+        <SellerOrderId>S-{n}</SellerOrderId>
+        <PurchaseDate>2020-08-02T10:00:00Z</PurchaseDate>
+        <LastUpdateDate>2020-08-02T11:00:00Z</LastUpdateDate>
+        <OrderStatus>Shipped</OrderStatus>
+        <FulfillmentChannel>AFN</FulfillmentChannel>
+        <SalesChannel>Amazon.com</SalesChannel>
+        <ShipServiceLevel>Std US D2D Dom</ShipServiceLevel>
+        <OrderTotal><CurrencyCode>USD</CurrencyCode><Amount>{n}.99</Amount></OrderTotal>
+        <NumberOfItemsShipped>1</NumberOfItemsShipped>
+        <NumberOfItemsUnshipped>0</NumberOfItemsUnshipped>
+        <PaymentMethod>Other</PaymentMethod>
+        <MarketplaceId>ATVPDKIKX0DER</MarketplaceId>
+        <OrderType>StandardOrder</OrderType>
+        <EarliestShipDate>2020-08-03T07:00:00Z</EarliestShipDate>
+        <LatestShipDate>2020-08-04T06:59:59Z</LatestShipDate>
+        <IsBusinessOrder>false</IsBusinessOrder>
+        <IsPrime>false</IsPrime>
+        <ShippingAddress>
+          <City>SEATTLE</City>
+          <StateOrRegion>WA</StateOrRegion>
+          <PostalCode>98101-1234</PostalCode>
+          <CountryCode>US</CountryCode>
+        </ShippingAddress>
+      </Order>"""
+
+
+def build_page(orders):
+    body = "".join(ORDER_TEMPLATE.format(n=n) for n in range(orders))
+    return (
+        '<?xml version="1.0"?>\n'
+        '<ListOrdersResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">'
+        f"<ListOrdersResult><Orders>{body}</Orders></ListOrdersResult>"
+        "</ListOrdersResponse>"
+    ).encode("utf-8")
+
+
+def dotdicts(content):
+    response = Response()
+    response._content = content
+    response.encoding = "utf-8"
+    response.status_code = 200
+    return MWSResponse(response, result_key="ListOrdersResult").parsed.Orders.Order
+
+
+def models_from_parsed(content):
+    response = Response()
+    response._content = content
+    response.encoding = "utf-8"
+    response.status_code = 200
+    parsed = MWSResponse(response, result_key="ListOrdersResult").parsed
+    return Order.from_parsed(parsed)
+
+
+def models_streamed(content):
+    return list(ModelPage(Order, content))
+
+
+def measure(func, content):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    orders = func(content)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(orders), elapsed, held, peak
+
+
+def main(orders=10000):
+    content = build_page(orders)
+    print(f"ListOrders page: {orders} orders, {len(content) / 1e6:.1f} MB")
+    for name, func in (
+        ("DotDict", dotdicts),
+        ("Order.from_parsed", models_from_parsed),
+        ("ModelPage", models_streamed),
+    ):
+        count, elapsed, held, peak = measure(func, content)
+        print(
+            f"{name:>18}: {elapsed:6.2f}s, held {held / 1e6:7.1f} MB "
+            f"({held / count:6.0f} B/order), peak {peak / 1e6:7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,88 @@
+"""Benchmark: streaming settlement parser vs. full-tree XML parsing.
+
+Compares ``mws.utils.settlement.iter_settlement_xml`` against parsing the same
+report through ``mws_xml_to_dict`` into a ``DotDict`` tree (which is what
+``MWSResponse`` does for XML content), reporting wall time and peak memory.
+
+Usage::
+
+    python -m benchmarks.bench_settlement [number_of_orders]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from mws.utils.collections import DotDict
+from mws.utils.settlement import iter_settlement_xml
+from mws.utils.xml import mws_xml_to_dict
+
+ORDER_TEMPLATE = """
+      <Order>
+        <AmazonOrderID>111-{n:07d}-1111111</AmazonOrderID>
+        <MerchantOrderID>M-{n}</MerchantOrderID>
+        <ShipmentID>S-{n}</ShipmentID>
+        <MarketplaceName>Amazon.com</MarketplaceName>
+        <Fulfillment>
+          <MerchantFulfillmentID>F-{n}</MerchantFulfillmentID>
+          <PostedDate>2020-08-02T10:00:00+00:00</PostedDate>
+          <Item>
+            <AmazonOrderItemCode>IC-{n}</AmazonOrderItemCode>
+            <SKU>SKU-{n}</SKU>
+            <Quantity>1</Quantity>
+            <ItemPrice>
+              <Component><Type>Principal</Type><Amount currency="USD">20.00</Amount></Component>
+              <Component><Type>Shipping</Type><Amount currency="USD">3.00</Amount></Component>
+            </ItemPrice>
+            <ItemFees>
+              <Fee><Type>Commission</Type><Amount currency="USD">-3.00</Amount></Fee>
+              <Fee><Type>FBAPerUnitFulfillmentFee</Type><Amount currency="USD">-2.41</Amount></Fee>
+            </ItemFees>
+          </Item>
+        </Fulfillment>
+      </Order>"""
+
+
+def build_report(orders):
+    body = "".join(ORDER_TEMPLATE.format(n=n) for n in range(orders))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        "<AmazonEnvelope><Message><MessageID>1</MessageID><SettlementReport>"
+        "<SettlementData><AmazonSettlementID>1</AmazonSettlementID>"
+        '<TotalAmount currency="USD">0</TotalAmount></SettlementData>'
+        f"{body}</SettlementReport></Message></AmazonEnvelope>"
+    ).encode("utf-8")
+
+
+def full_tree(content):
+    tree = DotDict(mws_xml_to_dict(content, encoding="utf-8"))
+    return len(tree.Message.SettlementReport.Order)
+
+
+def streaming(content):
+    return sum(1 for _ in iter_settlement_xml(content))
+
+
+def measure(func, content):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(content)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(orders=1000):
+    content = build_report(orders)
+    print(f"Settlement report: {orders} orders, {len(content) / 1e6:.1f} MB")
+    for name, func in (("full tree (DotDict)", full_tree), ("streaming", streaming)):
+        result, elapsed, peak = measure(func, content)
+        print(
+            f"{name:>20}: {elapsed:6.2f}s, peak memory {peak / 1e6:7.1f} MB "
+            f"(excluding input), result={result}"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
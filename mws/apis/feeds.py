@@ -6,9 +6,16 @@ from enum import Enum
 
 from mws import MWS
 from mws.decorators import next_token_action
+from mws.errors import MWSError
+from mws.utils.concurrency import DEFAULT_MAX_WORKERS, chunked, concurrent_map
 from mws.utils.crypto import calc_md5
 from mws.utils.deprecation import kwargs_renamed_for_v11
+from mws.utils.feeds import FEED_SPLIT_MAX_BYTES, FeedWriter, GzipFeed, split_feed
 from mws.utils.params import coerce_to_bool, enumerate_param
+from mws.utils.processing_report import ProcessingReport
+
+FEED_SUBMISSION_ID_LIMIT = 100
+"""Maximum number of FeedSubmissionIds accepted by one GetFeedSubmissionList call."""
 
 
 def clean_feed_option_val(val):
@@ -96,6 +103,13 @@ class Feeds(MWS):
     NEXT_TOKEN_OPERATIONS = [
         "GetFeedSubmissionList",
     ]
+    THROTTLE_LIMITS = {
+        "SubmitFeed": (15, 120),
+        "GetFeedSubmissionList": (10, 45),
+        "GetFeedSubmissionCount": (10, 45),
+        "CancelFeedSubmissions": (10, 45),
+        "GetFeedSubmissionResult": (15, 60),
+    }
 
     @kwargs_renamed_for_v11([("marketplaceids", "marketplace_ids")])
     def submit_feed(
@@ -106,14 +120,17 @@ class Feeds(MWS):
         marketplace_ids=None,
         amazon_order_id=None,
         document_type=None,
-        content_type="text/xml",
+        content_type=None,
         purge=False,
+        compress=False,
     ):
         """The `SubmitFeed operation.
         <https://docs.developer.amazonservices.com/en_US/feeds/Feeds_SubmitFeed.html>`_
         Uploads a feed for processing by Amazon MWS.
 
-        Requires ``feed``, a file in XML or flat-file format encoded to bytes; and
+        Requires ``feed``, a file in XML or flat-file format encoded to bytes, or a
+        :py:class:`FeedWriter <mws.utils.feeds.FeedWriter>` (which is closed, then
+        streamed as the request body); and
         ``feed_type``, a string detailing a `FeedType enumeration
         <https://docs.developer.amazonservices.com/en_US/feeds/Feeds_FeedType.html>`_.
 
@@ -137,13 +154,22 @@ class Feeds(MWS):
         `None` to get all).
 
         ``content_type`` sets the "Content-Type" request header, indicating the type
-        of file being sent. Defaults to ``"text/xml"``.
+        of file being sent. Defaults to the writer's type for a ``FeedWriter``,
+        else to ``"text/xml"``.
 
         ``purge`` enables Amazon's "purge and replace" functionality. Set to ``True``
         to purge and replace existing data, otherwise use ``False`` (the default).
         Only applies to product-related flat file feed types.
         **Use only in exceptional cases.**
         Usage is throttled to allow only one purge and replace within a 24-hour period.
+
+        ``compress``, if ``True``, gzip-compresses the feed as it is streamed to a
+        temporary file, and sends it with a "Content-Encoding: gzip" header. The
+        "Content-MD5" header is calculated on the compressed body, while
+        "Content-Type" still describes the uncompressed feed. Check that MWS
+        accepts compressed uploads for the ``feed_type`` before using it. A
+        ``FeedWriter`` given as ``feed`` is left open, so it can be submitted
+        again if the upload fails; only the compressed copy is discarded.
         """
         if isinstance(feed_options, dict):
             # Convert dict of options to str value
@@ -165,15 +191,104 @@ class Feeds(MWS):
                 data.update({"DocumentType": document_type})
         data.update(enumerate_param("MarketplaceIdList.Id.", marketplace_ids))
 
-        # Add headers to this request.
-        extra_headers = {"Content-MD5": calc_md5(feed), "Content-Type": content_type}
-        return self.make_request(
-            "SubmitFeed",
-            data,
-            body=feed,
-            extra_headers=extra_headers,
+        if compress:
+            feed = GzipFeed(feed, content_type=content_type)
+        try:
+            if isinstance(feed, FeedWriter):
+                feed.close()
+                content_md5 = feed.content_md5
+                content_type = content_type or feed.content_type
+            else:
+                content_md5 = calc_md5(feed)
+            # Add headers to this request.
+            extra_headers = {
+                "Content-MD5": content_md5,
+                "Content-Type": content_type or "text/xml",
+            }
+            if compress:
+                extra_headers["Content-Encoding"] = feed.content_encoding
+            return self.make_request(
+                "SubmitFeed",
+                data,
+                body=feed,
+                extra_headers=extra_headers,
+            )
+        finally:
+            if compress:
+                feed.discard()
+
+    def submit_split_feed(
+        self,
+        feed,
+        feed_type,
+        max_messages=None,
+        max_bytes=FEED_SPLIT_MAX_BYTES,
+        max_workers=DEFAULT_MAX_WORKERS,
+        **kwargs,
+    ):
+        """Splits a large XML or flat file ``feed`` into smaller feeds with
+        :py:func:`split_feed <mws.utils.feeds.split_feed>`, on message or row
+        boundaries, and submits them all. Returns a :py:class:`SplitFeedSubmission`
+        tracking the parts.
+
+        Parts are submitted in up to ``max_workers`` threads, throttled to the
+        SubmitFeed quota. Other keyword arguments are passed to
+        :py:meth:`submit_feed` for every part; ``purge`` is not allowed, as each
+        part would replace the data of the others.
+
+        If any part fails to be submitted, the others are still submitted, then
+        :py:class:`SplitFeedError` is raised: its ``submission`` tracks the parts
+        that were submitted, and ``failed_message_ids`` lists the messages of
+        the parts that were not.
+        """
+        if kwargs.get("purge"):
+            raise ValueError("Feeds that purge and replace cannot be split.")
+        feed_type = getattr(feed_type, "value", feed_type)
+        api = self.throttled()
+        # Submission IDs are read from parsed responses, which requires MWSResponse.
+        api._use_feature_mwsresponse = True
+        parts = split_feed(
+            feed, feed_type, max_messages=max_messages, max_bytes=max_bytes
         )
 
+        def _submit_part(part):
+            try:
+                return api.submit_feed(part, feed_type, **kwargs), None
+            except Exception as exc:
+                return None, exc
+
+        submitted = []
+        errors = []
+        try:
+            for part, (response, error) in concurrent_map(
+                _submit_part, parts, max_workers=max_workers
+            ):
+                if error is None:
+                    submitted.append((part, response))
+                else:
+                    errors.append((part, error))
+        finally:
+            for part in parts:
+                part.discard()
+        submission = SplitFeedSubmission(
+            api,
+            feed_type,
+            [part for part, _ in submitted],
+            [response for _, response in submitted],
+        )
+        if errors:
+            raise SplitFeedError(
+                f"{len(errors)} of {len(parts)} parts of the feed failed to be submitted.",
+                submission=submission,
+                errors=[error for _, error in errors],
+                failed_message_ids=[
+                    message_id
+                    for part, _ in errors
+                    for message_id in part.source_message_ids
+                ],
+            ) from errors[0][1]
+        return submission
+
     @kwargs_renamed_for_v11(
         [
             ("feedids", "feed_ids"),
@@ -280,14 +395,20 @@ class Feeds(MWS):
             ("feedid", "feed_id"),
         ]
     )
-    def get_feed_submission_result(self, feed_id):
+    def get_feed_submission_result(self, feed_id, stream=False):
         """Returns the feed processing report and the Content-MD5 header.
 
+        Set ``stream`` to ``True`` to leave the report body unread until it is
+        consumed, for instance by
+        :py:class:`ProcessingReport <mws.utils.processing_report.ProcessingReport>`.
+
         Docs:
         https://docs.developer.amazonservices.com/en_US/feeds/Feeds_GetFeedSubmissionResult.html
         """
         data = {"FeedSubmissionId": feed_id}
-        return self.make_request("GetFeedSubmissionResult", data, result_key="Message")
+        return self.make_request(
+            "GetFeedSubmissionResult", data, result_key="Message", stream=stream
+        )
 
 
 class FeedProcessingStatus(str, Enum):
@@ -451,6 +572,104 @@ class FeedType(str, Enum):
     """Easy Ship Feed"""
 
 
+class SplitFeedError(MWSError):
+    """Raised by :py:meth:`Feeds.submit_split_feed` when some parts of a feed
+    failed to be submitted.
+
+    ``submission`` is the :py:class:`SplitFeedSubmission` of the parts that were
+    submitted, ``errors`` lists the exception raised for each failed part, and
+    ``failed_message_ids`` the MessageIDs (or row numbers) in the original feed
+    of the messages in those parts.
+    """
+
+    def __init__(self, message, submission, errors, failed_message_ids):
+        super().__init__(message)
+        self.submission = submission
+        self.errors = errors
+        self.failed_message_ids = failed_message_ids
+
+
+class SplitFeedSubmission:
+    """Tracks the parts of a feed submitted by
+    :py:meth:`Feeds.submit_split_feed`, as one unit.
+
+    ``feed_submission_ids`` lists the FeedSubmissionId of every part, in order,
+    and ``processing_statuses`` maps each to its last known FeedProcessingStatus.
+    """
+
+    def __init__(self, api, feed_type, parts, responses):
+        self.api = api
+        self.feed_type = feed_type
+        self.responses = responses
+        self.feed_submission_ids = []
+        self.processing_statuses = {}
+        self.message_counts = {}
+        self._source_message_ids = {}
+        for part, response in zip(parts, responses):
+            info = response.parsed.FeedSubmissionInfo
+            feed_id = info.FeedSubmissionId
+            self.feed_submission_ids.append(feed_id)
+            self.processing_statuses[feed_id] = info.FeedProcessingStatus
+            self.message_counts[feed_id] = part.message_count
+            self._source_message_ids[feed_id] = part.source_message_ids
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}({self.feed_type!r}, "
+            f"parts={len(self.feed_submission_ids)})>"
+        )
+
+    @property
+    def done(self):
+        """Whether every part has finished processing (or was cancelled)."""
+        return all(
+            status in (FeedProcessingStatus.DONE, FeedProcessingStatus.CANCELLED)
+            for status in self.processing_statuses.values()
+        )
+
+    def poll(self):
+        """Refreshes the status of every part still processing,
+        returning ``processing_statuses``.
+        """
+        pending = [
+            feed_id
+            for feed_id, status in self.processing_statuses.items()
+            if status not in (FeedProcessingStatus.DONE, FeedProcessingStatus.CANCELLED)
+        ]
+        for chunk in chunked(pending, FEED_SUBMISSION_ID_LIMIT):
+            response = self.api.get_feed_submission_list(
+                feed_ids=chunk, max_count=len(chunk)
+            )
+            for info in response.parsed.get("FeedSubmissionInfo", []):
+                if info.FeedSubmissionId in self.processing_statuses:
+                    self.processing_statuses[
+                        info.FeedSubmissionId
+                    ] = info.FeedProcessingStatus
+        return self.processing_statuses
+
+    def processing_reports(self):
+        """Fetches the processing report of every part that is done, returning
+        a dict of :py:class:`ProcessingReport
+        <mws.utils.processing_report.ProcessingReport>` keyed by FeedSubmissionId.
+        """
+        reports = {}
+        for feed_id in self.feed_submission_ids:
+            if self.processing_statuses[feed_id] != FeedProcessingStatus.DONE:
+                continue
+            response = self.api.get_feed_submission_result(feed_id, stream=True)
+            try:
+                reports[feed_id] = ProcessingReport(response)
+            finally:
+                response.original.close()
+        return reports
+
+    def source_message_id(self, feed_submission_id, message_id):
+        """Returns the MessageID (or row number) in the original feed of the
+        message ``message_id`` of the part ``feed_submission_id``.
+        """
+        return self._source_message_ids[feed_submission_id][int(message_id) - 1]
+
+
 # Attach enums to Feeds class
 Feeds.FeedProcessingStatus = FeedProcessingStatus
 Feeds.FeedType = FeedType
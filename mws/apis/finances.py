@@ -1,7 +1,17 @@
 """Amazon MWS Finances API."""
 
+import datetime
+
 from mws import MWS
 from mws.decorators import next_token_action
+from mws.utils.concurrency import DEFAULT_MAX_WORKERS, concurrent_chain
+from mws.utils.finances import FinancialEventsPage
+from mws.utils.timezone import as_utc, date_windows, mws_utc_now
+
+FINANCES_LAG = datetime.timedelta(minutes=2)
+"""ListFinancialEvents requires ``PostedBefore`` to be at least two minutes
+before the time of the request.
+"""
 
 
 class Finances(MWS):
@@ -18,6 +28,10 @@ class Finances(MWS):
         "ListFinancialEventGroups",
         "ListFinancialEvents",
     ]
+    THROTTLE_LIMITS = {
+        "ListFinancialEventGroups": (30, 2),
+        "ListFinancialEvents": (30, 2),
+    }
 
     @next_token_action("ListFinancialEventGroups")
     def list_financial_event_groups(
@@ -68,15 +82,34 @@ class Finances(MWS):
         """
         return self.make_request(
             "ListFinancialEvents",
-            {
-                "FinancialEventGroupId": financial_event_group_id,
-                "AmazonOrderId": amazon_order_id,
-                "PostedAfter": posted_after,
-                "PostedBefore": posted_before,
-                "MaxResultsPerPage": max_results,
-            },
+            self._financial_events_params(
+                financial_event_group_id,
+                amazon_order_id,
+                posted_after,
+                posted_before,
+                max_results,
+            ),
         )
 
+    @staticmethod
+    def _financial_events_params(
+        financial_event_group_id,
+        amazon_order_id,
+        posted_after,
+        posted_before,
+        max_results,
+    ):
+        """Request params shared by ``list_financial_events`` and
+        ``stream_financial_events``.
+        """
+        return {
+            "FinancialEventGroupId": financial_event_group_id,
+            "AmazonOrderId": amazon_order_id,
+            "PostedAfter": posted_after,
+            "PostedBefore": posted_before,
+            "MaxResultsPerPage": max_results,
+        }
+
     def list_financial_events_by_next_token(self, token):
         """Alias for `list_financial_events(next_token=token)`
 
@@ -84,3 +117,79 @@ class Finances(MWS):
         https://docs.developer.amazonservices.com/en_US/finances/Finances_ListFinancialEventsByNextToken.html
         """
         return self.list_financial_events(next_token=token)
+
+    def stream_financial_events(
+        self,
+        financial_event_group_id=None,
+        amazon_order_id=None,
+        posted_after=None,
+        posted_before=None,
+        max_results=100,
+    ):
+        """Yields every amount of every financial event matching the given
+        arguments (as for ``list_financial_events``), flattened into
+        :py:class:`FinancialEventRecord <mws.utils.finances.FinancialEventRecord>`
+        tuples.
+
+        Each page of results is parsed as a stream, one event at a time, and
+        "ListFinancialEventsByNextToken" is followed until all pages are read.
+        ``max_results`` sets the number of events per page (at most 100).
+        """
+        response = self.make_request(
+            "ListFinancialEvents",
+            self._financial_events_params(
+                financial_event_group_id,
+                amazon_order_id,
+                posted_after,
+                posted_before,
+                max_results,
+            ),
+            stream=True,
+        )
+        while True:
+            page = FinancialEventsPage(response)
+            try:
+                yield from page
+            finally:
+                response.original.close()
+            if page.next_token is None:
+                return
+            response = self.make_request(
+                "ListFinancialEventsByNextToken",
+                {"NextToken": page.next_token},
+                stream=True,
+            )
+
+    def iter_financial_events(
+        self,
+        posted_after,
+        posted_before=None,
+        window=datetime.timedelta(days=1),
+        max_workers=DEFAULT_MAX_WORKERS,
+    ):
+        """Yields every amount of every financial event posted from ``posted_after``
+        to ``posted_before`` (default: two minutes ago), flattened into
+        :py:class:`FinancialEventRecord <mws.utils.finances.FinancialEventRecord>`
+        tuples.
+
+        The date range is split into windows of at most ``window``, which are
+        fetched in up to ``max_workers`` threads, throttled to the operation's quota.
+        Every page is parsed as a stream, one event at a time, so the tree of a
+        full page is never built. Records from different windows are interleaved
+        in the order they are read.
+        """
+        # Bounds may be dates, naive datetimes (taken as UTC) or aware datetimes:
+        # normalize them so they can be compared and split into windows.
+        posted_after = as_utc(posted_after)
+        if posted_before is None:
+            posted_before = mws_utc_now() - FINANCES_LAG
+        posted_before = as_utc(posted_before)
+        api = self.throttled()
+
+        def _window_records(date_window):
+            return api.stream_financial_events(
+                posted_after=date_window[0], posted_before=date_window[1]
+            )
+
+        windows = date_windows(posted_after, posted_before, window)
+        yield from concurrent_chain(_window_records, windows, max_workers=max_workers)
@@ -2,8 +2,13 @@
 
 from mws import MWS
 from mws.decorators import next_token_action
+from mws.utils.collections import unique_list_order_preserved
+from mws.utils.concurrency import DEFAULT_MAX_WORKERS, chunked, concurrent_map
 from mws.utils.params import enumerate_param
 
+LIST_INVENTORY_SUPPLY_SKU_LIMIT = 50
+"""Maximum number of SellerSkus accepted by one ListInventorySupply request."""
+
 
 class Inventory(MWS):
     """Amazon MWS Inventory Fulfillment API
@@ -18,6 +23,9 @@ class Inventory(MWS):
     NEXT_TOKEN_OPERATIONS = [
         "ListInventorySupply",
     ]
+    THROTTLE_LIMITS = {
+        "ListInventorySupply": (30, 0.5),
+    }
 
     @next_token_action("ListInventorySupply")
     def list_inventory_supply(
@@ -50,3 +58,46 @@ class Inventory(MWS):
         https://docs.developer.amazonservices.com/en_US/fba_inventory/FBAInventory_ListInventorySupplyByNextToken.html
         """
         return self.list_inventory_supply(next_token=token)
+
+    def get_inventory_supply(
+        self,
+        skus,
+        response_group="Basic",
+        marketplace_id=None,
+        max_workers=DEFAULT_MAX_WORKERS,
+    ):
+        """Returns the supply of any number of SKUs, as a dict mapping each SKU
+        to its InventorySupplyList ``member`` node, in the order the SKUs were given.
+
+        Duplicate SKUs are ignored. SKUs are sent in ListInventorySupply requests
+        of up to 50 at a time, running in up to ``max_workers`` threads and
+        throttled to the operation's quota, and "ListInventorySupplyByNextToken"
+        is followed for each request. SKUs for which MWS returns no supply are
+        left out.
+        """
+        skus = unique_list_order_preserved(skus)
+        api = self.throttled()
+        # Supply is read from parsed responses, which requires MWSResponse.
+        api._use_feature_mwsresponse = True
+
+        def _list_supply(chunk):
+            members = []
+            response = api.list_inventory_supply(
+                skus=chunk,
+                response_group=response_group,
+                marketplace_id=marketplace_id,
+            )
+            while True:
+                supply = response.parsed.get("InventorySupplyList") or {}
+                members.extend(supply.get("member", []))
+                next_token = response.parsed.get("NextToken")
+                if not next_token:
+                    return members
+                response = api.list_inventory_supply(next_token=next_token)
+
+        found = {}
+        chunks = chunked(skus, LIST_INVENTORY_SUPPLY_SKU_LIMIT)
+        for _, members in concurrent_map(_list_supply, chunks, max_workers=max_workers):
+            for member in members:
+                found[member.SellerSKU] = member
+        return {sku: found[sku] for sku in skus if sku in found}
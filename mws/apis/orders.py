@@ -2,11 +2,16 @@
 
 from mws import MWS
 from mws.decorators import next_token_action
+from mws.utils.collections import unique_list_order_preserved
+from mws.utils.concurrency import DEFAULT_MAX_WORKERS, chunked, concurrent_map
 
 # DEPRECATIONS
 from mws.utils.deprecation import kwargs_renamed_for_v11
 from mws.utils.params import enumerate_param, enumerate_params
 
+GET_ORDER_ID_LIMIT = 50
+"""Maximum number of AmazonOrderIds accepted by one GetOrder request."""
+
 
 class Orders(MWS):
     """Amazon Orders API
@@ -22,6 +27,11 @@ class Orders(MWS):
         "ListOrders",
         "ListOrderItems",
     ]
+    THROTTLE_LIMITS = {
+        "ListOrders": (6, 60),
+        "GetOrder": (6, 60),
+        "ListOrderItems": (30, 2),
+    }
 
     @kwargs_renamed_for_v11(
         [
@@ -104,6 +114,35 @@ class Orders(MWS):
         data = enumerate_param("AmazonOrderId.Id.", amazon_order_ids)
         return self.make_request("GetOrder", data)
 
+    def get_orders(self, amazon_order_ids, max_workers=DEFAULT_MAX_WORKERS):
+        """Returns any number of orders by AmazonOrderId, as a dict mapping each ID
+        to its ``Order`` node, in the order the IDs were given.
+
+        Duplicate IDs are ignored. IDs are sent in GetOrder requests of up to 50
+        at a time, running in up to ``max_workers`` threads and throttled to the
+        operation's quota. IDs for which MWS returns no order are left out.
+        """
+        amazon_order_ids = unique_list_order_preserved(amazon_order_ids)
+        api = self.throttled()
+        # Orders are read from parsed responses, which requires MWSResponse.
+        api._use_feature_mwsresponse = True
+
+        def _get_orders(chunk):
+            response = api.get_order(chunk)
+            orders = response.parsed.get("Orders") or {}
+            return orders.get("Order", [])
+
+        found = {}
+        chunks = chunked(amazon_order_ids, GET_ORDER_ID_LIMIT)
+        for _, orders in concurrent_map(_get_orders, chunks, max_workers=max_workers):
+            for order in orders:
+                found[order.AmazonOrderId] = order
+        return {
+            order_id: found[order_id]
+            for order_id in amazon_order_ids
+            if order_id in found
+        }
+
     @next_token_action("ListOrderItems")
     def list_order_items(self, amazon_order_id=None, next_token=None):
         """Returns order items based on the AmazonOrderId that you specify.
@@ -122,3 +161,34 @@ class Orders(MWS):
         https://docs.developer.amazonservices.com/en_US/orders-2013-09-01/Orders_ListOrderItemsByNextToken.html
         """
         return self.list_order_items(next_token=token)
+
+    def iter_order_items(
+        self, amazon_order_ids, max_workers=DEFAULT_MAX_WORKERS, ordered=False
+    ):
+        """Lists the items of many orders concurrently, yielding
+        ``(amazon_order_id, items)`` pairs, where ``items`` is a list of the
+        ``OrderItem`` nodes of every page of results for that order.
+
+        ListOrderItems requests run in up to ``max_workers`` threads, throttled to
+        the operation's quota, and "ListOrderItemsByNextToken" is followed for
+        each order. Pairs are yielded as each order completes, or in the order of
+        ``amazon_order_ids`` if ``ordered`` is ``True``.
+        """
+        api = self.throttled()
+        # Items are read from parsed responses, which requires MWSResponse.
+        api._use_feature_mwsresponse = True
+
+        def _order_items(amazon_order_id):
+            items = []
+            response = api.list_order_items(amazon_order_id=amazon_order_id)
+            while True:
+                order_items = response.parsed.get("OrderItems") or {}
+                items.extend(order_items.get("OrderItem", []))
+                next_token = response.parsed.get("NextToken")
+                if not next_token:
+                    return items
+                response = api.list_order_items(next_token=next_token)
+
+        yield from concurrent_map(
+            _order_items, amazon_order_ids, max_workers=max_workers, ordered=ordered
+        )
@@ -1,17 +1,25 @@
 """Amazon MWS Reports API."""
 
 import datetime
+import shutil
+import tempfile
+import time
 import typing
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from enum import Enum
 from typing import List, Union
 
 from mws import MWS, Marketplaces
 from mws.decorators import next_token_action
+from mws.errors import MWSError
 from mws.models import reports as models
+from mws.utils.concurrency import DEFAULT_MAX_WORKERS, chunked, concurrent_map
 
 # DEPRECATIONS
 from mws.utils.deprecation import kwargs_renamed_for_v11
 from mws.utils.params import coerce_to_bool, enumerate_param, enumerate_params
+from mws.utils.streams import response_stream
+from mws.utils.timezone import date_windows, mws_utc_now
 
 DateType = Union["datetime.datetime", "datetime.date"]
 
@@ -45,6 +53,69 @@ def report_options_str(report_options: dict) -> str:
     return ";".join(output)
 
 
+REPORT_POLL_INTERVAL = 45
+"""Default seconds between status checks on pending report requests,
+matching the restore rate of GetReportRequestList.
+"""
+
+REPORT_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+"""Report partitions larger than this many bytes are spooled to disk while downloading."""
+
+REPORT_REQUEST_ID_LIMIT = 100
+"""Maximum number of ReportRequestIds to check in one GetReportRequestList call."""
+
+
+def _download_report(api, report_id):
+    """Downloads the report ``report_id`` into a temporary file, returned rewound."""
+    response = api.get_report(report_id, stream=True)
+    spool = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE)
+    try:
+        shutil.copyfileobj(response_stream(response), spool)
+    except BaseException:
+        spool.close()
+        raise
+    finally:
+        response.original.close()
+    spool.seek(0)
+    return spool
+
+
+def _ready_report_ids(api, request_ids):
+    """Checks the status of each of ``request_ids``, yielding
+    ``(request_id, report_id)`` for those that are finished.
+    ``report_id`` is ``None`` for requests that finished with no data.
+    """
+    for chunk in chunked(list(request_ids), REPORT_REQUEST_ID_LIMIT):
+        response = api.get_report_request_list(request_ids=chunk, max_count=len(chunk))
+        for info in response.parsed.get("ReportRequestInfo", []):
+            status = info.ReportProcessingStatus
+            if status == models.ProcessingStatus.DONE:
+                yield info.ReportRequestId, info.GeneratedReportId
+            elif status == models.ProcessingStatus.DONE_NO_DATA:
+                yield info.ReportRequestId, None
+            elif status == models.ProcessingStatus.CANCELLED:
+                raise MWSError(f"Report request {info.ReportRequestId} was cancelled.")
+
+
+def _merged_report_lines(partitions):
+    """Yields the lines of each file in ``partitions`` as ``bytes``, closing each file
+    when done. The header line of every partition after the first is skipped
+    if it matches the first header.
+    """
+    header = None
+    for partition in partitions:
+        with partition:
+            for idx, line in enumerate(partition):
+                if not line.endswith(b"\n"):
+                    line += b"\n"
+                if idx == 0:
+                    if header is None:
+                        header = line.rstrip(b"\r\n")
+                    elif line.rstrip(b"\r\n") == header:
+                        continue
+                yield line
+
+
 class Reports(MWS):
     """Amazon MWS Reports API.
 
@@ -60,6 +131,20 @@ class Reports(MWS):
         "GetReportScheduleList",
     ]
 
+    THROTTLE_LIMITS = {
+        "RequestReport": (15, 60),
+        "GetReportRequestList": (10, 45),
+        "GetReportRequestCount": (10, 45),
+        "CancelReportRequests": (10, 45),
+        "GetReportList": (10, 60),
+        "GetReportCount": (10, 45),
+        "GetReport": (15, 60),
+        "ManageReportSchedule": (10, 45),
+        "GetReportScheduleList": (10, 45),
+        "GetReportScheduleCount": (10, 45),
+        "UpdateReportAcknowledgements": (10, 45),
+    }
+
     # Models attached to this API
     ReportType = models.ReportType
     ProcessingStatus = models.ProcessingStatus
@@ -294,13 +379,17 @@ class Reports(MWS):
         data.update(enumerate_param("ReportTypeList.Type.", report_types))
         return self.make_request("GetReportCount", data)
 
-    def get_report(self, report_id: str):
+    def get_report(self, report_id: str, stream: bool = False):
         """Returns the contents of a report and the Content-MD5 header for the returned report body.
 
+        Set ``stream`` to ``True`` to leave the report body unread until it is
+        consumed, for instance with
+        :py:meth:`MWSResponse.iter_flat_file() <mws.MWSResponse.iter_flat_file>`.
+
         `MWS Docs: GetReport
         <https://docs.developer.amazonservices.com/en_US/reports/Reports_GetReport.html>`_
         """
-        return self.make_request("GetReport", {"ReportId": report_id})
+        return self.make_request("GetReport", {"ReportId": report_id}, stream=stream)
 
     def manage_report_schedule(
         self,
@@ -378,3 +467,153 @@ class Reports(MWS):
         data = {"Acknowledged": acknowledged}
         data.update(enumerate_param("ReportIdList.Id.", report_ids))
         return self.make_request("UpdateReportAcknowledgements", data)
+
+    def iter_partitioned_report(
+        self,
+        report_type: Union[models.ReportType, str],
+        start_date: DateType,
+        end_date: DateType = None,
+        window: datetime.timedelta = datetime.timedelta(days=30),
+        marketplace_ids: List[Union[Marketplaces, str]] = None,
+        report_options: dict = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        ordered: bool = True,
+        poll_interval: float = REPORT_POLL_INTERVAL,
+        timeout: float = None,
+    ):
+        """Requests a flat file report for a long date range as a series of smaller
+        reports, each covering at most ``window`` of the range from ``start_date``
+        to ``end_date`` (default: now), then yields the lines of all of them as one
+        report.
+
+        Report requests and downloads run in up to ``max_workers`` threads, throttled
+        to the quotas of each operation. Downloads begin as soon as each partition is
+        ready, and each is spooled to a temporary file rather than held in memory.
+
+        Lines are yielded as ``bytes``, so the output can be passed straight to
+        :py:class:`FlatFileReader <mws.utils.flatfile.FlatFileReader>`. The header
+        line is yielded once, at the start. If ``ordered`` is ``True`` (the default),
+        partitions are yielded in date order; otherwise, in the order they finish
+        downloading.
+
+        ``poll_interval`` sets the seconds between status checks on pending requests.
+        If ``timeout`` seconds pass with partitions still pending, ``MWSError`` is
+        raised. ``MWSError`` is also raised if MWS cancels any partition's request.
+        """
+        partitions = self._iter_report_partitions(
+            report_type,
+            start_date,
+            end_date,
+            window=window,
+            marketplace_ids=marketplace_ids,
+            report_options=report_options,
+            max_workers=max_workers,
+            ordered=ordered,
+            poll_interval=poll_interval,
+            timeout=timeout,
+        )
+        yield from _merged_report_lines(partitions)
+
+    def _iter_report_partitions(
+        self,
+        report_type,
+        start_date,
+        end_date,
+        window,
+        marketplace_ids,
+        report_options,
+        max_workers,
+        ordered,
+        poll_interval,
+        timeout,
+    ):
+        """Requests and downloads each partition of a report for
+        ``iter_partitioned_report``, yielding temporary files containing their content.
+        """
+        if end_date is None:
+            end_date = mws_utc_now()
+            if not isinstance(start_date, datetime.datetime):
+                start_date = datetime.datetime.combine(start_date, datetime.time())
+            elif start_date.tzinfo is not None:
+                end_date = end_date.replace(tzinfo=datetime.timezone.utc)
+        windows = date_windows(start_date, end_date, window)
+        api = self.throttled()
+        # Partitions are read from parsed responses, which requires MWSResponse.
+        api._use_feature_mwsresponse = True
+
+        def _request(date_window):
+            response = api.request_report(
+                report_type,
+                start_date=date_window[0],
+                end_date=date_window[1],
+                marketplace_ids=marketplace_ids,
+                report_options=report_options,
+            )
+            return response.parsed.ReportRequestInfo.ReportRequestId
+
+        request_ids = [
+            request_id
+            for _, request_id in concurrent_map(_request, windows, max_workers)
+        ]
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        downloads = {}
+        pending = list(request_ids)
+        remaining = list(request_ids)
+        last_poll = None
+        try:
+            while remaining:
+                now = time.monotonic()
+                if pending and (last_poll is None or now - last_poll >= poll_interval):
+                    last_poll = now
+                    for request_id, report_id in _ready_report_ids(api, pending):
+                        pending.remove(request_id)
+                        if report_id is None:
+                            # _DONE_NO_DATA_: nothing to download.
+                            downloads[request_id] = Future()
+                            downloads[request_id].set_result(None)
+                        else:
+                            downloads[request_id] = executor.submit(
+                                _download_report, api, report_id
+                            )
+                candidates = remaining[:1] if ordered else remaining
+                finished = [
+                    request_id
+                    for request_id in candidates
+                    if request_id in downloads and downloads[request_id].done()
+                ]
+                if finished:
+                    for request_id in finished:
+                        remaining.remove(request_id)
+                        partition = downloads.pop(request_id).result()
+                        if partition is not None:
+                            yield partition
+                    continue
+                if pending and deadline is not None and now > deadline:
+                    raise MWSError(
+                        f"Timed out waiting for report requests: {', '.join(pending)}"
+                    )
+                waiting = [
+                    downloads[request_id]
+                    for request_id in candidates
+                    if request_id in downloads
+                ]
+                if pending:
+                    delay = max(0, poll_interval - (time.monotonic() - last_poll))
+                    if waiting:
+                        wait(waiting, timeout=delay, return_when=FIRST_COMPLETED)
+                    else:
+                        time.sleep(delay)
+                else:
+                    wait(waiting, return_when=FIRST_COMPLETED)
+        finally:
+            for future in downloads.values():
+                future.cancel()
+            executor.shutdown(wait=True)
+            # Close any partitions downloaded but never yielded.
+            for future in downloads.values():
+                if not future.cancelled() and future.exception() is None:
+                    partition = future.result()
+                    if partition is not None:
+                        partition.close()
@@ -0,0 +1,3 @@
+"""Components built on top of the MWS API classes that keep their own state,
+such as local caches and sync watermarks.
+"""
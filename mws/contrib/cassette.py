@@ -0,0 +1,227 @@
+"""Recording of MWS traffic to an archive, and its replay without a network,
+for offline tests and benchmarks.
+"""
+
+import datetime
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+from typing import NamedTuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from mws.errors import MWSError
+from mws.mws import canonicalized_query_string
+
+CASSETTE_FORMAT = 1
+"""Version of the archive written by :py:meth:`Cassette.save`."""
+
+CASSETTE_IGNORED_PARAMS = frozenset(
+    {"AWSAccessKeyId", "MWSAuthToken", "Signature", "Timestamp"}
+)
+"""Params left out of the key identifying a request: those that differ on
+every request, and credentials, which are never written to the archive.
+"""
+
+RECORD = "record"
+REPLAY = "replay"
+
+_INDEX_NAME = "cassette.json"
+
+
+class CassetteMiss(MWSError):
+    """Raised when replaying a request that was not recorded."""
+
+    pass
+
+
+class Interaction(NamedTuple):
+    """A request recorded in a :py:class:`Cassette`, with its response."""
+
+    action: str
+    key: str
+    """Method, URL and canonical params of the request, without the params in
+    ``CASSETTE_IGNORED_PARAMS``.
+    """
+    status_code: int
+    reason: str
+    headers: dict
+    encoding: str
+    body: bytes
+    elapsed: float
+    """Seconds taken by the original request."""
+
+
+class Cassette:
+    """Records the requests API instances send through it, along with their
+    responses, to the archive at ``path``; or replays the archive's responses
+    without sending anything.
+
+    A cassette stands in for a ``requests.Session``: pass it as the ``session``
+    of an API instance. In ``"record"`` mode, requests go out through
+    ``session`` (or ``requests.request`` if ``None``), and :py:meth:`save`
+    writes them to ``path``, which happens automatically when leaving a ``with``
+    block. In ``"replay"`` mode (the default), each request gets the response
+    recorded for the same action and params, ignoring those in ``ignore_params``;
+    a request recorded several times gets each response in turn, then the last
+    one again. A request that was not recorded raises :py:class:`CassetteMiss`.
+
+    ``latency`` simulates network time when replaying: a number of seconds to
+    wait before each response, ``"recorded"`` to wait as long as the original
+    request took, or a callable returning the seconds to wait for a given
+    :py:class:`Interaction`. Responses are immediate by default.
+
+    .. code-block:: python
+
+        from mws import Orders
+        from mws.contrib.cassette import Cassette
+
+        with Cassette("orders.zip", mode="record") as cassette:
+            Orders(..., session=cassette).list_orders(...)
+
+        # Later, offline:
+        cassette = Cassette("orders.zip", latency="recorded")
+        response = Orders(..., session=cassette).list_orders(...)
+    """
+
+    def __init__(
+        self,
+        path,
+        mode=REPLAY,
+        session=None,
+        latency=None,
+        ignore_params=CASSETTE_IGNORED_PARAMS,
+        sleep=time.sleep,
+    ):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"`mode` must be {RECORD!r} or {REPLAY!r}, not {mode!r}.")
+        self.path = path
+        self.mode = mode
+        self.session = session
+        self.latency = latency
+        self.ignore_params = frozenset(ignore_params)
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.interactions = []
+        self._by_key = {}
+        self._replayed = {}
+        if mode == REPLAY:
+            for interaction in self._load():
+                self._add(interaction)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if self.mode == RECORD and exc_type is None:
+            self.save()
+
+    def __len__(self):
+        return len(self.interactions)
+
+    def request_key(self, method, url, params):
+        """Returns the key identifying a request with these args."""
+        kept = {
+            name: value
+            for name, value in (params or {}).items()
+            if name not in self.ignore_params
+        }
+        return f"{method} {url}?{canonicalized_query_string(kept)}"
+
+    def request(self, method, url, params=None, data=None, **kwargs):
+        """Sends (or replays) a request, as ``requests.Session.request``."""
+        # MWS params are sent as the query string when the body holds a feed,
+        # and as the form body otherwise.
+        mws_params = params if params is not None else data
+        key = self.request_key(method, url, mws_params)
+        if self.mode == RECORD:
+            return self._record(key, mws_params, method, url, params, data, **kwargs)
+        return self._replay(key, url)
+
+    def _add(self, interaction):
+        self.interactions.append(interaction)
+        self._by_key.setdefault(interaction.key, []).append(interaction)
+
+    def _record(self, key, mws_params, method, url, params, data, **kwargs):
+        send = requests.request if self.session is None else self.session.request
+        response = send(method=method, url=url, params=params, data=data, **kwargs)
+        interaction = Interaction(
+            action=(mws_params or {}).get("Action"),
+            key=key,
+            status_code=response.status_code,
+            reason=response.reason,
+            headers=dict(response.headers),
+            encoding=response.encoding,
+            # Reads a streamed body in full; the response then serves it from memory.
+            body=response.content,
+            elapsed=response.elapsed.total_seconds(),
+        )
+        with self._lock:
+            self._add(interaction)
+        return response
+
+    def _replay(self, key, url):
+        with self._lock:
+            recorded = self._by_key.get(key)
+            if not recorded:
+                raise CassetteMiss(f"No response recorded for request: {key}")
+            index = self._replayed.get(key, 0)
+            self._replayed[key] = index + 1
+        interaction = recorded[min(index, len(recorded) - 1)]
+        delay = self._delay(interaction)
+        if delay:
+            self._sleep(delay)
+        response = requests.Response()
+        response.status_code = interaction.status_code
+        response.reason = interaction.reason
+        response.headers = CaseInsensitiveDict(interaction.headers)
+        response.encoding = interaction.encoding
+        response.url = url
+        response.elapsed = datetime.timedelta(seconds=delay or 0)
+        response._content = interaction.body
+        response._content_consumed = True
+        return response
+
+    def _delay(self, interaction):
+        if self.latency is None:
+            return 0
+        if self.latency == "recorded":
+            return interaction.elapsed
+        if callable(self.latency):
+            return self.latency(interaction)
+        return self.latency
+
+    def _load(self):
+        with zipfile.ZipFile(self.path) as archive:
+            index = json.loads(archive.read(_INDEX_NAME))
+            if index.get("format") != CASSETTE_FORMAT:
+                raise ValueError(
+                    f"Unsupported cassette format: {index.get('format')!r}"
+                )
+            for entry in index["interactions"]:
+                body = archive.read(entry.pop("body"))
+                yield Interaction(body=body, **entry)
+
+    def save(self):
+        """Writes all recorded interactions to ``path``, replacing its content."""
+        with self._lock:
+            interactions = list(self.interactions)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            entries = []
+            for number, interaction in enumerate(interactions):
+                entry = interaction._asdict()
+                entry["body"] = f"bodies/{number}"
+                archive.writestr(entry["body"], interaction.body)
+                entries.append(entry)
+            index = {"format": CASSETTE_FORMAT, "interactions": entries}
+            archive.writestr(_INDEX_NAME, json.dumps(index, indent=1))
+        # Write to a temporary file first, so a failed save keeps the old archive.
+        temp_path = f"{os.fspath(self.path)}.tmp"
+        with open(temp_path, "wb") as handle:
+            handle.write(buffer.getvalue())
+        os.replace(temp_path, self.path)
@@ -0,0 +1,211 @@
+"""Registry of seller accounts and a pool of API clients acting for them,
+for applications that manage many sellers with one set of developer credentials.
+"""
+
+import threading
+from typing import Any, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from mws.mws import Marketplaces
+from mws.utils.concurrency import DEFAULT_MAX_WORKERS, concurrent_map
+from mws.utils.throttle import ThrottleRegistry
+
+DEFAULT_POOL_MAXSIZE = 10
+"""Default number of connections kept open to each endpoint."""
+
+
+class SellerAccount(NamedTuple):
+    """Credentials of a seller registered in a :py:class:`ClientPool`."""
+
+    seller_id: str
+    access_key: str
+    secret_key: str
+    auth_token: str = ""
+    region: str = "US"
+    """Region used for this seller's clients unless another is requested."""
+
+
+class SellerResult(NamedTuple):
+    """The outcome of an operation run for one seller by :py:meth:`ClientPool.fan_out`."""
+
+    seller_id: str
+    result: Any
+    """Return value of the operation, or ``None`` if it raised."""
+    error: Optional[Exception] = None
+    """Exception raised by the operation, if any."""
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class ClientPool:
+    """Holds the accounts of many sellers, building API instances for them on
+    first use: one per seller, API class and region.
+
+    All instances talking to the same endpoint send their requests through one
+    ``requests.Session``, keeping up to ``pool_maxsize`` connections open to it.
+    Each instance has throttling enabled, with the
+    :py:class:`ThrottleRegistry <mws.utils.throttle.ThrottleRegistry>` of its
+    seller, which keeps buckets per endpoint and action: so each seller's
+    quotas are respected however many threads and clients use them, including
+    clients for different regions served by one endpoint.
+
+    ``api_kwargs`` (such as ``proxy`` or ``user_agent_str``) are passed to
+    every API instance created. They may include ``throttle=False`` to turn
+    throttling off.
+
+    .. code-block:: python
+
+        from mws import Orders
+        from mws.contrib.client_pool import ClientPool
+
+        with ClientPool() as pool:
+            pool.add_account("A1SELLER", access_key, secret_key, auth_token="amzn.mws...")
+            pool.add_account("A2SELLER", access_key, secret_key, region="UK")
+            orders = pool.client("A1SELLER", Orders)
+            for outcome in pool.fan_out(
+                Orders, lambda api: api.list_orders(created_after=...)
+            ):
+                if outcome.ok:
+                    print(outcome.seller_id, outcome.result.parsed)
+    """
+
+    def __init__(self, pool_maxsize=DEFAULT_POOL_MAXSIZE, **api_kwargs):
+        self.pool_maxsize = pool_maxsize
+        self.api_kwargs = api_kwargs
+        self._accounts = {}
+        self._clients = {}
+        self._throttles = {}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def __contains__(self, seller_id):
+        return seller_id in self._accounts
+
+    @property
+    def seller_ids(self):
+        """IDs of all registered sellers, in the order they were added."""
+        return list(self._accounts)
+
+    def add_account(  # nosec No password default is provided, only auth_token empty value
+        self, seller_id, access_key, secret_key, auth_token="", region="US"
+    ):
+        """Registers a seller, returning its :py:class:`SellerAccount`.
+        Registering a seller again replaces its credentials and discards the
+        clients built with the old ones.
+        """
+        region = getattr(region, "name", region)
+        if region not in Marketplaces.__members__:
+            raise ValueError(f"Incorrect region supplied: {region}.")
+        account = SellerAccount(seller_id, access_key, secret_key, auth_token, region)
+        with self._lock:
+            self._drop_clients(seller_id)
+            self._accounts[seller_id] = account
+        return account
+
+    def remove_account(self, seller_id):
+        """Unregisters a seller, discarding its clients and throttles."""
+        with self._lock:
+            self._accounts.pop(seller_id, None)
+            self._drop_clients(seller_id)
+            self._throttles.pop(seller_id, None)
+
+    def _drop_clients(self, seller_id):
+        for key in [key for key in self._clients if key[0] == seller_id]:
+            del self._clients[key]
+
+    def account(self, seller_id):
+        """Returns the :py:class:`SellerAccount` registered for ``seller_id``."""
+        try:
+            return self._accounts[seller_id]
+        except KeyError:
+            raise KeyError(f"No account registered for seller {seller_id!r}.") from None
+
+    def client(self, seller_id, api_class, region=None):
+        """Returns the instance of ``api_class`` (such as ``mws.Orders``) acting
+        for ``seller_id`` in ``region`` (default: the seller's own region),
+        building it on first use.
+        """
+        account = self.account(seller_id)
+        region = getattr(region, "name", region) or account.region
+        key = (seller_id, api_class, region)
+        with self._lock:
+            api = self._clients.get(key)
+            if api is not None:
+                return api
+            api = api_class(
+                account.access_key,
+                account.secret_key,
+                seller_id,
+                region=region,
+                auth_token=account.auth_token,
+                **{"throttle": True, **self.api_kwargs},
+            )
+            api.session = self._session(api.domain)
+            api.throttles = self._throttles.setdefault(seller_id, ThrottleRegistry())
+            self._clients[key] = api
+            return api
+
+    def _session(self, domain):
+        """Returns the session shared by all clients for ``domain``."""
+        session = self._sessions.get(domain)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._sessions[domain] = session
+        return session
+
+    def fan_out(
+        self,
+        api_class,
+        func,
+        seller_ids=None,
+        region=None,
+        max_workers=DEFAULT_MAX_WORKERS,
+        ordered=False,
+    ):
+        """Calls ``func(api)`` with the ``api_class`` client of each of
+        ``seller_ids`` (default: every registered seller) in a pool of threads,
+        yielding a :py:class:`SellerResult` for each seller.
+
+        Results are yielded as each call completes, or in the order of
+        ``seller_ids`` if ``ordered`` is ``True``. An exception raised for one
+        seller does not stop the others: it is returned as that seller's
+        ``error``.
+        """
+        if seller_ids is None:
+            seller_ids = self.seller_ids
+
+        def _run(seller_id):
+            try:
+                return func(self.client(seller_id, api_class, region)), None
+            except Exception as exc:
+                return None, exc
+
+        for seller_id, (result, error) in concurrent_map(
+            _run, seller_ids, max_workers=max_workers, ordered=ordered
+        ):
+            yield SellerResult(seller_id, result, error)
+
+    def close(self):
+        """Closes the connections of every endpoint and discards all clients."""
+        with self._lock:
+            self._clients.clear()
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
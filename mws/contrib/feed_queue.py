@@ -0,0 +1,350 @@
+"""Batching queue for feed updates, submitting them as coalesced feeds
+and tracking each update through to its processing result.
+"""
+
+import threading
+import time
+from enum import Enum
+
+from mws.apis.feeds import FEED_SUBMISSION_ID_LIMIT, FeedProcessingStatus
+from mws.utils.concurrency import chunked
+from mws.utils.feeds import FEED_MESSAGE_TYPES, XMLFeedWriter
+from mws.utils.processing_report import (
+    RESULT_ERROR,
+    RESULT_WARNING,
+    ProcessingReport,
+)
+
+DEFAULT_MAX_MESSAGES = 10000
+"""Default number of messages at which a pending feed is submitted."""
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+"""Default size of message content, in bytes, at which a pending feed is submitted."""
+
+DEFAULT_MAX_AGE = 300
+"""Default age, in seconds, at which a pending feed is due for submission."""
+
+
+class FeedUpdateStatus(str, Enum):
+    """The state of a :py:class:`FeedUpdate` in a :py:class:`FeedQueue`."""
+
+    PENDING = "pending"
+    """Waiting in the queue to be submitted."""
+
+    SUPERSEDED = "superseded"
+    """Replaced by a later update with the same key before it was submitted."""
+
+    SUBMITTED = "submitted"
+    """Submitted in a feed that has not finished processing."""
+
+    SUCCEEDED = "succeeded"
+    """Processed without errors (but possibly with warnings)."""
+
+    FAILED = "failed"
+    """Processed with errors, or its feed was cancelled."""
+
+
+class FeedUpdate:
+    """A single message queued in a :py:class:`FeedQueue`.
+
+    ``message`` is the content of an envelope ``Message`` without its
+    ``MessageID``, i.e. ``"<Price><SKU>ABC</SKU>...</Price>"``. Once processed,
+    ``results`` holds the
+    :py:class:`ProcessingResult <mws.utils.processing_report.ProcessingResult>`
+    tuples that refer to it.
+    """
+
+    def __init__(self, feed_type, message, key=None):
+        self.feed_type = feed_type
+        self.message = message
+        self.key = key
+        self.size = len(message.encode("utf-8"))
+        self.status = FeedUpdateStatus.PENDING
+        self.message_id = None
+        self.batch = None
+        self.superseded_by = None
+        self.results = []
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}({self.feed_type!r}, key={self.key!r}, "
+            f"status={self.status.value!r})>"
+        )
+
+    @property
+    def errors(self):
+        return [r for r in self.results if r.result_code == RESULT_ERROR]
+
+    @property
+    def warnings(self):
+        return [r for r in self.results if r.result_code == RESULT_WARNING]
+
+
+class FeedBatch:
+    """A feed submitted by a :py:class:`FeedQueue`, combining many updates."""
+
+    def __init__(self, feed_type, updates):
+        self.feed_type = feed_type
+        self.updates = updates
+        self.feed_submission_id = None
+        self.processing_status = None
+        self.processing_report = None
+        """The feed's :py:class:`ProcessingReport
+        <mws.utils.processing_report.ProcessingReport>`, once it is done.
+        """
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}({self.feed_type!r}, "
+            f"{self.feed_submission_id!r}, updates={len(self.updates)})>"
+        )
+
+    @property
+    def done(self):
+        return self.processing_status in (
+            FeedProcessingStatus.DONE,
+            FeedProcessingStatus.CANCELLED,
+        )
+
+
+class _PendingFeed:
+    """Updates gathered for one feed type, keeping the latest update per key."""
+
+    def __init__(self, created):
+        self.created = created
+        # Insertion-ordered, so updates are submitted in the order they were added.
+        # Updates without a key each get a slot of their own.
+        self._slots = {}
+        self.size = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    @property
+    def updates(self):
+        return list(self._slots.values())
+
+    def add(self, update):
+        slot = object() if update.key is None else update.key
+        previous = self._slots.pop(slot, None)
+        if previous is not None:
+            previous.status = FeedUpdateStatus.SUPERSEDED
+            previous.superseded_by = update
+            self.size -= previous.size
+        self._slots[slot] = update
+        self.size += update.size
+
+
+class FeedQueue:
+    """Gathers updates for XML feeds, submitting them in batches: one feed per
+    ``FeedType`` holding up to ``max_messages`` messages or ``max_bytes`` of
+    message content, or whatever has gathered once the oldest update pending
+    for that type is ``max_age`` seconds old.
+
+    Updates given a ``key`` (such as their SKU) are coalesced: a later update
+    with the same key replaces an earlier one that has not been submitted yet.
+
+    :py:meth:`poll` checks submitted feeds in bulk and fetches the processing
+    report of each finished feed, mapping its results back to the updates they
+    refer to.
+
+    .. code-block:: python
+
+        from mws import Feeds
+        from mws.contrib.feed_queue import FeedQueue
+
+        queue = FeedQueue(Feeds(...), marketplace_ids=["ATVPDKIKX0DER"])
+        update = queue.add(
+            "_POST_INVENTORY_AVAILABILITY_DATA_",
+            "<Inventory><SKU>ABC</SKU><Quantity>3</Quantity></Inventory>",
+            key="ABC",
+        )
+        while True:
+            queue.submit_due()
+            for batch in queue.poll():
+                for update in batch.updates:
+                    if update.errors:
+                        ...
+            time.sleep(60)
+    """
+
+    def __init__(
+        self,
+        feeds_api,
+        marketplace_ids=None,
+        max_messages=DEFAULT_MAX_MESSAGES,
+        max_bytes=DEFAULT_MAX_BYTES,
+        max_age=DEFAULT_MAX_AGE,
+        clock=time.monotonic,
+    ):
+        self.api = feeds_api.throttled()
+        # Statuses are read from parsed responses, which requires MWSResponse.
+        self.api._use_feature_mwsresponse = True
+        self.merchant_id = feeds_api.account_id
+        self.marketplace_ids = marketplace_ids
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._submitted = {}
+
+    def __len__(self):
+        """Number of updates waiting to be submitted."""
+        with self._lock:
+            return sum(len(pending) for pending in self._pending.values())
+
+    @property
+    def in_flight(self):
+        """Batches submitted that have not finished processing."""
+        with self._lock:
+            return list(self._submitted.values())
+
+    def add(self, feed_type, message, key=None):
+        """Queues ``message`` for a feed of ``feed_type``, returning its
+        :py:class:`FeedUpdate`. Submits the pending feed for that type if
+        it is now full.
+        """
+        feed_type = getattr(feed_type, "value", feed_type)
+        if feed_type not in FEED_MESSAGE_TYPES:
+            raise ValueError(f"Feed type {feed_type!r} is not a supported XML feed.")
+        if isinstance(message, bytes):
+            message = message.decode("utf-8")
+        update = FeedUpdate(feed_type, message, key=key)
+        with self._lock:
+            pending = self._pending.get(feed_type)
+            if pending is None:
+                pending = self._pending[feed_type] = _PendingFeed(self._clock())
+            pending.add(update)
+            full = len(pending) >= self.max_messages or pending.size >= self.max_bytes
+            if full:
+                del self._pending[feed_type]
+        if full:
+            self._submit(feed_type, pending.updates)
+        return update
+
+    def submit_due(self):
+        """Submits each pending feed whose oldest update has reached ``max_age``,
+        returning the list of :py:class:`FeedBatch` submitted.
+        """
+        now = self._clock()
+        return self._submit_pending(
+            lambda pending: now - pending.created >= self.max_age
+        )
+
+    def flush(self):
+        """Submits every pending feed, returning the list of :py:class:`FeedBatch`
+        submitted.
+        """
+        return self._submit_pending(lambda pending: True)
+
+    def _submit_pending(self, is_due):
+        with self._lock:
+            due = {
+                feed_type: pending
+                for feed_type, pending in self._pending.items()
+                if is_due(pending)
+            }
+            for feed_type in due:
+                del self._pending[feed_type]
+        return [
+            self._submit(feed_type, pending.updates)
+            for feed_type, pending in due.items()
+        ]
+
+    def _write_feed(self, feed_type, updates):
+        feed = XMLFeedWriter(feed_type, self.merchant_id)
+        try:
+            for update in updates:
+                update.message_id = feed.add_message(update.message)
+        except BaseException:
+            feed.discard()
+            raise
+        return feed.close()
+
+    def _submit(self, feed_type, updates):
+        batch = FeedBatch(feed_type, updates)
+        for update in updates:
+            update.batch = batch
+        try:
+            feed = self._write_feed(feed_type, updates)
+            try:
+                response = self.api.submit_feed(
+                    feed, feed_type, marketplace_ids=self.marketplace_ids
+                )
+            finally:
+                feed.discard()
+        except BaseException:
+            self._requeue(feed_type, updates)
+            raise
+        info = response.parsed.FeedSubmissionInfo
+        batch.feed_submission_id = info.FeedSubmissionId
+        batch.processing_status = info.FeedProcessingStatus
+        for update in updates:
+            update.status = FeedUpdateStatus.SUBMITTED
+        with self._lock:
+            self._submitted[batch.feed_submission_id] = batch
+        return batch
+
+    def _requeue(self, feed_type, updates):
+        """Puts ``updates`` that failed to be submitted back at the front of
+        the queue, unless superseded by updates added in the meantime.
+        """
+        for update in updates:
+            update.message_id = None
+            update.batch = None
+        with self._lock:
+            pending = _PendingFeed(self._clock())
+            queued = self._pending.get(feed_type)
+            for update in updates + (queued.updates if queued else []):
+                pending.add(update)
+            if queued is not None:
+                pending.created = min(pending.created, queued.created)
+            self._pending[feed_type] = pending
+
+    def poll(self):
+        """Checks the status of all submitted feeds, fetching the processing
+        report of those that are done. Returns the list of :py:class:`FeedBatch`
+        that finished processing since the last poll.
+        """
+        with self._lock:
+            feed_ids = list(self._submitted)
+        finished = []
+        for chunk in chunked(feed_ids, FEED_SUBMISSION_ID_LIMIT):
+            response = self.api.get_feed_submission_list(
+                feed_ids=chunk, max_count=len(chunk)
+            )
+            for info in response.parsed.get("FeedSubmissionInfo", []):
+                with self._lock:
+                    batch = self._submitted.get(info.FeedSubmissionId)
+                if batch is None:
+                    continue
+                batch.processing_status = info.FeedProcessingStatus
+                if batch.processing_status == FeedProcessingStatus.DONE:
+                    self._apply_report(batch)
+                elif batch.processing_status == FeedProcessingStatus.CANCELLED:
+                    for update in batch.updates:
+                        update.status = FeedUpdateStatus.FAILED
+                else:
+                    continue
+                with self._lock:
+                    del self._submitted[batch.feed_submission_id]
+                finished.append(batch)
+        return finished
+
+    def _apply_report(self, batch):
+        response = self.api.get_feed_submission_result(
+            batch.feed_submission_id, stream=True
+        )
+        try:
+            report = ProcessingReport(response)
+        finally:
+            response.original.close()
+        batch.processing_report = report
+        for update in batch.updates:
+            update.results = report.for_message(update.message_id)
+            if update.errors:
+                update.status = FeedUpdateStatus.FAILED
+            else:
+                update.status = FeedUpdateStatus.SUCCEEDED
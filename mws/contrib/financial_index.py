@@ -0,0 +1,302 @@
+"""Local index of financial event groups and their events, for reconciling payouts."""
+
+import datetime
+import sqlite3
+from decimal import Decimal
+
+from mws.utils.concurrency import DEFAULT_MAX_WORKERS, concurrent_map
+from mws.utils.finances import FinancialEventRecord
+from mws.utils.flatfile import parse_date, parse_decimal
+from mws.utils.timezone import as_utc
+
+GROUP_CLOSED = "Closed"
+"""ProcessingStatus of a financial event group that will receive no more events."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS financial_event_groups (
+    seller_id TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    processing_status TEXT,
+    fund_transfer_status TEXT,
+    group_start TEXT,
+    group_end TEXT,
+    original_total TEXT,
+    currency TEXT,
+    PRIMARY KEY (seller_id, group_id)
+);
+CREATE TABLE IF NOT EXISTS financial_events (
+    seller_id TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    posted_date TEXT,
+    amazon_order_id TEXT,
+    seller_order_id TEXT,
+    marketplace_name TEXT,
+    seller_sku TEXT,
+    amount_type TEXT,
+    amount TEXT,
+    currency TEXT
+);
+CREATE INDEX IF NOT EXISTS financial_events_by_group
+    ON financial_events (seller_id, group_id);
+CREATE INDEX IF NOT EXISTS financial_events_by_order
+    ON financial_events (seller_id, amazon_order_id);
+"""
+
+_GROUP_COLUMNS = (
+    "group_id",
+    "processing_status",
+    "fund_transfer_status",
+    "group_start",
+    "group_end",
+    "original_total",
+    "currency",
+)
+
+_SELECT_GROUP = """
+SELECT group_id, processing_status, fund_transfer_status, group_start, group_end,
+    original_total, currency
+FROM financial_event_groups WHERE seller_id = ? AND group_id = ?
+"""
+
+_INSERT_GROUP = """
+INSERT OR REPLACE INTO financial_event_groups (seller_id, group_id, processing_status,
+    fund_transfer_status, group_start, group_end, original_total, currency)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Event columns match the fields of FinancialEventRecord, in order.
+_SELECT_EVENTS = """
+SELECT event_type, posted_date, amazon_order_id, seller_order_id, marketplace_name,
+    seller_sku, amount_type, amount, currency
+FROM financial_events
+"""
+
+_INSERT_EVENT = """
+INSERT INTO financial_events (seller_id, group_id, event_type, posted_date,
+    amazon_order_id, seller_order_id, marketplace_name, seller_sku, amount_type,
+    amount, currency)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _event_record(row):
+    """Converts a row of the events table back to a FinancialEventRecord."""
+    values = dict(zip(FinancialEventRecord._fields, row))
+    if values["posted_date"] is not None:
+        values["posted_date"] = datetime.datetime.fromisoformat(values["posted_date"])
+    if values["amount"] is not None:
+        values["amount"] = Decimal(values["amount"])
+    return FinancialEventRecord(**values)
+
+
+class FinancialEventIndex:
+    """Stores financial event groups and their events in a sqlite ``database``
+    (a path, or ``":memory:"``) for fast lookups by group or by order.
+
+    :py:meth:`update` fetches only groups that are new or still open: once a
+    group is stored as closed, its events are never downloaded again.
+
+    .. code-block:: python
+
+        from mws import Finances
+        from mws.contrib.financial_index import FinancialEventIndex
+
+        index = FinancialEventIndex(Finances(...), "finances.sqlite")
+        index.update(started_after=datetime.datetime(2020, 1, 1))
+        for record in index.events_for_order("111-1234567-1234567"):
+            ...
+    """
+
+    def __init__(self, finances_api, database):
+        self.api = finances_api.throttled()
+        # Groups are read from parsed responses, which requires MWSResponse.
+        self.api._use_feature_mwsresponse = True
+        self.seller_id = finances_api.account_id
+        self.connection = sqlite3.connect(str(database))
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _default_started_after(self):
+        """Start of the earliest stored group that is still open, else of the
+        latest stored group, else ``None``.
+        """
+        row = self.connection.execute(
+            "SELECT MIN(group_start) FROM financial_event_groups"
+            " WHERE seller_id = ? AND processing_status != ?",
+            (self.seller_id, GROUP_CLOSED),
+        ).fetchone()
+        if row[0] is None:
+            row = self.connection.execute(
+                "SELECT MAX(group_start) FROM financial_event_groups"
+                " WHERE seller_id = ?",
+                (self.seller_id,),
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return datetime.datetime.fromisoformat(row[0])
+
+    def _iter_groups(self, started_after, started_before):
+        response = self.api.list_financial_event_groups(
+            created_after=started_after, created_before=started_before
+        )
+        while True:
+            groups = response.parsed.get("FinancialEventGroupList") or {}
+            yield from groups.get("FinancialEventGroup", [])
+            next_token = response.parsed.get("NextToken")
+            if not next_token:
+                return
+            response = self.api.list_financial_event_groups(next_token=next_token)
+
+    def update(
+        self, started_after=None, started_before=None, max_workers=DEFAULT_MAX_WORKERS
+    ):
+        """Fetches financial event groups started from ``started_after`` (default:
+        the start of the earliest stored group still open), storing every group
+        and the events of each group that is new or was still open.
+
+        ``started_after`` and ``started_before`` may be dates (taken as midnight
+        UTC) or datetimes (taken as UTC if naive).
+
+        Events of up to ``max_workers`` groups are fetched concurrently. Returns
+        the list of group IDs whose events were (re)loaded.
+        """
+        if started_after is None:
+            started_after = self._default_started_after()
+            if started_after is None:
+                raise ValueError(
+                    "The index is empty: pass `started_after` to set where to begin."
+                )
+        # Dates are taken as midnight UTC; groups are compared in naive UTC.
+        started_after = as_utc(started_after).replace(tzinfo=None)
+        if started_before is not None:
+            started_before = as_utc(started_before).replace(tzinfo=None)
+        closed = {
+            row[0]
+            for row in self.connection.execute(
+                "SELECT group_id FROM financial_event_groups"
+                " WHERE seller_id = ? AND processing_status = ?",
+                (self.seller_id, GROUP_CLOSED),
+            )
+        }
+        stale = []
+        for group in self._iter_groups(started_after, started_before):
+            if group.FinancialEventGroupId in closed:
+                continue
+            stale.append(group)
+
+        def _group_events(group):
+            return list(
+                self.api.stream_financial_events(
+                    financial_event_group_id=group.FinancialEventGroupId
+                )
+            )
+
+        loaded = []
+        for group, records in concurrent_map(
+            _group_events, stale, max_workers=max_workers
+        ):
+            self._store_group(group, records)
+            loaded.append(group.FinancialEventGroupId)
+        return loaded
+
+    def _store_group(self, group, records):
+        """Replaces a group and all its events in one transaction."""
+        total = group.get("OriginalTotal") or {}
+        original_total = parse_decimal(total.get("CurrencyAmount"))
+        group_row = (
+            group.FinancialEventGroupId,
+            group.get("ProcessingStatus"),
+            group.get("FundTransferStatus"),
+            _isoformat(parse_date(group.get("FinancialEventGroupStart"))),
+            _isoformat(parse_date(group.get("FinancialEventGroupEnd"))),
+            None if original_total is None else str(original_total),
+            total.get("CurrencyCode"),
+        )
+        with self.connection:
+            self.connection.execute(_INSERT_GROUP, (self.seller_id,) + group_row)
+            self.connection.execute(
+                "DELETE FROM financial_events WHERE seller_id = ? AND group_id = ?",
+                (self.seller_id, group.FinancialEventGroupId),
+            )
+            self.connection.executemany(
+                _INSERT_EVENT,
+                [
+                    (self.seller_id, group.FinancialEventGroupId)
+                    + record._replace(
+                        posted_date=_isoformat(record.posted_date),
+                        amount=None if record.amount is None else str(record.amount),
+                    )
+                    for record in records
+                ],
+            )
+
+    def group(self, group_id):
+        """Returns the stored group ``group_id`` as a dict, or ``None``."""
+        row = self.connection.execute(
+            _SELECT_GROUP, (self.seller_id, group_id)
+        ).fetchone()
+        if row is None:
+            return None
+        group = dict(zip(_GROUP_COLUMNS, row))
+        for key in ("group_start", "group_end"):
+            if group[key] is not None:
+                group[key] = datetime.datetime.fromisoformat(group[key])
+        if group["original_total"] is not None:
+            group["original_total"] = Decimal(group["original_total"])
+        return group
+
+    def group_ids(self, processing_status=None):
+        """Returns the IDs of all stored groups, optionally only those with
+        the given ``processing_status`` ("Open" or "Closed"), oldest first.
+        """
+        query = "SELECT group_id FROM financial_event_groups WHERE seller_id = ?"
+        args = (self.seller_id,)
+        if processing_status is not None:
+            query += " AND processing_status = ?"
+            args += (processing_status,)
+        query += " ORDER BY group_start"
+        return [row[0] for row in self.connection.execute(query, args)]
+
+    def events_for_group(self, group_id):
+        """Returns the stored events of the group ``group_id``,
+        as :py:class:`FinancialEventRecord <mws.utils.finances.FinancialEventRecord>`.
+        """
+        return [
+            _event_record(row)
+            for row in self.connection.execute(
+                _SELECT_EVENTS + " WHERE seller_id = ? AND group_id = ? ORDER BY rowid",
+                (self.seller_id, group_id),
+            )
+        ]
+
+    def events_for_order(self, amazon_order_id):
+        """Returns the stored events for ``amazon_order_id`` across all groups,
+        as :py:class:`FinancialEventRecord <mws.utils.finances.FinancialEventRecord>`.
+        """
+        return [
+            _event_record(row)
+            for row in self.connection.execute(
+                _SELECT_EVENTS
+                + " WHERE seller_id = ? AND amazon_order_id = ? ORDER BY rowid",
+                (self.seller_id, amazon_order_id),
+            )
+        ]
+
+    def groups_for_order(self, amazon_order_id):
+        """Returns the IDs of the groups holding events for ``amazon_order_id``."""
+        return [
+            row[0]
+            for row in self.connection.execute(
+                "SELECT DISTINCT group_id FROM financial_events"
+                " WHERE seller_id = ? AND amazon_order_id = ? ORDER BY group_id",
+                (self.seller_id, amazon_order_id),
+            )
+        ]
@@ -0,0 +1,312 @@
+"""In-memory inventory supply snapshot, kept current with delta pulls of
+ListInventorySupply by QueryStartDateTime.
+"""
+
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple, Optional
+
+from mws.utils.flatfile import parse_int
+from mws.utils.timezone import as_utc, mws_utc_now
+
+INVENTORY_SYNC_OVERLAP = datetime.timedelta(minutes=5)
+"""Default amount by which each delta pull reaches back before the previous one,
+to catch supply changes recorded late.
+"""
+
+_ABSENT = -1
+"""Quantity stored for SKUs not (or not yet) in the snapshot."""
+
+
+class InventorySupply(NamedTuple):
+    """Supply of a single SKU, as known to an :py:class:`InventorySnapshot`."""
+
+    seller_sku: str
+    asin: Optional[str]
+    fnsku: Optional[str]
+    total_supply_quantity: int
+    in_stock_supply_quantity: int
+
+
+class InventoryChange(NamedTuple):
+    """A change in supply of a single SKU, recorded by an
+    :py:class:`InventorySnapshot`. Previous quantities are ``None`` for a SKU
+    seen for the first time.
+    """
+
+    seller_sku: str
+    changed_at: datetime.datetime
+    previous_total_supply_quantity: Optional[int]
+    total_supply_quantity: int
+    previous_in_stock_supply_quantity: Optional[int]
+    in_stock_supply_quantity: int
+
+
+def _quantity(value):
+    return None if value == _ABSENT else value
+
+
+class InventorySnapshot:
+    """Keeps the last known supply of every SKU, updated with delta pulls
+    of ListInventorySupply for supply that changed since the previous pull.
+
+    Quantities are held in typed arrays indexed by SKU, and every change is
+    appended to a log, also array-backed, so both the snapshot and its history
+    stay compact for large catalogues. The log allows :py:meth:`changes` to be
+    listed for any period, and the supply to be queried as it was at any point
+    in time (see :py:meth:`supply_at` and :py:meth:`snapshot_at`). Use
+    :py:meth:`prune` to drop history that is no longer needed.
+
+    The first :py:meth:`update` pulls all supply changed since ``start``;
+    each later update reaches back ``overlap`` before the previous one.
+
+    .. code-block:: python
+
+        from mws import Inventory
+        from mws.contrib.inventory_snapshot import InventorySnapshot
+
+        snapshot = InventorySnapshot(
+            Inventory(...), marketplace_id="ATVPDKIKX0DER", start=datetime.datetime(2020, 1, 1)
+        )
+        while True:
+            for change in snapshot.update():
+                notify(change)
+            time.sleep(300)
+    """
+
+    def __init__(
+        self,
+        inventory_api,
+        marketplace_id=None,
+        start=None,
+        overlap=INVENTORY_SYNC_OVERLAP,
+    ):
+        self.api = inventory_api.throttled()
+        # Supply is read from parsed responses, which requires MWSResponse.
+        self.api._use_feature_mwsresponse = True
+        self.marketplace_id = getattr(marketplace_id, "value", marketplace_id)
+        self.start = start
+        self.overlap = overlap
+        self.last_pulled = None
+        """Time of the last completed pull, as an aware UTC datetime."""
+
+        self._rows = {}
+        self._skus = []
+        self._asins = []
+        self._fnskus = []
+        self._total = array("q")
+        self._in_stock = array("q")
+        # Change log, one entry per index across all arrays, in time order.
+        self._change_times = array("d")
+        self._change_rows = array("q")
+        self._change_previous_total = array("q")
+        self._change_previous_in_stock = array("q")
+        self._change_total = array("q")
+        self._change_in_stock = array("q")
+
+    def __len__(self):
+        return sum(1 for total in self._total if total != _ABSENT)
+
+    def __contains__(self, seller_sku):
+        row = self._rows.get(seller_sku)
+        return row is not None and self._total[row] != _ABSENT
+
+    def get(self, seller_sku):
+        """Returns the current :py:class:`InventorySupply` of ``seller_sku``,
+        or ``None`` if it has not been seen.
+        """
+        row = self._rows.get(seller_sku)
+        if row is None or self._total[row] == _ABSENT:
+            return None
+        return self._supply(row, self._total[row], self._in_stock[row])
+
+    def __iter__(self):
+        """Iterates the current :py:class:`InventorySupply` of every SKU."""
+        for row, total in enumerate(self._total):
+            if total != _ABSENT:
+                yield self._supply(row, total, self._in_stock[row])
+
+    def _supply(self, row, total, in_stock):
+        return InventorySupply(
+            self._skus[row], self._asins[row], self._fnskus[row], total, in_stock
+        )
+
+    def _iter_supply(self, since):
+        response = self.api.list_inventory_supply(
+            datetime_=since.replace(tzinfo=None), marketplace_id=self.marketplace_id
+        )
+        while True:
+            supply = response.parsed.get("InventorySupplyList") or {}
+            yield from supply.get("member", [])
+            next_token = response.parsed.get("NextToken")
+            if not next_token:
+                return
+            response = self.api.list_inventory_supply(next_token=next_token)
+
+    def update(self, now=None):
+        """Pulls supply changed since the previous pull (or since ``start``),
+        applies it to the snapshot, and returns the list of
+        :py:class:`InventoryChange` it caused.
+
+        Supply is applied only once every page has been pulled, so the changes
+        returned are all those the pull caused. If a pull fails part way, the
+        snapshot is left as it was, and the next update covers the same period.
+        """
+        now = as_utc(now or mws_utc_now())
+        if self.last_pulled is not None:
+            since = self.last_pulled - self.overlap
+        elif self.start is not None:
+            since = as_utc(self.start)
+        else:
+            raise ValueError(
+                "No pull has completed yet: pass `start` to set where pulls begin."
+            )
+        members = list(self._iter_supply(since))
+        changes = self.apply(members, now)
+        self.last_pulled = now
+        return changes
+
+    def apply(self, members, changed_at):
+        """Applies ``members`` of InventorySupplyList (parsed ``DotDict`` nodes,
+        i.e. from ListInventorySupply or a bulk query) as the supply at
+        ``changed_at``, returning the list of :py:class:`InventoryChange` caused.
+        """
+        changed_at = as_utc(changed_at)
+        timestamp = changed_at.timestamp()
+        if self._change_times and timestamp < self._change_times[-1]:
+            raise ValueError("Supply cannot be applied earlier than the last change.")
+        changes = []
+        for member in members:
+            seller_sku = member.get("SellerSKU")
+            if not seller_sku:
+                continue
+            total = parse_int(member.get("TotalSupplyQuantity")) or 0
+            in_stock = parse_int(member.get("InStockSupplyQuantity")) or 0
+            row = self._rows.get(seller_sku)
+            if row is None:
+                row = len(self._skus)
+                self._rows[seller_sku] = row
+                self._skus.append(seller_sku)
+                self._asins.append(None)
+                self._fnskus.append(None)
+                self._total.append(_ABSENT)
+                self._in_stock.append(_ABSENT)
+            self._asins[row] = member.get("ASIN") or self._asins[row]
+            self._fnskus[row] = member.get("FNSKU") or self._fnskus[row]
+            previous_total = self._total[row]
+            previous_in_stock = self._in_stock[row]
+            if previous_total == total and previous_in_stock == in_stock:
+                continue
+            self._total[row] = total
+            self._in_stock[row] = in_stock
+            self._change_times.append(timestamp)
+            self._change_rows.append(row)
+            self._change_previous_total.append(previous_total)
+            self._change_previous_in_stock.append(previous_in_stock)
+            self._change_total.append(total)
+            self._change_in_stock.append(in_stock)
+            changes.append(
+                InventoryChange(
+                    seller_sku,
+                    changed_at,
+                    _quantity(previous_total),
+                    total,
+                    _quantity(previous_in_stock),
+                    in_stock,
+                )
+            )
+        return changes
+
+    def changes(self, since=None, until=None, seller_sku=None):
+        """Returns the recorded :py:class:`InventoryChange` list, oldest first,
+        for changes after ``since`` and up to ``until``, optionally only those
+        of ``seller_sku``.
+        """
+        start = 0
+        end = len(self._change_times)
+        if since is not None:
+            start = bisect_right(self._change_times, as_utc(since).timestamp())
+        if until is not None:
+            end = bisect_right(self._change_times, as_utc(until).timestamp())
+        row = None
+        if seller_sku is not None:
+            row = self._rows.get(seller_sku)
+            if row is None:
+                return []
+        changes = []
+        for index in range(start, end):
+            if row is not None and self._change_rows[index] != row:
+                continue
+            changes.append(
+                InventoryChange(
+                    self._skus[self._change_rows[index]],
+                    datetime.datetime.fromtimestamp(
+                        self._change_times[index], datetime.timezone.utc
+                    ),
+                    _quantity(self._change_previous_total[index]),
+                    self._change_total[index],
+                    _quantity(self._change_previous_in_stock[index]),
+                    self._change_in_stock[index],
+                )
+            )
+        return changes
+
+    def _undo_from(self, when):
+        """Yields ``(row, total, in_stock)`` undoing each change after ``when``,
+        most recent first.
+        """
+        first = bisect_right(self._change_times, as_utc(when).timestamp())
+        for index in range(len(self._change_times) - 1, first - 1, -1):
+            yield (
+                self._change_rows[index],
+                self._change_previous_total[index],
+                self._change_previous_in_stock[index],
+            )
+
+    def supply_at(self, seller_sku, when):
+        """Returns the :py:class:`InventorySupply` of ``seller_sku`` as it was
+        at ``when``, or ``None`` if it had not been seen by then.
+        """
+        row = self._rows.get(seller_sku)
+        if row is None:
+            return None
+        total = self._total[row]
+        in_stock = self._in_stock[row]
+        for change_row, previous_total, previous_in_stock in self._undo_from(when):
+            if change_row == row:
+                total, in_stock = previous_total, previous_in_stock
+        if total == _ABSENT:
+            return None
+        return self._supply(row, total, in_stock)
+
+    def snapshot_at(self, when):
+        """Returns a dict of the :py:class:`InventorySupply` of every SKU,
+        keyed by SKU, as it was at ``when``.
+        """
+        total = array("q", self._total)
+        in_stock = array("q", self._in_stock)
+        for row, previous_total, previous_in_stock in self._undo_from(when):
+            total[row] = previous_total
+            in_stock[row] = previous_in_stock
+        return {
+            self._skus[row]: self._supply(row, total[row], in_stock[row])
+            for row in range(len(total))
+            if total[row] != _ABSENT
+        }
+
+    def prune(self, before):
+        """Drops the history of changes made before ``before``, after which
+        queries for earlier times return the supply as it was just before
+        ``before``.
+        """
+        end = bisect_left(self._change_times, as_utc(before).timestamp())
+        for log in (
+            self._change_times,
+            self._change_rows,
+            self._change_previous_total,
+            self._change_previous_in_stock,
+            self._change_total,
+            self._change_in_stock,
+        ):
+            del log[:end]
@@ -0,0 +1,194 @@
+"""Incremental order sync, polling ListOrders by LastUpdatedAfter."""
+
+import datetime
+import sqlite3
+
+from mws.utils.flatfile import parse_date
+from mws.utils.timezone import as_utc, mws_utc_now
+
+ORDER_SYNC_LAG = datetime.timedelta(minutes=2)
+"""ListOrders requires ``LastUpdatedBefore`` to be at least two minutes before the
+time of the request, and orders updated within that time may not be listed yet.
+"""
+
+ORDER_SYNC_OVERLAP = datetime.timedelta(minutes=15)
+"""Default amount by which each sync window reaches back before the last watermark,
+to catch orders whose updates were recorded late.
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS order_sync_watermarks (
+    seller_id TEXT NOT NULL,
+    marketplaces TEXT NOT NULL,
+    watermark TEXT NOT NULL,
+    PRIMARY KEY (seller_id, marketplaces)
+);
+CREATE TABLE IF NOT EXISTS order_sync_seen (
+    seller_id TEXT NOT NULL,
+    marketplaces TEXT NOT NULL,
+    amazon_order_id TEXT NOT NULL,
+    last_update_date TEXT NOT NULL,
+    PRIMARY KEY (seller_id, marketplaces, amazon_order_id)
+);
+"""
+
+
+class OrderSync:
+    """Polls the Orders API for orders updated since the last sync, yielding each
+    order only when it is new or its ``LastUpdateDate`` has changed.
+
+    The watermark (the end of the last completed sync window) and the
+    ``LastUpdateDate`` of recently seen orders are kept in a sqlite ``database``
+    (a path, or ``":memory:"``), per seller and set of ``marketplace_ids``.
+    Each sync window starts ``overlap`` before the watermark and ends ``lag``
+    before the current time, so orders updated late are still picked up, while
+    orders already seen are filtered out.
+
+    Progress is committed only once all orders of a window have been consumed:
+    if processing stops part way, the next sync covers the same window again.
+
+    .. code-block:: python
+
+        from mws import Orders
+        from mws.contrib.order_sync import OrderSync
+
+        sync = OrderSync(Orders(...), "orders.sqlite", ["ATVPDKIKX0DER"])
+        while True:
+            for order in sync.sync():
+                process(order)
+            time.sleep(60)
+    """
+
+    def __init__(
+        self,
+        orders_api,
+        database,
+        marketplace_ids,
+        start=None,
+        lag=ORDER_SYNC_LAG,
+        overlap=ORDER_SYNC_OVERLAP,
+    ):
+        if lag < ORDER_SYNC_LAG:
+            raise ValueError(f"`lag` must be at least {ORDER_SYNC_LAG}.")
+        self.api = orders_api.throttled()
+        # Orders are read from parsed responses, which requires MWSResponse.
+        self.api._use_feature_mwsresponse = True
+        self.marketplace_ids = [getattr(mp, "value", mp) for mp in marketplace_ids]
+        self.start = start
+        self.lag = lag
+        self.overlap = overlap
+        self._key = (orders_api.account_id, ",".join(sorted(self.marketplace_ids)))
+        self.connection = sqlite3.connect(str(database))
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    @property
+    def watermark(self):
+        """End of the last completed sync window, as an aware UTC datetime,
+        or ``None`` if no sync has completed yet.
+        """
+        row = self.connection.execute(
+            "SELECT watermark FROM order_sync_watermarks"
+            " WHERE seller_id = ? AND marketplaces = ?",
+            self._key,
+        ).fetchone()
+        if row is None:
+            return None
+        return datetime.datetime.fromisoformat(row[0])
+
+    def reset(self, watermark=None):
+        """Restarts syncing from ``watermark``, or from ``start`` if not given,
+        forgetting all orders seen so far.
+        """
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM order_sync_seen WHERE seller_id = ? AND marketplaces = ?",
+                self._key,
+            )
+            self.connection.execute(
+                "DELETE FROM order_sync_watermarks"
+                " WHERE seller_id = ? AND marketplaces = ?",
+                self._key,
+            )
+            if watermark is not None:
+                self._set_watermark(as_utc(watermark))
+
+    def _set_watermark(self, watermark):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO order_sync_watermarks"
+            " (seller_id, marketplaces, watermark) VALUES (?, ?, ?)",
+            self._key + (watermark.isoformat(),),
+        )
+
+    def window(self, now=None):
+        """Returns the ``(last_updated_after, last_updated_before)`` window
+        for the next sync, as aware UTC datetimes.
+        """
+        watermark = self.watermark
+        if watermark is None:
+            if self.start is None:
+                raise ValueError(
+                    "No sync has completed yet: pass `start` to set where syncing begins."
+                )
+            after = as_utc(self.start)
+        else:
+            after = watermark - self.overlap
+        before = as_utc(now or mws_utc_now()) - self.lag
+        return after, max(after, before)
+
+    def _iter_orders(self, after, before):
+        response = self.api.list_orders(
+            marketplace_ids=self.marketplace_ids,
+            last_updated_after=after.replace(tzinfo=None),
+            last_updated_before=before.replace(tzinfo=None),
+        )
+        while True:
+            orders = response.parsed.get("Orders") or {}
+            yield from orders.get("Order", [])
+            next_token = response.parsed.get("NextToken")
+            if not next_token:
+                return
+            response = self.api.list_orders(next_token=next_token)
+
+    def sync(self, now=None):
+        """Yields orders, as ``DotDict`` nodes from the ListOrders response,
+        that are new or updated since they were last yielded.
+
+        Once the generator is exhausted, the watermark moves to the end of the
+        window and the orders yielded are recorded as seen.
+        """
+        after, before = self.window(now)
+        seen = {}
+        for order in self._iter_orders(after, before):
+            order_id = order.AmazonOrderId
+            last_update = as_utc(parse_date(order.LastUpdateDate)).isoformat()
+            if seen.get(order_id) == last_update:
+                continue
+            row = self.connection.execute(
+                "SELECT last_update_date FROM order_sync_seen"
+                " WHERE seller_id = ? AND marketplaces = ? AND amazon_order_id = ?",
+                self._key + (order_id,),
+            ).fetchone()
+            if row is not None and row[0] == last_update:
+                continue
+            yield order
+            seen[order_id] = last_update
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO order_sync_seen"
+                " (seller_id, marketplaces, amazon_order_id, last_update_date)"
+                " VALUES (?, ?, ?, ?)",
+                [self._key + item for item in seen.items()],
+            )
+            # Orders last updated before the next window cannot be listed again
+            # unless they change, so there is no need to remember them.
+            self.connection.execute(
+                "DELETE FROM order_sync_seen WHERE seller_id = ? AND marketplaces = ?"
+                " AND last_update_date < ?",
+                self._key + ((before - self.overlap).isoformat(),),
+            )
+            self._set_watermark(before)
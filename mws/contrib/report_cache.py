@@ -0,0 +1,264 @@
+"""On-disk cache of downloaded reports, keyed by ReportId."""
+
+import datetime
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from base64 import b64decode
+from functools import partial
+from pathlib import Path
+
+from mws.utils.concurrency import chunked
+from mws.utils.flatfile import FlatFileReader, detect_flat_file_encoding
+from mws.utils.streams import STREAM_CHUNK_SIZE, ChunkStream, response_stream
+
+ACKNOWLEDGE_ID_LIMIT = 100
+"""Maximum number of ReportIds accepted by one UpdateReportAcknowledgements call."""
+
+
+class CachedReport:
+    """A report held in a :py:class:`ReportCache`.
+
+    ``metadata`` is a dict including the ``report_id``, the ``digest`` (hex MD5)
+    and ``size`` of the uncompressed content, its ``content_md5`` in the
+    base64 format of the "Content-MD5" header, the response's ``content_type``,
+    and the ``fetched_at`` time as an ISO 8601 string.
+    """
+
+    def __init__(self, path, metadata):
+        self.path = path
+        self.metadata = metadata
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self.report_id!r})>"
+
+    @property
+    def report_id(self):
+        return self.metadata["report_id"]
+
+    def open(self):
+        """Returns a binary file-like object reading the uncompressed report content."""
+        return gzip.open(self.path, "rb")
+
+    def read(self):
+        """Returns the full uncompressed report content as ``bytes``."""
+        with self.open() as report_file:
+            return report_file.read()
+
+    def iter_flat_file(
+        self, report_type=None, marketplace=None, column_types=None, records=False
+    ):
+        """Returns a :py:class:`FlatFileReader <mws.utils.flatfile.FlatFileReader>`
+        over the rows of this report, as with
+        :py:meth:`MWSResponse.iter_flat_file() <mws.MWSResponse.iter_flat_file>`.
+        """
+        encoding = detect_flat_file_encoding(
+            marketplace, content_type=self.metadata.get("content_type")
+        )
+        return FlatFileReader(
+            self.open(),
+            encoding=encoding,
+            report_type=report_type,
+            column_types=column_types,
+            records=records,
+        )
+
+
+class ReportCache:
+    """Caches report content on disk so each ReportId is downloaded only once.
+
+    Report content is stored gzip-compressed under ``directory``, named by the MD5
+    digest of the content, so identical reports are stored once. A small JSON file
+    per ReportId maps it to that content and records its metadata.
+
+    Cached reports stay in the cache, forming a queue of work to be done, until
+    they are acknowledged with :py:meth:`acknowledge`: this marks them as
+    acknowledged in MWS, through ``reports_api``, and evicts them from the cache.
+
+    .. code-block:: python
+
+        from mws import Reports
+        from mws.contrib.report_cache import ReportCache
+
+        cache = ReportCache("/var/cache/mws-reports", Reports(...))
+        for report_id in new_report_ids:
+            cache.fetch(report_id)
+        for report in cache.pending():
+            process(report.iter_flat_file())
+            cache.acknowledge([report.report_id])
+    """
+
+    def __init__(self, directory, reports_api=None):
+        self.directory = Path(directory)
+        self.reports_api = reports_api
+        self._index_dir = self.directory / "reports"
+        self._content_dir = self.directory / "content"
+        self._index_dir.mkdir(parents=True, exist_ok=True)
+        self._content_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # A lock per report being fetched, dropped once no fetch holds it.
+        self._report_locks = weakref.WeakValueDictionary()
+
+    def __contains__(self, report_id):
+        return self._metadata_path(report_id).exists()
+
+    def __len__(self):
+        return sum(1 for _ in self._index_dir.glob("*.json"))
+
+    def _metadata_path(self, report_id):
+        return self._index_dir / f"{report_id}.json"
+
+    def _content_path(self, digest):
+        return self._content_dir / f"{digest}.gz"
+
+    def _report_lock(self, report_id):
+        with self._lock:
+            lock = self._report_locks.get(report_id)
+            if lock is None:
+                lock = self._report_locks[report_id] = threading.Lock()
+            return lock
+
+    def _read_metadata(self, report_id):
+        try:
+            with open(self._metadata_path(report_id), encoding="utf-8") as meta_file:
+                return json.load(meta_file)
+        except FileNotFoundError:
+            return None
+
+    def _write_metadata(self, metadata):
+        """Writes metadata through a temporary file, so readers never see
+        a partially written file.
+        """
+        path = self._metadata_path(metadata["report_id"])
+        descriptor, tmp_path = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+        try:
+            with open(descriptor, "w", encoding="utf-8") as tmp_file:
+                json.dump(metadata, tmp_file)
+            os.replace(tmp_path, str(path))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, report_id):
+        """Returns the :py:class:`CachedReport` for ``report_id``,
+        or ``None`` if it is not cached.
+        """
+        metadata = self._read_metadata(report_id)
+        if metadata is None:
+            return None
+        return CachedReport(self._content_path(metadata["digest"]), metadata)
+
+    def fetch(self, report_id, reports_api=None):
+        """Returns the :py:class:`CachedReport` for ``report_id``, downloading it
+        with ``reports_api`` (default: the cache's own API instance) if it is
+        not already cached.
+
+        The download is streamed straight to a compressed file, and its
+        "Content-MD5" header is verified before the report is added to the cache.
+        """
+        with self._report_lock(report_id):
+            cached = self.get(report_id)
+            if cached is not None:
+                return cached
+            api = reports_api or self.reports_api
+            if api is None:
+                raise ValueError(
+                    "A Reports API instance is needed to download reports."
+                )
+            response = api.get_report(report_id, stream=True)
+            try:
+                return self.add(report_id, response_stream(response), response.headers)
+            finally:
+                response.original.close()
+
+    def add(self, report_id, content, headers=None):
+        """Adds a report to the cache from ``content``, a binary file-like object,
+        returning its :py:class:`CachedReport`. ``headers`` are the response headers
+        of the report download, if any.
+        """
+        headers = headers or {}
+        stream = content
+        if not isinstance(stream, ChunkStream):
+            stream = ChunkStream(iter(partial(content.read, STREAM_CHUNK_SIZE), b""))
+        # Content is named by its digest, which is only known once it is all read.
+        descriptor, tmp_path = tempfile.mkstemp(
+            dir=str(self._content_dir), suffix=".tmp"
+        )
+        try:
+            with open(descriptor, "wb") as tmp_file:
+                with gzip.GzipFile(fileobj=tmp_file, mode="wb") as gz_file:
+                    shutil.copyfileobj(stream, gz_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        digest = b64decode(stream.md5).hex()
+        content_path = self._content_path(digest)
+        metadata = {
+            "report_id": report_id,
+            "digest": digest,
+            "content_md5": stream.md5.decode(),
+            "size": stream.bytes_read,
+            "content_type": headers.get("content-type"),
+            "fetched_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        # Locked so that `evict` cannot remove shared content in the meantime.
+        with self._lock:
+            if content_path.exists():
+                os.unlink(tmp_path)
+            else:
+                os.replace(tmp_path, str(content_path))
+            self._write_metadata(metadata)
+        return CachedReport(content_path, metadata)
+
+    def pending(self):
+        """Returns all cached reports, which have yet to be acknowledged,
+        as a list of :py:class:`CachedReport` ordered by the time they were fetched.
+        """
+        reports = []
+        for meta_path in self._index_dir.glob("*.json"):
+            cached = self.get(meta_path.stem)
+            if cached is not None:
+                reports.append(cached)
+        return sorted(
+            reports,
+            key=lambda report: (report.metadata["fetched_at"], report.report_id),
+        )
+
+    def evict(self, report_id):
+        """Removes ``report_id`` from the cache, along with its content if no other
+        cached report shares it. Does nothing if the report is not cached.
+        """
+        with self._lock:
+            metadata = self._read_metadata(report_id)
+            if metadata is None:
+                return
+            self._metadata_path(report_id).unlink()
+            digest = metadata["digest"]
+            for meta_path in self._index_dir.glob("*.json"):
+                other = self._read_metadata(meta_path.stem)
+                if other is not None and other["digest"] == digest:
+                    return
+            content_path = self._content_path(digest)
+            if content_path.exists():
+                content_path.unlink()
+
+    def acknowledge(self, report_ids, reports_api=None):
+        """Marks ``report_ids`` as acknowledged in MWS, using ``reports_api``
+        (default: the cache's own API instance), then evicts them from the cache.
+
+        Reports are acknowledged in batches of up to 100 IDs. A batch is evicted
+        only once its request succeeds, so reports that fail to be acknowledged
+        remain pending.
+        """
+        api = reports_api or self.reports_api
+        if api is None:
+            raise ValueError("A Reports API instance is needed to acknowledge reports.")
+        for batch in chunked(report_ids, ACKNOWLEDGE_ID_LIMIT):
+            api.update_report_acknowledgements(report_ids=batch, acknowledged=True)
+            for report_id in batch:
+                self.evict(report_id)
@@ -0,0 +1,321 @@
+"""Compact, typed models for the items of large list responses.
+
+A page of ListOrders parsed to ``DotDict`` holds a dict per order and per nested
+node, keyed by strings, with every value left as text. Kept in memory for many
+thousands of orders, that runs to gigabytes. The models here hold only the
+fields of each item listed in its schema, converted to ``int``, ``Decimal`` or
+``datetime``, in ``__slots__`` with no per-instance ``__dict__``. Fields that
+only take a few values, such as statuses and currency codes, share one string.
+
+Models are built from a parsed response (:py:meth:`Model.from_parsed`), or
+straight from the XML content without building a tree of the page at all
+(:py:class:`ModelPage`). Fields are named as in
+:py:mod:`mws.utils.columnar`'s schemas, and are read as attributes or keys as
+they would be on a ``DotDict``: ``order.AmazonOrderId``, ``order["OrderStatus"]``
+or ``order.get("OrderTotalAmount")``.
+
+Financial events already have a compact form: see
+:py:class:`FinancialEventRecord <mws.utils.finances.FinancialEventRecord>`
+and :py:class:`FinancialEventsPage <mws.utils.finances.FinancialEventsPage>`.
+
+See ``benchmarks/bench_models.py`` for a comparison of memory use.
+"""
+
+import sys
+
+from defusedxml.ElementTree import iterparse
+
+from mws.utils.collections import DotDict
+from mws.utils.columnar import (
+    LIST_ACTION_SCHEMAS,
+    STRING,
+    Column,
+    ListSchema,
+    item_row,
+    list_response_rows,
+    money_columns,
+)
+from mws.utils.streams import as_binary_stream, response_stream
+from mws.utils.xml import as_list, element_to_dict, local_tag
+
+
+def _field_names(schema):
+    return tuple(column.name for column in schema.columns)
+
+
+class Model:
+    """Base class of the compact models, each described by a columnar ``SCHEMA``
+    whose column names are the model's ``__slots__``.
+    """
+
+    __slots__ = ()
+    SCHEMA = ListSchema((), ())
+    INTERNED = frozenset()
+    """Fields holding one of a few values (statuses, currency codes...),
+    whose strings are interned so that all models share one copy of each.
+    """
+
+    def __init__(self, *values, **fields):
+        names = self.__slots__
+        if len(values) > len(names):
+            raise TypeError(
+                f"{self.__class__.__name__} takes at most {len(names)} values."
+            )
+        for name, value in zip(names, values):
+            setattr(self, name, value)
+        for name in names[len(values) :]:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Unknown fields: {', '.join(fields)}.")
+        for name in self.INTERNED:
+            value = getattr(self, name)
+            if type(value) is str:
+                setattr(self, name, sys.intern(value))
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.values() == other.values()
+
+    def __getitem__(self, name):
+        if name not in self.__slots__:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __contains__(self, name):
+        return name in self.__slots__
+
+    def __getstate__(self):
+        return self.values()
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def get(self, name, default=None):
+        return getattr(self, name, default) if name in self.__slots__ else default
+
+    def keys(self):
+        return self.__slots__
+
+    def values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def to_dict(self):
+        """Returns the fields of this model as a plain dict."""
+        return dict(zip(self.__slots__, self.values()))
+
+    def to_dotdict(self):
+        """Returns the fields of this model as a ``DotDict``."""
+        return DotDict(self.to_dict())
+
+    @classmethod
+    def from_node(cls, node):
+        """Builds a model from a single item node of a parsed response."""
+        return cls(*item_row(node, cls.SCHEMA.columns))
+
+    @classmethod
+    def from_parsed(cls, parsed):
+        """Returns a list of models of the items in ``parsed``, the ``.parsed``
+        content of a page of the list operation's response.
+        """
+        return [cls(*row) for row in list_response_rows(parsed, cls.SCHEMA)]
+
+    @classmethod
+    def _from_element(cls, node):
+        """Yields the models in the item element found by :py:class:`ModelPage`,
+        converted to nested dicts.
+        """
+        yield cls.from_node(node)
+
+
+class Order(Model):
+    """An order from ListOrders or GetOrder."""
+
+    SCHEMA = LIST_ACTION_SCHEMAS["ListOrders"]
+    __slots__ = _field_names(SCHEMA)
+    INTERNED = frozenset(
+        {
+            "OrderStatus",
+            "FulfillmentChannel",
+            "SalesChannel",
+            "ShipServiceLevel",
+            "OrderTotalCurrencyCode",
+            "PaymentMethod",
+            "MarketplaceId",
+            "OrderType",
+            "IsBusinessOrder",
+            "IsPrime",
+            "ShipCity",
+            "ShipStateOrRegion",
+            "ShipCountryCode",
+        }
+    )
+
+
+class OrderItem(Model):
+    """An order item from ListOrderItems."""
+
+    SCHEMA = LIST_ACTION_SCHEMAS["ListOrderItems"]
+    __slots__ = _field_names(SCHEMA)
+    INTERNED = frozenset(
+        {
+            "ItemPriceCurrencyCode",
+            "ItemTaxCurrencyCode",
+            "ShippingPriceCurrencyCode",
+            "PromotionDiscountCurrencyCode",
+        }
+    )
+
+
+class InventorySupplyMember(Model):
+    """A member of ListInventorySupply's ``InventorySupplyList``."""
+
+    SCHEMA = LIST_ACTION_SCHEMAS["ListInventorySupply"]
+    __slots__ = _field_names(SCHEMA)
+    INTERNED = frozenset({"Condition", "EarliestAvailabilityTimepoint"})
+
+
+_PRODUCT_COLUMNS = (
+    Column("ASIN", STRING, ("Identifiers", "MarketplaceASIN", "ASIN")),
+    Column(
+        "MarketplaceId", STRING, ("Identifiers", "MarketplaceASIN", "MarketplaceId")
+    ),
+)
+
+_SKU_PRODUCT_COLUMNS = (
+    Column("ASIN", STRING, ("Identifiers", "MarketplaceASIN", "ASIN")),
+    Column("MarketplaceId", STRING, ("Identifiers", "SKUIdentifier", "MarketplaceId")),
+)
+
+_OFFER_COLUMNS = (
+    Column("SellerSKU", STRING, ("SellerSKU",)),
+    Column("ItemCondition", STRING, ("ItemCondition",)),
+    Column("ItemSubCondition", STRING, ("ItemSubCondition",)),
+    Column("FulfillmentChannel", STRING, ("FulfillmentChannel",)),
+    *money_columns("LandedPrice", "BuyingPrice", "LandedPrice"),
+    *money_columns("ListingPrice", "BuyingPrice", "ListingPrice"),
+    *money_columns("Shipping", "BuyingPrice", "Shipping"),
+    *money_columns("RegularPrice", "RegularPrice"),
+)
+
+
+class ProductPrice(Model):
+    """One of your offers for a product, from GetMyPriceForASIN or
+    GetMyPriceForSKU: a model per ``Offer``, along with its product's ASIN
+    and MarketplaceId.
+    """
+
+    SCHEMA = ListSchema(
+        ("Product", "Offers", "Offer"), _PRODUCT_COLUMNS + _OFFER_COLUMNS
+    )
+    __slots__ = _field_names(SCHEMA)
+    INTERNED = frozenset(
+        {
+            "MarketplaceId",
+            "ItemCondition",
+            "ItemSubCondition",
+            "FulfillmentChannel",
+            "LandedPriceCurrencyCode",
+            "ListingPriceCurrencyCode",
+            "ShippingCurrencyCode",
+            "RegularPriceCurrencyCode",
+        }
+    )
+
+    @classmethod
+    def from_product(cls, product):
+        """Returns a list of models of the offers in a parsed ``Product`` node."""
+        context = item_row(product, _PRODUCT_COLUMNS)
+        if context[1] is None:
+            # GetMyPriceForSKU results identify the product by SKU only.
+            context = item_row(product, _SKU_PRODUCT_COLUMNS)
+        offers = product.get("Offers")
+        if not isinstance(offers, dict):
+            # No offers: an empty element.
+            return []
+        return [
+            cls(*(context + item_row(offer, _OFFER_COLUMNS)))
+            for offer in as_list(offers.get("Offer"))
+        ]
+
+    @classmethod
+    def from_parsed(cls, parsed):
+        """Returns a list of models of the offers in ``parsed``, the ``.parsed``
+        content of a GetMyPriceForASIN or GetMyPriceForSKU response: one result,
+        or a list of results.
+        """
+        if isinstance(parsed, dict):
+            parsed = [parsed]
+        models = []
+        for result in parsed:
+            product = result.get("Product")
+            if isinstance(product, dict):
+                models.extend(cls.from_product(product))
+        return models
+
+    @classmethod
+    def _from_element(cls, node):
+        yield from cls.from_product(node)
+
+
+_STREAM_PATHS = {
+    ProductPrice: ("Product",),
+}
+
+
+class ModelPage:
+    """Iterates the models of ``model`` (such as :py:class:`Order`) in one page
+    of a list operation's results, parsing the response body as a stream.
+
+    ``source`` may be a binary file-like object, ``bytes``, an iterable of
+    ``bytes`` chunks, or a (preferably streamed) response object. Each item is
+    discarded as soon as its model is built, so no tree of the page is ever
+    held in memory.
+
+    Once iteration is complete, ``next_token`` holds the page's NextToken,
+    or ``None`` if it is the last page.
+
+    .. code-block:: python
+
+        response = orders_api.list_orders(...)
+        page = ModelPage(Order, response)
+        orders = list(page)
+
+        # Stream the next page, rather than reading it in full first:
+        response = orders_api.make_request(
+            "ListOrdersByNextToken", {"NextToken": page.next_token}, stream=True
+        )
+        orders = list(ModelPage(Order, response))
+    """
+
+    def __init__(self, model, source):
+        if hasattr(source, "iter_content") or hasattr(source, "original"):
+            source = response_stream(source)
+        self.model = model
+        self._source = as_binary_stream(source)
+        self.next_token = None
+
+    def __iter__(self):
+        path = _STREAM_PATHS.get(self.model, self.model.SCHEMA.item_path[-2:])
+        # Local tags and elements from the document root to the current element.
+        tags = []
+        elements = []
+        for event, elem in iterparse(self._source, events=("start", "end")):
+            if event == "start":
+                tags.append(local_tag(elem.tag))
+                elements.append(elem)
+                continue
+            if len(tags) == 3 and tags[-1] == "NextToken":
+                # Response > Result > NextToken
+                self.next_token = elem.text or None
+            elif tuple(tags[-len(path) :]) == path:
+                yield from self.model._from_element(element_to_dict(elem))
+                # Drop the processed item from the tree to keep memory flat.
+                elements[-2].remove(elem)
+            tags.pop()
+            elements.pop()
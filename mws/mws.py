@@ -2,17 +2,22 @@
 """Main module for python-amazon-mws package."""
 
 import base64
+import copy
 import hashlib
 import hmac
+import threading
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from typing import Any, NamedTuple, Optional
 from urllib.parse import quote
 
-from requests import request
+from requests import Session, request
 from requests.exceptions import HTTPError
 
 from mws.errors import MWSError, MWSRequestError
 from mws.response import MWSResponse
+from mws.utils.concurrency import DEFAULT_MAX_WORKERS, SingleFlight, concurrent_map
 from mws.utils.crypto import response_md5_is_valid
 from mws.utils.params import (
     clean_params_dict,
@@ -20,6 +25,7 @@ from mws.utils.params import (
     flat_param_dict,
     remove_empty_param_keys,
 )
+from mws.utils.throttle import ThrottleRegistry, throttle_action
 from mws.utils.timezone import mws_utc_now
 
 __version__ = "1.0dev16"
@@ -30,9 +36,15 @@ https://docs.developer.amazonservices.com/en_US/dev_guide/DG_UserAgentHeader.htm
 
 PAM_DEFAULT_TIMEOUT = 300
 
+SERVICE_STATUS_THROTTLE_LIMITS = (2, 300)
+"""Quota for the GetServiceStatus operation, which is the same in every API:
+a maximum of 2 requests, restoring 1 request every 5 minutes.
+"""
+
 __all__ = [
     "canonicalized_query_string",
     "Marketplaces",
+    "MarketplaceResult",
     "MWS",
 ]
 
@@ -77,6 +89,36 @@ class Marketplaces(Enum):
     def value(self):
         return self.marketplace_id
 
+    @classmethod
+    def lookup(cls, marketplace):
+        """Returns the member for ``marketplace``: a member, its name (i.e. "DE")
+        or its marketplace ID (i.e. "A1PA6795UKMFR9").
+        """
+        if isinstance(marketplace, cls):
+            return marketplace
+        if marketplace in cls.__members__:
+            return cls[marketplace]
+        for member in cls:
+            if member.marketplace_id == marketplace:
+                return member
+        raise ValueError(f"Unknown marketplace: {marketplace!r}.")
+
+
+class MarketplaceResult(NamedTuple):
+    """The outcome of an operation run in one marketplace by
+    :py:meth:`MWS.for_marketplaces`.
+    """
+
+    marketplace: Marketplaces
+    result: Any
+    """Return value of the operation, or ``None`` if it raised."""
+    error: Optional[Exception] = None
+    """Exception raised by the operation, if any."""
+
+    @property
+    def ok(self):
+        return self.error is None
+
 
 def canonicalized_query_string(params):
     """Builds the canonicalized query string from the set of params,
@@ -154,6 +196,14 @@ class MWS(object):
 
     ACCOUNT_TYPE = "SellerId"
 
+    # Quotas MWS applies to each operation of the API, as
+    # ``(maximum request quota, seconds to restore one request)``.
+    # Used to throttle requests client-side when throttling is enabled, either with
+    # the `throttle` init arg or through `self.throttled()`.
+    # "...ByNextToken" operations share the quota of their parent operation,
+    # and need not be listed separately.
+    THROTTLE_LIMITS = {}
+
     def __init__(  # nosec No password default is provided, only auth_token empty value (where it may not be needed)
         self,
         access_key,
@@ -167,6 +217,11 @@ class MWS(object):
         user_agent_str="",
         headers=None,
         force_response_encoding=None,
+        throttle=False,
+        session=None,
+        coalesce=None,
+        max_workers=DEFAULT_MAX_WORKERS,
+        parse_pool=None,
     ):
         self.access_key = access_key
         self.secret_key = secret_key
@@ -178,6 +233,23 @@ class MWS(object):
         self.user_agent_str = user_agent_str or PAM_USER_AGENT
         self.extra_headers = headers or {}
         self.force_response_encoding = force_response_encoding
+        # An optional `mws.utils.parse_pool.ParsePool` to parse responses in.
+        self.parse_pool = parse_pool
+        self.throttle_requests = throttle
+        self.throttles = ThrottleRegistry()
+        # An optional `requests.Session` to send requests through, reusing its
+        # connection pool. Sessions can be shared between instances and threads.
+        self.session = session
+        # Actions whose identical concurrent requests share one round-trip.
+        # Only read-only actions should be listed here.
+        self.coalesce_actions = frozenset(coalesce or ())
+        self.requests_in_flight = SingleFlight()
+        # Thread pool for `submit` and `map`, created on first use.
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_api = None
+        self._executor_session = None
+        self._executor_lock = threading.Lock()
 
         # * TESTING FLAGS * #
         self._test_request_params = False
@@ -235,9 +307,56 @@ class MWS(object):
         - `result_key`, providing a custom key to use as the root for results
           returned by `response.parsed`.
         - `body`, primarily used in Feeds requests to send a data file in the request.
+        - `stream`, passed to `requests.request`. When ``True``, the response body is
+          not downloaded up front, and an unparsed ``MWSResponse`` is returned
+          (regardless of the ``_use_feature_mwsresponse`` flag) so that its content
+          can be consumed incrementally.
+
+        If ``action`` (or its parent, for "...ByNextToken" actions) is one of the
+        ``coalesce`` actions given when creating the instance, a request identical
+        to one already in flight is not sent: it waits for that request instead,
+        and returns the same response (or raises the same error). Requests are
+        identical when their params, other than Timestamp and Signature, are the
+        same. Streamed requests and requests with a body are never coalesced.
         """
         params = params or {}
 
+        if (
+            throttle_action(action) in self.coalesce_actions
+            and not self._test_request_params
+            and not kwargs.get("stream")
+            and not kwargs.get("body")
+        ):
+            return self.requests_in_flight.do(
+                self.request_key(action, params, method),
+                self._make_request,
+                action,
+                params,
+                method,
+                timeout,
+                **kwargs,
+            )
+        return self._make_request(action, params, method, timeout, **kwargs)
+
+    def request_key(self, action, params=None, method="POST"):
+        """Returns a key identifying the request for ``action`` with ``params``:
+        its method, endpoint and canonicalized params, except Timestamp and
+        Signature (which differ for every request).
+        """
+        request_params = self.get_default_params(action, None)
+        request_params.update(params or {})
+        request_params = clean_params_dict(remove_empty_param_keys(request_params))
+        for key in ("Timestamp", "Signature"):
+            request_params.pop(key, None)
+        return (method, self.endpoint, canonicalized_query_string(request_params))
+
+    def _make_request(self, action, params, method, timeout, **kwargs):
+        if self.throttle_requests and not self._test_request_params:
+            # Wait for quota before building the request, so its timestamp is current.
+            self.throttles.acquire(
+                action, self.get_throttle_limits(action), endpoint=self.endpoint
+            )
+
         request_timestamp = mws_utc_now()
         request_params = self.get_default_params(action, request_timestamp)
         proxies = self.get_proxies()
@@ -261,6 +380,7 @@ class MWS(object):
         headers.update(kwargs.get("extra_headers", {}))
 
         result_key = kwargs.get("result_key", f"{action}Result")
+        stream = kwargs.get("stream", False)
 
         request_args = {
             "method": method,
@@ -268,6 +388,7 @@ class MWS(object):
             "headers": headers,
             "proxies": proxies,
             "timeout": timeout,
+            "stream": stream,
         }
         body = kwargs.get("body")
         if body:
@@ -283,13 +404,23 @@ class MWS(object):
             request_args["params"] = request_params
 
         try:
-            response = request(**request_args)
+            send = request if self.session is None else self.session.request
+            response = send(**request_args)
             response.raise_for_status()
             # When retrieving data from the response object,
             # be aware that response.content returns the content in bytes while response.text calls
             # response.content and converts it to unicode.
 
-            if self._use_feature_mwsresponse:
+            if stream:
+                # Content is left unread: MD5 validation happens as it is consumed.
+                parsed_response = MWSResponse(
+                    response,
+                    result_key=result_key,
+                    encoding=self.force_response_encoding,
+                    stream=True,
+                )
+                parsed_response.timestamp = request_timestamp
+            elif self._use_feature_mwsresponse:
                 # Turn on the new response parser and DotDict parsed output
                 # (will be made standard in v1.0)
                 if not response_md5_is_valid(response):
@@ -301,6 +432,7 @@ class MWS(object):
                     response,
                     result_key=result_key,
                     encoding=self.force_response_encoding,
+                    parse_pool=self.parse_pool,
                 )
                 parsed_response.timestamp = request_timestamp
             else:
@@ -328,6 +460,190 @@ class MWS(object):
         # Store the response object in the parsed_response for quick access
         return parsed_response
 
+    def get_throttle_limits(self, action):
+        """Returns the ``(max_quota, restore_rate)`` limits for ``action``
+        from ``THROTTLE_LIMITS``, or ``None`` if the action's quota is unknown.
+        """
+        action = throttle_action(action)
+        if action == "GetServiceStatus":
+            return SERVICE_STATUS_THROTTLE_LIMITS
+        return self.THROTTLE_LIMITS.get(action)
+
+    def throttled(self):
+        """Returns a copy of this instance that throttles its own requests
+        to stay within the quotas in ``THROTTLE_LIMITS``, blocking until a request
+        is available rather than letting MWS reject it.
+
+        The copy shares its throttle buckets with this instance, so several threads
+        making requests with the copy draw on the same quotas.
+        """
+        clone = copy.copy(self)
+        clone.throttle_requests = True
+        # The copy gets a thread pool of its own, running on its own endpoint.
+        clone._executor = None
+        clone._executor_api = None
+        clone._executor_session = None
+        clone._executor_lock = threading.Lock()
+        return clone
+
+    def for_marketplaces(
+        self, operation, marketplaces, *args, max_workers=DEFAULT_MAX_WORKERS, **kwargs
+    ):
+        """Runs ``operation`` in each of ``marketplaces`` concurrently, returning
+        a dict of :py:class:`MarketplaceResult` keyed by :py:class:`Marketplaces`
+        member, in the order given.
+
+        ``operation`` is the name of a method of this API taking a
+        ``marketplace_id`` argument, called with ``args``, ``kwargs`` and
+        the ID of each marketplace; or a callable, called as
+        ``operation(api, marketplace)``. ``marketplaces`` may be given as
+        members, names or marketplace IDs.
+
+        Requests go to the endpoint of each marketplace, through a throttled copy
+        of this instance per endpoint: all EU marketplaces share one copy and
+        its connections. An exception raised in one marketplace does not stop
+        the others: it is returned as that marketplace's ``error``.
+
+        .. code-block:: python
+
+            results = products.for_marketplaces(
+                "get_my_price_for_asin",
+                [Marketplaces.DE, Marketplaces.FR, Marketplaces.IT],
+                asins=["B00EXAMPLE"],
+            )
+            for marketplace, outcome in results.items():
+                if outcome.ok:
+                    print(marketplace.name, outcome.result.parsed)
+        """
+        if not callable(operation) and not callable(getattr(self, operation, None)):
+            raise ValueError(
+                f"{self.__class__.__name__} has no operation {operation!r}."
+            )
+        marketplaces = list(dict.fromkeys(Marketplaces.lookup(m) for m in marketplaces))
+        clients = {}
+        own_sessions = []
+        for marketplace in marketplaces:
+            if marketplace.endpoint in clients:
+                continue
+            clone = self.throttled()
+            clone.domain = marketplace.endpoint
+            if clone.session is None:
+                clone.session = Session()
+                own_sessions.append(clone.session)
+            clients[marketplace.endpoint] = clone
+
+        def _run(marketplace):
+            api = clients[marketplace.endpoint]
+            try:
+                if callable(operation):
+                    return operation(api, marketplace), None
+                method = getattr(api, operation)
+                return (
+                    method(*args, marketplace_id=marketplace.marketplace_id, **kwargs),
+                    None,
+                )
+            except Exception as exc:
+                return None, exc
+
+        try:
+            return {
+                marketplace: MarketplaceResult(marketplace, result, error)
+                for marketplace, (result, error) in concurrent_map(
+                    _run, marketplaces, max_workers=max_workers
+                )
+            }
+        finally:
+            for session in own_sessions:
+                session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def _get_executor(self):
+        """Returns the thread pool of :py:meth:`submit` and :py:meth:`map`,
+        with the throttled copy of this instance its operations run on,
+        creating both on first use.
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                api = self.throttled()
+                # Futures resolve to parsed responses, which requires MWSResponse.
+                api._use_feature_mwsresponse = True
+                if api.session is None:
+                    # Workers share one session, and so its connection pool.
+                    self._executor_session = api.session = Session()
+                self._executor_api = api
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.__class__.__name__,
+                )
+            return self._executor, self._executor_api
+
+    @staticmethod
+    def _call_operation(api, operation, *args, **kwargs):
+        if callable(operation):
+            return operation(api, *args, **kwargs)
+        return getattr(api, operation)(*args, **kwargs)
+
+    def submit(self, operation, *args, **kwargs):
+        """Schedules ``operation`` to run in this instance's thread pool,
+        returning a ``concurrent.futures.Future`` of its result (usually an
+        ``MWSResponse``).
+
+        ``operation`` is the name of a method of this API, called with ``args``
+        and ``kwargs``; or a callable, called as ``operation(api, *args, **kwargs)``.
+
+        Operations run on a throttled copy of this instance (see :py:meth:`throttled`),
+        so up to ``max_workers`` threads can make requests at once while staying
+        within the quotas in ``THROTTLE_LIMITS``. Workers share one
+        ``requests.Session``: the instance's own, or one created for the pool
+        (which leaves the instance's ``session`` unchanged).
+
+        .. code-block:: python
+
+            with Orders(...) as api:
+                futures = [api.submit("get_order", [order_id]) for order_id in ids]
+                for future in concurrent.futures.as_completed(futures):
+                    print(future.result().parsed)
+        """
+        executor, api = self._get_executor()
+        # The api is bound now, so queued operations still run after `shutdown`.
+        return executor.submit(self._call_operation, api, operation, *args, **kwargs)
+
+    def map(self, operation, *iterables):
+        """Like :py:meth:`submit` for each set of args taken from ``iterables``,
+        as in the builtin ``map``: yields the results in order, raising the
+        exception of the first operation that fails.
+
+        Args are consumed lazily, so that only a few operations per worker are
+        scheduled ahead of the results being read.
+        """
+        executor, api = self._get_executor()
+        for _, result in concurrent_map(
+            lambda args: self._call_operation(api, operation, *args),
+            zip(*iterables),
+            max_workers=self.max_workers,
+            executor=executor,
+        ):
+            yield result
+
+    def shutdown(self, wait=True):
+        """Shuts down the thread pool of :py:meth:`submit` and :py:meth:`map`,
+        and closes the session created for it, if any. Both are created again
+        if more operations are submitted.
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+            session, self._executor_session = self._executor_session, None
+            self._executor_api = None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        if session is not None:
+            session.close()
+
     @property
     def endpoint(self):
         return f"{self.domain}{self.uri}"
@@ -1,13 +1,23 @@
 """Contains the MWSResponse object and related utilities."""
 
+import datetime
+import threading
 from xml.parsers.expat import ExpatError
 
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
 from mws.utils.collections import DotDict
 from mws.utils.crypto import calc_md5
+from mws.utils.flatfile import FlatFileReader, detect_flat_file_encoding
+from mws.utils.streams import STREAM_CHUNK_SIZE, response_stream
 from mws.utils.xml import mws_xml_to_dict
 
 __all__ = ["MWSResponse"]
 
+STATE_FORMAT = 1
+"""Version of the dict produced by :py:meth:`MWSResponse.to_state`."""
+
 
 class ResponseWrapperBase:
     """Wraps a ``requests.Response`` object, storing the object internally
@@ -89,6 +99,14 @@ class MWSResponse(ResponseWrapperBase):
      presented when using ``.parsed``.
     :param bool force_cdata: Passed to ``xmltodict.parse()`` when parsing
      the response's XML document. Defaults to ``False``.
+    :param bool stream: Set to ``True`` when ``response`` was requested with
+     ``stream=True``. Content is then left unread: no encoding is guessed and
+     nothing is parsed, so the body can be consumed incrementally with methods
+     like :py:meth:`iter_flat_file`. Defaults to ``False``.
+    :param parse_pool: A :py:class:`ParsePool <mws.utils.parse_pool.ParsePool>`
+     to parse the content in. Parsing then runs in the background, and
+     :py:meth:`.parsed <.parsed>` and :py:meth:`.metadata <.metadata>` wait for
+     it to finish. Defaults to ``None``, parsing the content immediately.
     """
 
     __attrs__ = [
@@ -108,11 +126,32 @@ class MWSResponse(ResponseWrapperBase):
         "request_id",
     ]
 
-    def __init__(self, response, result_key=None, encoding=None, force_cdata=False):
+    def __init__(
+        self,
+        response,
+        result_key=None,
+        encoding=None,
+        force_cdata=False,
+        stream=False,
+        parse_pool=None,
+    ):
         super().__init__(response)
         self.timestamp = None
+        self.stream = stream
         self._result_key = result_key
 
+        self._dict = None
+        self._dotdict = None
+        self._metadata = None
+        self._parse_future = None
+        self._parse_lock = threading.Lock()
+
+        if stream:
+            # Guessing an encoding or parsing would both read the full content.
+            if encoding:
+                self.encoding = encoding
+            return
+
         if not self.encoding:
             # If the response did not specify its encoding,
             # we use either A) an encoding specified by the user,
@@ -122,10 +161,12 @@ class MWSResponse(ResponseWrapperBase):
             # from XML into DotDicts.
             self.encoding = encoding or response.apparent_encoding
 
-        self._dict = None
-        self._dotdict = None
-        self._metadata = None
-        self.parse_response(force_cdata=force_cdata)
+        if parse_pool is not None:
+            self._parse_future = parse_pool.submit(
+                self.content, encoding=self.encoding, force_cdata=force_cdata
+            )
+        else:
+            self.parse_response(force_cdata=force_cdata)
 
     def __repr__(self):
         return f"<{self.__class__.__name__} [{self.original.status_code}]>"
@@ -156,6 +197,20 @@ class MWSResponse(ResponseWrapperBase):
             # No exception? Cool
             self._build_dotdicts()
 
+    def _finish_parse(self):
+        """Waits for parsing in a :py:class:`ParsePool <mws.utils.parse_pool.ParsePool>`
+        to finish, if it was started, and builds the ``DotDict`` instances of
+        parsed content not yet built.
+        """
+        # A response can be shared between threads (i.e. by coalesced requests):
+        # others must wait until the parse is done, not see it half-finished.
+        with self._parse_lock:
+            if self._parse_future is not None:
+                self._dict = self._parse_future.result()
+                self._parse_future = None
+            if self._dict is not None and self._dotdict is None:
+                self._build_dotdicts()
+
     def _build_dotdicts(self):
         self._dotdict = DotDict(self._dict)
 
@@ -163,6 +218,74 @@ class MWSResponse(ResponseWrapperBase):
         if "ResponseMetadata" in self._dict:
             self._metadata = DotDict(self._dict["ResponseMetadata"])
 
+    def to_state(self, include_content=False):
+        """Returns this response as a dict of plain values (``str``, ``bytes``,
+        ``int``, ``None``, lists and dicts), which can be pickled, or packed with
+        msgpack, cheaply. Restore it with :py:meth:`from_state`.
+
+        The state holds the status, reason, URL, headers, encoding, timestamp,
+        result key and the parsed content (as produced by ``mws_xml_to_dict``,
+        without ``DotDict`` instances). The raw content is included only for
+        responses that were not parsed as XML, unless ``include_content`` is
+        ``True``: otherwise, :py:meth:`.content <.content>` and
+        :py:meth:`.text <.text>` are empty once restored.
+
+        Pickling an ``MWSResponse`` uses this state.
+        """
+        if self.stream:
+            raise ValueError(
+                "A streamed response cannot be serialized: its content is unread."
+            )
+        self._finish_parse()
+        content = None
+        if include_content or self._dict is None:
+            content = self.content
+        return {
+            "format": STATE_FORMAT,
+            "status_code": self.status_code,
+            "reason": self.reason,
+            "url": self.original.url,
+            "headers": dict(self.headers),
+            "encoding": self.encoding,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "result_key": self._result_key,
+            "parsed": self._dict,
+            "content": content,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Returns the response serialized to ``state`` by :py:meth:`to_state`.
+        ``DotDict`` instances of its parsed content are built on first use.
+        """
+        if state.get("format") != STATE_FORMAT:
+            raise ValueError(
+                f"Unsupported MWSResponse state format: {state.get('format')!r}"
+            )
+        response = Response()
+        response.status_code = state["status_code"]
+        response.reason = state["reason"]
+        response.url = state["url"]
+        response.headers = CaseInsensitiveDict(state["headers"])
+        response.encoding = state["encoding"]
+        response._content = state["content"] or b""
+        instance = cls.__new__(cls)
+        ResponseWrapperBase.__init__(instance, response)
+        instance.timestamp = None
+        if state["timestamp"]:
+            instance.timestamp = datetime.datetime.fromisoformat(state["timestamp"])
+        instance.stream = False
+        instance._result_key = state["result_key"]
+        instance._dict = state["parsed"]
+        instance._dotdict = None
+        instance._metadata = None
+        instance._parse_future = None
+        instance._parse_lock = threading.Lock()
+        return instance
+
+    def __reduce__(self):
+        return (self.__class__.from_state, (self.to_state(),))
+
     @property
     def parsed(self):
         """Returns a parsed version of the response.
@@ -172,6 +295,7 @@ class MWSResponse(ResponseWrapperBase):
 
         For all other types of responses, returns :py:meth:`.text <.text>` instead.
         """
+        self._finish_parse()
         if self._dotdict is not None:
             if self._result_key is None:
                 # Use the full DotDict without going to a root key first
@@ -187,8 +311,41 @@ class MWSResponse(ResponseWrapperBase):
         Typically the only key of note here is ``.metadata.RequestId``,
         which can also be accessed with :py:meth:`.request_id <.request_id>`.
         """
+        self._finish_parse()
         return self._metadata
 
+    def iter_flat_file(
+        self,
+        report_type=None,
+        marketplace=None,
+        column_types=None,
+        records=False,
+        chunk_size=STREAM_CHUNK_SIZE,
+    ):
+        """Returns a :py:class:`FlatFileReader <mws.utils.flatfile.FlatFileReader>`
+        over the rows of a tab-delimited report in this response.
+
+        Content is read from the response ``chunk_size`` bytes at a time, so a
+        response requested with ``stream=True`` is never held in memory in full.
+        If the response includes a "Content-MD5" header, the hash is verified
+        once all rows have been read.
+
+        The encoding is taken from the response's "Content-Type" header if it
+        declares a charset, else from ``marketplace``.
+        See :py:class:`FlatFileReader <mws.utils.flatfile.FlatFileReader>` for
+        details on the other arguments.
+        """
+        encoding = detect_flat_file_encoding(
+            marketplace, content_type=self.headers.get("content-type")
+        )
+        return FlatFileReader(
+            response_stream(self, chunk_size=chunk_size),
+            encoding=encoding,
+            report_type=report_type,
+            column_types=column_types,
+            records=records,
+        )
+
     @property
     def request_id(self):
         """Returns the value of a ``RequestId`` from :py:meth:`.metadata <.metadata>`,
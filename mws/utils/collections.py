@@ -32,7 +32,13 @@ class DotDict(dict):
 
         In that case, will attempt to find a key starting with '@' or '#',
         or will raise the original KeyError exception.
+
+        Special ("dunder") names are never looked up as keys, raising
+        ``AttributeError``, so that protocols probing for them (``copy``,
+        ``pickle``) fall back to their defaults.
         """
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
         try:
             return self[name]
         except KeyError:
@@ -87,7 +93,8 @@ class DotDict(dict):
         - All other objects in the data are left unchanged.
         """
         for key, val in dict(*args, **kwargs).items():
-            self[key] = self.__class__.build(val)
+            # `__setitem__` builds the value.
+            self[key] = val
 
     @classmethod
     def build(cls, obj):
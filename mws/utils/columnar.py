@@ -0,0 +1,426 @@
+"""Columnar export of reports and list responses.
+
+Converts flat file report rows and pages of list operations (ListOrders,
+ListFinancialEvents, etc.) into fixed-size batches of columns, as either
+`Apache Arrow <https://arrow.apache.org/docs/python/>`_ record batches or NumPy
+structured (masked) arrays, and writes them to Parquet files incrementally.
+
+This module requires optional dependencies, installed with the ``columnar`` extra:
+
+.. code-block:: bash
+
+    pip install mws[columnar]
+"""
+
+import datetime
+from typing import NamedTuple, Tuple
+
+from mws.utils.concurrency import chunked
+from mws.utils.finances import parsed_financial_event_records
+from mws.utils.flatfile import FlatFileReader, parse_date, parse_decimal, parse_int
+from mws.utils.throttle import throttle_action
+from mws.utils.xml import as_list
+
+DEFAULT_BATCH_SIZE = 10000
+"""Default number of rows in each batch."""
+
+STRING = "string"
+INT = "int"
+DECIMAL = "decimal"
+TIMESTAMP = "timestamp"
+
+DECIMAL_PRECISION = 38
+DECIMAL_SCALE = 6
+
+_CONVERTER_KINDS = {
+    parse_date: TIMESTAMP,
+    parse_decimal: DECIMAL,
+    parse_int: INT,
+}
+_KIND_CONVERTERS = {kind: func for func, kind in _CONVERTER_KINDS.items()}
+
+
+def _import_optional(name):
+    try:
+        return __import__(name)
+    except ImportError:
+        raise ImportError(
+            f"'{name}' is required for columnar exports. "
+            "Install it with `pip install mws[columnar]`."
+        )
+
+
+class Column(NamedTuple):
+    """A column in a columnar export.
+
+    ``path`` is the sequence of keys leading to this column's value from an item
+    node in a parsed list response. It is unused for report columns.
+    """
+
+    name: str
+    kind: str = STRING
+    path: Tuple[str, ...] = ()
+
+
+class ListSchema(NamedTuple):
+    """Describes how to turn a page of a list operation into rows.
+
+    ``item_path`` leads from the root of ``MWSResponse.parsed`` to the repeated
+    item node (i.e. ``("Orders", "Order")``), each of which becomes a row.
+    """
+
+    item_path: Tuple[str, ...]
+    columns: Tuple[Column, ...]
+
+
+def money_columns(prefix, *path):
+    """Returns the ``Amount`` and ``CurrencyCode`` columns of the money node
+    at ``path``, named after ``prefix``.
+    """
+    return (
+        Column(f"{prefix}Amount", DECIMAL, path + ("Amount",)),
+        Column(f"{prefix}CurrencyCode", STRING, path + ("CurrencyCode",)),
+    )
+
+
+LIST_ACTION_SCHEMAS = {
+    "ListOrders": ListSchema(
+        ("Orders", "Order"),
+        (
+            Column("AmazonOrderId", STRING, ("AmazonOrderId",)),
+            Column("SellerOrderId", STRING, ("SellerOrderId",)),
+            Column("PurchaseDate", TIMESTAMP, ("PurchaseDate",)),
+            Column("LastUpdateDate", TIMESTAMP, ("LastUpdateDate",)),
+            Column("OrderStatus", STRING, ("OrderStatus",)),
+            Column("FulfillmentChannel", STRING, ("FulfillmentChannel",)),
+            Column("SalesChannel", STRING, ("SalesChannel",)),
+            Column("ShipServiceLevel", STRING, ("ShipServiceLevel",)),
+            *money_columns("OrderTotal", "OrderTotal"),
+            Column("NumberOfItemsShipped", INT, ("NumberOfItemsShipped",)),
+            Column("NumberOfItemsUnshipped", INT, ("NumberOfItemsUnshipped",)),
+            Column("PaymentMethod", STRING, ("PaymentMethod",)),
+            Column("MarketplaceId", STRING, ("MarketplaceId",)),
+            Column("OrderType", STRING, ("OrderType",)),
+            Column("EarliestShipDate", TIMESTAMP, ("EarliestShipDate",)),
+            Column("LatestShipDate", TIMESTAMP, ("LatestShipDate",)),
+            Column("IsBusinessOrder", STRING, ("IsBusinessOrder",)),
+            Column("IsPrime", STRING, ("IsPrime",)),
+            Column("ShipCity", STRING, ("ShippingAddress", "City")),
+            Column("ShipStateOrRegion", STRING, ("ShippingAddress", "StateOrRegion")),
+            Column("ShipPostalCode", STRING, ("ShippingAddress", "PostalCode")),
+            Column("ShipCountryCode", STRING, ("ShippingAddress", "CountryCode")),
+        ),
+    ),
+    "ListOrderItems": ListSchema(
+        ("OrderItems", "OrderItem"),
+        (
+            Column("OrderItemId", STRING, ("OrderItemId",)),
+            Column("ASIN", STRING, ("ASIN",)),
+            Column("SellerSKU", STRING, ("SellerSKU",)),
+            Column("Title", STRING, ("Title",)),
+            Column("QuantityOrdered", INT, ("QuantityOrdered",)),
+            Column("QuantityShipped", INT, ("QuantityShipped",)),
+            *money_columns("ItemPrice", "ItemPrice"),
+            *money_columns("ItemTax", "ItemTax"),
+            *money_columns("ShippingPrice", "ShippingPrice"),
+            *money_columns("PromotionDiscount", "PromotionDiscount"),
+        ),
+    ),
+    "ListFinancialEventGroups": ListSchema(
+        ("FinancialEventGroupList", "FinancialEventGroup"),
+        (
+            Column("FinancialEventGroupId", STRING, ("FinancialEventGroupId",)),
+            Column("ProcessingStatus", STRING, ("ProcessingStatus",)),
+            Column("FundTransferStatus", STRING, ("FundTransferStatus",)),
+            *money_columns("OriginalTotal", "OriginalTotal"),
+            *money_columns("ConvertedTotal", "ConvertedTotal"),
+            Column("FundTransferDate", TIMESTAMP, ("FundTransferDate",)),
+            Column("TraceId", STRING, ("TraceId",)),
+            Column("AccountTail", STRING, ("AccountTail",)),
+            *money_columns("BeginningBalance", "BeginningBalance"),
+            Column(
+                "FinancialEventGroupStart", TIMESTAMP, ("FinancialEventGroupStart",)
+            ),
+            Column("FinancialEventGroupEnd", TIMESTAMP, ("FinancialEventGroupEnd",)),
+        ),
+    ),
+    "ListInventorySupply": ListSchema(
+        ("InventorySupplyList", "member"),
+        (
+            Column("SellerSKU", STRING, ("SellerSKU",)),
+            Column("FNSKU", STRING, ("FNSKU",)),
+            Column("ASIN", STRING, ("ASIN",)),
+            Column("Condition", STRING, ("Condition",)),
+            Column("TotalSupplyQuantity", INT, ("TotalSupplyQuantity",)),
+            Column("InStockSupplyQuantity", INT, ("InStockSupplyQuantity",)),
+            Column(
+                "EarliestAvailabilityTimepoint",
+                STRING,
+                ("EarliestAvailability", "TimepointType"),
+            ),
+        ),
+    ),
+}
+"""Columnar schemas for list operations, keyed by the operation's Action name.
+The "...ByNextToken" variant of each operation shares its schema.
+"""
+
+FINANCIAL_EVENT_COLUMNS = (
+    Column("EventType", STRING),
+    Column("PostedDate", TIMESTAMP),
+    Column("AmazonOrderId", STRING),
+    Column("SellerOrderId", STRING),
+    Column("MarketplaceName", STRING),
+    Column("SellerSKU", STRING),
+    Column("AmountType", STRING),
+    Column("Amount", DECIMAL),
+    Column("CurrencyCode", STRING),
+)
+"""Columns for ListFinancialEvents. Each monetary amount in an event becomes
+one row (see :py:func:`financial_event_rows`).
+"""
+
+
+def report_columns(header, column_types=None):
+    """Returns the ``Column`` definitions for a flat file report with the given
+    ``header``, where ``column_types`` maps header names to converters
+    (as used by :py:class:`FlatFileReader <mws.utils.flatfile.FlatFileReader>`).
+    """
+    column_types = column_types or {}
+    return tuple(
+        Column(name, _CONVERTER_KINDS.get(column_types.get(name), STRING))
+        for name in header
+    )
+
+
+def _node_value(node, path):
+    for key in path:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(key)
+        if node is None:
+            return None
+    if isinstance(node, dict):
+        # Text of an element that also has attributes.
+        node = node.get("#text")
+    return node
+
+
+def list_response_rows(parsed, schema):
+    """Yields one tuple per item in ``parsed`` (the ``.parsed`` content of a list
+    operation's response), with values converted as described by ``schema``.
+    """
+    node = parsed
+    for key in schema.item_path[:-1]:
+        node = node.get(key) if isinstance(node, dict) else None
+    items = node.get(schema.item_path[-1]) if isinstance(node, dict) else None
+    converters = [_KIND_CONVERTERS.get(column.kind) for column in schema.columns]
+    for item in as_list(items):
+        yield _item_row(item, schema.columns, converters)
+
+
+def item_row(item, columns):
+    """Returns a tuple of the values of ``columns`` in ``item``, a single item
+    node of a parsed list response, converted by their kind.
+    """
+    converters = [_KIND_CONVERTERS.get(column.kind) for column in columns]
+    return _item_row(item, columns, converters)
+
+
+def _item_row(item, columns, converters):
+    row = []
+    for column, convert in zip(columns, converters):
+        value = _node_value(item, column.path)
+        if convert is not None:
+            value = convert(value)
+        row.append(value)
+    return tuple(row)
+
+
+def financial_event_rows(parsed):
+    """Yields one row matching ``FINANCIAL_EVENT_COLUMNS`` for each monetary
+    amount found in a page of ListFinancialEvents results.
+
+    Rows are :py:class:`FinancialEventRecord <mws.utils.finances.FinancialEventRecord>`
+    tuples: see :py:func:`financial_event_records
+    <mws.utils.finances.financial_event_records>` for how events are flattened.
+    """
+    return parsed_financial_event_records(parsed)
+
+
+### Arrow ###
+def arrow_schema(columns):
+    """Returns a ``pyarrow.Schema`` for a sequence of ``Column`` definitions."""
+    pa = _import_optional("pyarrow")
+    types = {
+        STRING: pa.string(),
+        INT: pa.int64(),
+        DECIMAL: pa.decimal128(DECIMAL_PRECISION, DECIMAL_SCALE),
+        TIMESTAMP: pa.timestamp("us"),
+    }
+    return pa.schema([pa.field(column.name, types[column.kind]) for column in columns])
+
+
+def _naive_utc(value):
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def to_record_batch(rows, columns):
+    """Builds a ``pyarrow.RecordBatch`` from a list of row tuples.
+
+    Timezone-aware timestamps are normalized to UTC; naive ones are kept as-is.
+    """
+    pa = _import_optional("pyarrow")
+    schema = arrow_schema(columns)
+    arrays = []
+    for idx, (column, field) in enumerate(zip(columns, schema)):
+        values = [row[idx] for row in rows]
+        if column.kind == TIMESTAMP:
+            values = [_naive_utc(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+### NumPy ###
+def numpy_dtype(columns):
+    """Returns a structured ``numpy.dtype`` for a sequence of ``Column`` definitions.
+
+    Strings and decimals are kept as Python objects, so no precision is lost.
+    """
+    np = _import_optional("numpy")
+    types = {
+        STRING: object,
+        INT: np.int64,
+        DECIMAL: object,
+        TIMESTAMP: "datetime64[us]",
+    }
+    return np.dtype([(column.name, types[column.kind]) for column in columns])
+
+
+def to_structured_array(rows, columns):
+    """Builds a NumPy masked structured array from a list of row tuples,
+    where missing (``None``) values are masked.
+    """
+    np = _import_optional("numpy")
+    dtype = numpy_dtype(columns)
+    data = np.zeros(len(rows), dtype=dtype)
+    mask = np.zeros(len(rows), dtype=[(column.name, bool) for column in columns])
+    for idx, column in enumerate(columns):
+        values = [row[idx] for row in rows]
+        missing = [value is None for value in values]
+        if column.kind == TIMESTAMP:
+            values = [
+                np.datetime64(_naive_utc(value), "us")
+                if value is not None
+                else np.datetime64("NaT")
+                for value in values
+            ]
+        elif column.kind == INT:
+            values = [value if value is not None else 0 for value in values]
+        data[column.name] = values
+        mask[column.name] = missing
+    return np.ma.array(data, mask=mask)
+
+
+_BUILDERS = {
+    "arrow": to_record_batch,
+    "numpy": to_structured_array,
+}
+
+
+def _build(rows, columns, batch_size, output):
+    try:
+        builder = _BUILDERS[output]
+    except KeyError:
+        raise ValueError(
+            f"Unknown output {output!r}: must be one of {', '.join(_BUILDERS)}."
+        )
+    for batch in chunked(rows, batch_size):
+        yield builder(batch, columns)
+
+
+def report_batches(
+    reader, batch_size=DEFAULT_BATCH_SIZE, output="arrow", **reader_kwargs
+):
+    """Yields batches of rows from a flat file report.
+
+    ``reader`` is a :py:class:`FlatFileReader <mws.utils.flatfile.FlatFileReader>`,
+    or a source accepted by one (in which case ``reader_kwargs``, such as
+    ``report_type``, are passed to its constructor). Its ``column_types``
+    determine the schema: typed columns keep their types, all others are strings.
+
+    ``output`` is either ``"arrow"`` (``pyarrow.RecordBatch``) or ``"numpy"``
+    (masked structured ``numpy.ndarray``).
+    """
+    if not isinstance(reader, FlatFileReader):
+        reader = FlatFileReader(reader, **reader_kwargs)
+    elif reader.records:
+        raise ValueError("Use a FlatFileReader with records=False.")
+    columns = report_columns(reader.read_header(), reader.column_types)
+    yield from _build(reader, columns, batch_size, output)
+
+
+def list_action_columns(action):
+    """Returns the ``Column`` definitions for the list operation ``action``."""
+    action = throttle_action(action)
+    if action == "ListFinancialEvents":
+        return FINANCIAL_EVENT_COLUMNS
+    try:
+        return LIST_ACTION_SCHEMAS[action].columns
+    except KeyError:
+        raise ValueError(f"No columnar schema defined for action {action!r}.")
+
+
+def list_response_batches(
+    responses, action, batch_size=DEFAULT_BATCH_SIZE, output="arrow"
+):
+    """Yields batches of rows from pages of a list operation.
+
+    ``responses`` is an iterable of ``MWSResponse`` objects (or their ``.parsed``
+    content), typically the pages of a list operation and its "...ByNextToken"
+    follow-ups. ``action`` is the name of that operation (i.e. "ListOrders"),
+    which selects a schema from ``LIST_ACTION_SCHEMAS``.
+
+    Pages are consumed lazily, so only one page and one batch are held at a time.
+    """
+    action = throttle_action(action)
+    columns = list_action_columns(action)
+
+    def _rows():
+        for response in responses:
+            parsed = getattr(response, "parsed", response)
+            if action == "ListFinancialEvents":
+                yield from financial_event_rows(parsed)
+            else:
+                yield from list_response_rows(parsed, LIST_ACTION_SCHEMAS[action])
+
+    yield from _build(_rows(), columns, batch_size, output)
+
+
+def write_parquet(batches, where, schema=None, **writer_kwargs):
+    """Writes an iterable of ``pyarrow.RecordBatch`` objects to a Parquet file
+    at ``where`` (a path or writable file object), one row group at a time.
+
+    If ``schema`` is omitted, the schema of the first batch is used.
+    ``writer_kwargs`` are passed to ``pyarrow.parquet.ParquetWriter``
+    (``compression``, etc.). Returns the number of rows written.
+    """
+    _import_optional("pyarrow")
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = 0
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    where, schema or batch.schema, **writer_kwargs
+                )
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
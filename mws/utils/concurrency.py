@@ -0,0 +1,185 @@
+"""Utilities for running many MWS requests concurrently."""
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+DEFAULT_MAX_WORKERS = 4
+"""Default number of worker threads for concurrent helpers. MWS quotas are small,
+so more threads rarely help: they only spend more time waiting on the throttle.
+"""
+
+
+def chunked(items, size):
+    """Yields lists of up to ``size`` consecutive items from ``items``."""
+    if size < 1:
+        raise ValueError("`size` must be at least 1.")
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def concurrent_map(
+    func, items, max_workers=DEFAULT_MAX_WORKERS, ordered=True, executor=None
+):
+    """Calls ``func(item)`` for each of ``items`` in a pool of threads,
+    yielding ``(item, result)`` pairs.
+
+    If ``ordered`` is ``True`` (the default), pairs are yielded in the order of
+    ``items``; otherwise, as soon as each call completes.
+
+    ``items`` is consumed lazily: at most ``max_workers * 2`` calls are in flight
+    or waiting to be yielded at any time, so memory use does not grow with the
+    number of items.
+
+    An exception raised by ``func`` is re-raised here, after which calls not yet
+    started are cancelled. Pass an existing ``concurrent.futures.Executor``
+    as ``executor`` to use it instead of a new thread pool.
+    """
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    limit = max(1, max_workers) * 2
+    items = iter(items)
+    pending = deque()
+
+    def _submit_next():
+        for item in items:
+            pending.append((item, executor.submit(func, item)))
+            return True
+        return False
+
+    try:
+        while len(pending) < limit and _submit_next():
+            pass
+        while pending:
+            if ordered:
+                item, future = pending.popleft()
+                result = future.result()
+            else:
+                done, _ = wait(
+                    [future for _, future in pending], return_when=FIRST_COMPLETED
+                )
+                for idx, (item, future) in enumerate(pending):
+                    if future in done:
+                        del pending[idx]
+                        break
+                result = future.result()
+            _submit_next()
+            yield item, result
+    finally:
+        for _, future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True)
+
+
+def concurrent_chain(func, items, max_workers=DEFAULT_MAX_WORKERS, buffer_size=None):
+    """Calls ``func(item)`` for each of ``items`` in a pool of threads, where
+    ``func`` returns an iterable, and yields the values of all those iterables
+    as they are produced.
+
+    Values from different items are interleaved in no particular order. Workers
+    pause once ``buffer_size`` values (default: ``max_workers * 2``) are waiting
+    to be yielded, so a slow consumer keeps memory use bounded.
+
+    An exception raised by ``func`` or its iterable is re-raised here. Closing the
+    generator stops the workers once their current value is produced.
+    """
+    buffer = queue.Queue(maxsize=buffer_size or max(1, max_workers) * 2)
+    stop = threading.Event()
+    items = iter(items)
+    items_lock = threading.Lock()
+
+    def _put(entry):
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _worker():
+        try:
+            while not stop.is_set():
+                with items_lock:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        break
+                for value in func(item):
+                    if not _put((True, value)):
+                        return
+        except BaseException as exc:
+            _put((False, exc))
+            return
+        _put((False, None))
+
+    threads = [
+        threading.Thread(target=_worker, daemon=True) for _ in range(max_workers)
+    ]
+    for thread in threads:
+        thread.start()
+    running = len(threads)
+    try:
+        while running:
+            is_value, value = buffer.get()
+            if is_value:
+                yield value
+            elif value is not None:
+                raise value
+            else:
+                running -= 1
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+class SingleFlight:
+    """Thread-safe de-duplication of concurrent calls: while a call for a key is
+    in flight, further calls for the same key wait for it and share its result
+    (or exception) instead of running again.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Number of calls in flight."""
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key, func, *args, **kwargs):
+        """Returns the result of ``func(*args, **kwargs)``, or of the call for
+        ``key`` already in flight.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as exc:
+            self._finish(key)
+            call.set_exception(exc)
+            raise
+        self._finish(key)
+        call.set_result(result)
+        return result
+
+    def _finish(self, key):
+        # Calls made from now on run again, rather than reuse a finished result.
+        with self._lock:
+            del self._calls[key]
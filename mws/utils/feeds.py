@@ -0,0 +1,492 @@
+"""Streaming writers for feed files.
+
+Feed writers build XML envelope or flat file feeds one message (or row) at a
+time, writing straight to a spooled temporary file while counting messages and
+hashing the content, so large feeds never need to be held in memory as a whole.
+A finished writer can be passed as the ``feed`` of
+:py:meth:`Feeds.submit_feed() <mws.apis.feeds.Feeds.submit_feed>`.
+:py:func:`split_feed` splits an existing feed into several such writers.
+
+.. code-block:: python
+
+    from mws.utils.feeds import feed_writer
+
+    with feed_writer("_POST_INVENTORY_AVAILABILITY_DATA_", merchant_id="SELLER") as feed:
+        for sku, quantity in quantities.items():
+            feed.add_message(
+                f"<Inventory><SKU>{sku}</SKU><Quantity>{quantity}</Quantity></Inventory>"
+            )
+    feeds_api.submit_feed(feed, feed.feed_type)
+"""
+
+import codecs
+import gzip
+import hashlib
+import io
+import shutil
+import tempfile
+from array import array
+from base64 import b64encode
+from html import escape
+
+from defusedxml.ElementTree import iterparse, tostring
+
+from mws.utils.streams import STREAM_CHUNK_SIZE, ChunkStream, as_binary_stream
+from mws.utils.xml import local_tag
+
+FEED_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+"""Feeds larger than this many bytes are spooled to disk while being written."""
+
+FEED_SPLIT_MAX_BYTES = 10 * 1024 * 1024
+"""Default maximum size, in bytes, of each part of a split feed."""
+
+FEED_MESSAGE_TYPES = {
+    "_POST_PRODUCT_DATA_": "Product",
+    "_POST_INVENTORY_AVAILABILITY_DATA_": "Inventory",
+    "_POST_PRODUCT_OVERRIDES_DATA_": "Override",
+    "_POST_PRODUCT_PRICING_DATA_": "Price",
+    "_POST_PRODUCT_IMAGE_DATA_": "ProductImage",
+    "_POST_PRODUCT_RELATIONSHIP_DATA_": "Relationship",
+    "_POST_ORDER_ACKNOWLEDGEMENT_DATA_": "OrderAcknowledgement",
+    "_POST_PAYMENT_ADJUSTMENT_DATA_": "OrderAdjustment",
+    "_POST_ORDER_FULFILLMENT_DATA_": "OrderFulfillment",
+    "_POST_FULFILLMENT_ORDER_REQUEST_DATA_": "FulfillmentOrderRequest",
+    "_POST_FULFILLMENT_ORDER_CANCELLATION_REQUEST_DATA_": (
+        "FulfillmentOrderCancellationRequest"
+    ),
+    "_POST_FBA_INBOUND_CARTON_CONTENTS_": "CartonContentsRequest",
+    "_POST_INVOICE_CONFIRMATION_DATA_": "InvoiceConfirmation",
+}
+"""The envelope ``MessageType`` of each XML feed type, keyed by FeedType value."""
+
+_ENVELOPE_START = (
+    '<?xml version="1.0" encoding="utf-8"?>\n'
+    '<AmazonEnvelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+    ' xsi:noNamespaceSchemaLocation="amzn-envelope.xsd">\n'
+    "<Header><DocumentVersion>1.01</DocumentVersion>"
+    "<MerchantIdentifier>{merchant_id}</MerchantIdentifier></Header>\n"
+    "<MessageType>{message_type}</MessageType>\n"
+)
+_PURGE_AND_REPLACE = "<PurgeAndReplace>true</PurgeAndReplace>\n"
+_ENVELOPE_END = "</AmazonEnvelope>\n"
+
+
+class FeedWriter:
+    """Base class for streaming feed writers.
+
+    Content is written to a ``tempfile.SpooledTemporaryFile`` that moves to disk
+    past ``spool_max_size`` bytes. Once :py:meth:`close` is called (or the
+    ``with`` block exits), the writer is rewound and can be read like a binary
+    file, and ``content_md5`` holds the hash MWS expects in the "Content-MD5"
+    header.
+    """
+
+    content_type = "application/octet-stream"
+    """Value of the "Content-Type" header to send with this feed."""
+
+    encoding = "utf-8"
+    """Encoding of text written to the feed."""
+
+    content_encoding = None
+    """Value of the "Content-Encoding" header to send with this feed, if any."""
+
+    def __init__(self, feed_type, spool_max_size=FEED_SPOOL_MAX_SIZE):
+        self.feed_type = getattr(feed_type, "value", feed_type)
+        self.message_count = 0
+        self.size = 0
+        self.finished = False
+        self.source_message_ids = None
+        """For a part of a split feed, the MessageID (or row number) that each
+        of its messages had in the original feed.
+        """
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_max_size)
+        self._md5 = hashlib.md5()  # nosec This hash is not used for password encryption
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}({self.feed_type!r}, "
+            f"messages={self.message_count}, size={self.size})>"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def __len__(self):
+        return self.size
+
+    def _write(self, text):
+        if self.finished:
+            raise ValueError("Cannot write to a finished feed.")
+        data = text.encode(self.encoding) if isinstance(text, str) else text
+        self._file.write(data)
+        self._md5.update(data)
+        self.size += len(data)
+
+    def _finish(self):
+        """Writes any content closing the feed. Called once, by :py:meth:`close`."""
+
+    def close(self):
+        """Finishes the feed, rewinding it for reading. Returns the writer."""
+        if not self.finished:
+            self._finish()
+            self.finished = True
+        self._file.seek(0)
+        return self
+
+    def discard(self):
+        """Releases the underlying file, discarding its content."""
+        self.finished = True
+        self._file.close()
+
+    @property
+    def content_md5(self):
+        """Base64-encoded MD5 hash of the feed content, matching the format
+        of :py:func:`calc_md5 <mws.utils.crypto.calc_md5>`.
+        """
+        return b64encode(self._md5.digest())
+
+    def read(self, size=-1):
+        """Reads content from the finished feed."""
+        if not self.finished:
+            raise ValueError("The feed must be closed before it is read.")
+        return self._file.read(size)
+
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def getvalue(self):
+        """Returns the full content of the finished feed as ``bytes``."""
+        self.seek(0)
+        try:
+            return self.read()
+        finally:
+            self.seek(0)
+
+
+class XMLFeedWriter(FeedWriter):
+    """Writes an ``AmazonEnvelope`` XML feed, one ``Message`` at a time.
+
+    ``message_type`` defaults to the envelope type of ``feed_type`` (see
+    :py:data:`FEED_MESSAGE_TYPES`).
+    """
+
+    content_type = "text/xml"
+
+    def __init__(
+        self,
+        feed_type,
+        merchant_id,
+        message_type=None,
+        purge_and_replace=False,
+        spool_max_size=FEED_SPOOL_MAX_SIZE,
+    ):
+        super().__init__(feed_type, spool_max_size=spool_max_size)
+        if message_type is None:
+            try:
+                message_type = FEED_MESSAGE_TYPES[self.feed_type]
+            except KeyError:
+                raise ValueError(
+                    f"No message type is known for feed type {self.feed_type!r}: "
+                    "pass `message_type`."
+                )
+        self.message_type = message_type
+        self._write(
+            _ENVELOPE_START.format(
+                merchant_id=escape(merchant_id, quote=False),
+                message_type=message_type,
+            )
+        )
+        if purge_and_replace:
+            self._write(_PURGE_AND_REPLACE)
+
+    def add_message(self, message, operation_type=None):
+        """Adds a ``Message`` holding ``message``, the XML content that follows its
+        ``MessageID`` (and ``OperationType``, such as "Update" or "Delete", if given),
+        i.e. ``"<Price><SKU>ABC</SKU>...</Price>"``. Returns its MessageID.
+        """
+        self.message_count += 1
+        operation = ""
+        if operation_type is not None:
+            operation = f"<OperationType>{operation_type}</OperationType>"
+        if isinstance(message, bytes):
+            message = message.decode("utf-8")
+        self._write(
+            f"<Message><MessageID>{self.message_count}</MessageID>"
+            f"{operation}{message}</Message>\n"
+        )
+        return self.message_count
+
+    def _finish(self):
+        self._write(_ENVELOPE_END)
+
+
+def _flat_file_value(value):
+    if value is None:
+        return ""
+    # Tabs and line breaks would break the row apart.
+    return str(value).replace("\t", " ").replace("\r", " ").replace("\n", " ")
+
+
+class FlatFileFeedWriter(FeedWriter):
+    """Writes a tab-separated flat file feed, one row at a time.
+
+    ``columns`` are written as the header row, preceded by any ``template_rows``
+    (such as the "TemplateType=..." rows of category templates), each a sequence
+    of values. Content is encoded with ``encoding``, which is also declared in
+    the "Content-Type" header.
+    """
+
+    def __init__(
+        self,
+        feed_type,
+        columns,
+        template_rows=(),
+        encoding="utf-8",
+        spool_max_size=FEED_SPOOL_MAX_SIZE,
+    ):
+        super().__init__(feed_type, spool_max_size=spool_max_size)
+        self.columns = list(columns)
+        self.encoding = encoding
+        self.content_type = f"text/tab-separated-values; charset={encoding}"
+        self.header_rows = [list(row) for row in template_rows] + [self.columns]
+        for row in self.header_rows:
+            self._write_row(row)
+
+    def _write_row(self, values):
+        self._write("\t".join(_flat_file_value(value) for value in values) + "\n")
+
+    def _add_line(self, line):
+        """Adds a row already encoded as a line of the feed."""
+        self.message_count += 1
+        self._write(line)
+        return self.message_count
+
+    def add_row(self, row):
+        """Adds a row, either a dict keyed by column name (missing columns are
+        left blank) or a sequence of values in column order. Returns the row's
+        number, counting from 1 after the header rows.
+        """
+        if isinstance(row, dict):
+            unknown = set(row) - set(self.columns)
+            if unknown:
+                raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+            row = [row.get(column) for column in self.columns]
+        self.message_count += 1
+        self._write_row(row)
+        return self.message_count
+
+
+class _FeedSink:
+    """Minimal writable file passing everything written to a :py:class:`FeedWriter`."""
+
+    def __init__(self, writer):
+        self.write = writer._write
+
+    def flush(self):
+        pass
+
+
+class GzipFeed(FeedWriter):
+    """A gzip-compressed copy of ``feed``: ``bytes``, a binary file-like object,
+    or a finished :py:class:`FeedWriter`. The content is compressed as it is read,
+    straight into a spooled temporary file.
+
+    ``content_type`` (default: that of ``feed`` if it is a writer, else "text/xml")
+    describes the uncompressed content. ``content_md5`` and ``size`` refer to the
+    compressed content, and ``uncompressed_size`` to the original.
+
+    A ``FeedWriter`` given as ``feed`` is left open and rewound, so it can be
+    read or compressed again: discarding it is up to its owner.
+    """
+
+    content_encoding = "gzip"
+
+    def __init__(self, feed, content_type=None, spool_max_size=FEED_SPOOL_MAX_SIZE):
+        super().__init__(
+            getattr(feed, "feed_type", None), spool_max_size=spool_max_size
+        )
+        self.content_type = content_type or getattr(feed, "content_type", "text/xml")
+        self.message_count = getattr(feed, "message_count", 0)
+        if isinstance(feed, FeedWriter):
+            feed.close()
+        source = as_binary_stream(feed)
+        # mtime is fixed so the same feed always compresses to the same bytes.
+        with gzip.GzipFile(fileobj=_FeedSink(self), mode="wb", mtime=0) as gz_file:
+            shutil.copyfileobj(source, gz_file, STREAM_CHUNK_SIZE)
+            self.uncompressed_size = gz_file.tell()
+        if isinstance(feed, FeedWriter):
+            feed.seek(0)
+        self.close()
+
+
+def feed_writer(feed_type, **kwargs):
+    """Returns a new writer suited to ``feed_type``: an :py:class:`XMLFeedWriter`
+    for XML feed types (which needs a ``merchant_id``), or a
+    :py:class:`FlatFileFeedWriter` for flat file feed types (which needs
+    ``columns``). Other keyword arguments are passed to the writer.
+    """
+    feed_type = getattr(feed_type, "value", feed_type)
+    if feed_type in FEED_MESSAGE_TYPES:
+        return XMLFeedWriter(feed_type, **kwargs)
+    if "FLAT_FILE" in feed_type:
+        return FlatFileFeedWriter(feed_type, **kwargs)
+    raise ValueError(f"No feed writer is known for feed type {feed_type!r}.")
+
+
+def _feed_stream(feed):
+    """Returns a buffered binary stream reading ``feed``: ``bytes``, a binary
+    file-like object, or a finished :py:class:`FeedWriter`.
+    """
+    source = as_binary_stream(feed)
+    chunks = iter(lambda: source.read(STREAM_CHUNK_SIZE), b"")
+    return io.BufferedReader(ChunkStream(chunks))
+
+
+def split_feed(
+    feed,
+    feed_type,
+    max_messages=None,
+    max_bytes=FEED_SPLIT_MAX_BYTES,
+    encoding="utf-8",
+    header_rows=None,
+    spool_max_size=FEED_SPOOL_MAX_SIZE,
+):
+    """Splits ``feed`` into parts holding at most ``max_messages`` messages and
+    about ``max_bytes`` bytes each (or a single larger message), returning a list
+    of finished :py:class:`FeedWriter`, ready for
+    :py:meth:`Feeds.submit_feed() <mws.apis.feeds.Feeds.submit_feed>`.
+
+    ``feed`` may be ``bytes``, a binary file-like object or a finished
+    ``FeedWriter``, holding either an XML envelope or a flat file:
+
+    - XML feeds are split on ``Message`` boundaries. Each part repeats the envelope
+      header and numbers its messages from 1.
+    - Flat file feeds are split on row boundaries, and each part repeats the
+      header rows. Their number is detected from the first line ("TemplateType=..."
+      templates have 3) unless given as ``header_rows``. ``encoding`` is the
+      encoding of the feed.
+
+    Each part's ``source_message_ids`` hold the MessageID (or, for flat files,
+    the row number) each of its messages had in ``feed``.
+    """
+    feed_type = getattr(feed_type, "value", feed_type)
+    stream = _feed_stream(feed)
+    # Sniff the first character, past any byte order mark and whitespace.
+    head = stream.peek(1)
+    if head.startswith(codecs.BOM_UTF8):
+        head = head[len(codecs.BOM_UTF8) :]
+    if head.lstrip()[:1] == b"<":
+        splitter = _split_xml_feed(stream, feed_type, spool_max_size)
+    else:
+        splitter = _split_flat_file_feed(
+            stream, feed_type, encoding, header_rows, spool_max_size
+        )
+
+    parts = []
+    part = None
+    try:
+        for new_part, message_id, content in splitter:
+            if part is not None and (
+                (max_messages is not None and part.message_count >= max_messages)
+                or (part.message_count and part.size + len(content) > max_bytes)
+            ):
+                parts.append(part.close())
+                part = None
+            if part is None:
+                part = new_part()
+                part.source_message_ids = array("q")
+            if isinstance(part, XMLFeedWriter):
+                part.add_message(content)
+            else:
+                part._add_line(content)
+            part.source_message_ids.append(message_id)
+        if part is not None:
+            parts.append(part.close())
+    except BaseException:
+        for each in parts + ([part] if part is not None else []):
+            each.discard()
+        raise
+    return parts
+
+
+def _split_xml_feed(stream, feed_type, spool_max_size):
+    """Yields ``(new_part, message_id, content)`` for each message of an XML feed,
+    where ``new_part`` returns an empty part with the feed's header and
+    ``content`` is the message's XML, without its MessageID.
+    """
+    header = {}
+    root = None
+    depth = 0
+    message_number = 0
+
+    def new_part():
+        if header.get("PurgeAndReplace") == "true":
+            raise ValueError("Feeds with PurgeAndReplace cannot be split.")
+        return XMLFeedWriter(
+            feed_type,
+            header.get("MerchantIdentifier") or "",
+            message_type=header.get("MessageType"),
+            spool_max_size=spool_max_size,
+        )
+
+    for event, elem in iterparse(stream, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 1:
+                root = elem
+            continue
+        depth -= 1
+        tag = local_tag(elem.tag)
+        if depth == 2 and tag == "MerchantIdentifier":
+            header[tag] = elem.text
+        elif depth == 1 and tag in ("MessageType", "PurgeAndReplace"):
+            header[tag] = (elem.text or "").strip()
+        elif depth == 1 and tag == "Message":
+            message_number += 1
+            message_id = message_number
+            content = []
+            for child in elem:
+                child_tag = local_tag(child.tag)
+                if child_tag == "MessageID":
+                    message_id = int(child.text)
+                    continue
+                child.tail = None
+                content.append(tostring(child, encoding="unicode"))
+            yield new_part, message_id, "".join(content).encode("utf-8")
+            # Drop the processed message from the tree to keep memory flat.
+            root.remove(elem)
+
+
+def _split_flat_file_feed(stream, feed_type, encoding, header_rows, spool_max_size):
+    """Yields ``(new_part, row_number, line)`` for each row of a flat file feed,
+    where ``new_part`` returns an empty part with the feed's header rows.
+    """
+    first = stream.readline()
+    if header_rows is None:
+        header_rows = 3 if first.startswith(b"TemplateType=") else 1
+    headers = [first] + [stream.readline() for _ in range(header_rows - 1)]
+    headers = [
+        line.decode(encoding).rstrip("\r\n").split("\t") for line in headers if line
+    ]
+    if not headers:
+        return
+
+    def new_part():
+        return FlatFileFeedWriter(
+            feed_type,
+            headers[-1],
+            template_rows=headers[:-1],
+            encoding=encoding,
+            spool_max_size=spool_max_size,
+        )
+
+    for row_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        yield new_part, row_number, line.rstrip(b"\r\n") + b"\n"
@@ -0,0 +1,148 @@
+"""Flattening and streaming parsers for financial events.
+
+ListFinancialEvents results nest each event's amounts several levels deep,
+under a different structure for each kind of event (``ShipmentEventList``,
+``RefundEventList``, ``ServiceFeeEventList``...). The helpers here flatten every
+event into one :py:class:`FinancialEventRecord` per monetary amount.
+:py:class:`FinancialEventsPage` does so while reading a response as a stream,
+one event at a time, without building the tree of the full page.
+"""
+
+import datetime
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+from defusedxml.ElementTree import iterparse
+
+from mws.utils.flatfile import parse_date, parse_decimal
+from mws.utils.streams import as_binary_stream, response_stream
+from mws.utils.xml import as_list, element_to_dict, local_tag
+
+
+class FinancialEventRecord(NamedTuple):
+    """A single monetary amount from a financial event."""
+
+    event_type: str
+    """The kind of event, named for its list without the "List" suffix,
+    i.e. "ShipmentEvent", "RefundEvent", "ServiceFeeEvent".
+    """
+    posted_date: Optional[datetime.datetime]
+    amazon_order_id: Optional[str]
+    seller_order_id: Optional[str]
+    marketplace_name: Optional[str]
+    seller_sku: Optional[str]
+    amount_type: Optional[str]
+    """The charge, fee or other type labelling the amount, i.e. "Principal",
+    "Commission", "FBAPerUnitFulfillmentFee".
+    """
+    amount: Optional[Decimal]
+    currency: Optional[str]
+
+
+_CONTEXT_FIELDS = (
+    "PostedDate",
+    "AmazonOrderId",
+    "SellerOrderId",
+    "MarketplaceName",
+    "SellerSKU",
+)
+
+
+def financial_event_records(event_type, event):
+    """Yields a :py:class:`FinancialEventRecord` for each monetary amount in
+    ``event``, a single event parsed to nested dicts (such as a ``DotDict``).
+
+    Each node holding a ``CurrencyAmount`` becomes a record, labelled by a sibling
+    "...Type" value (i.e. ``ChargeType``, ``FeeType``) or else by its own tag name.
+    Identifying fields (order ID, SKU, posting date...) are inherited from the
+    nearest enclosing node that has them.
+    """
+    yield from _amount_records(event_type, event, {})
+
+
+def _amount_records(event_type, node, context, tag=None, label=None):
+    if not isinstance(node, dict):
+        return
+    if "CurrencyAmount" in node:
+        yield FinancialEventRecord(
+            event_type,
+            parse_date(context.get("PostedDate")),
+            context.get("AmazonOrderId"),
+            context.get("SellerOrderId"),
+            context.get("MarketplaceName"),
+            context.get("SellerSKU"),
+            label or tag,
+            parse_decimal(node.get("CurrencyAmount")),
+            node.get("CurrencyCode"),
+        )
+        return
+    context = dict(context)
+    label = None
+    for key, value in node.items():
+        if key in _CONTEXT_FIELDS and isinstance(value, str):
+            context[key] = value
+        elif key.endswith("Type") and isinstance(value, str):
+            label = value
+    for key, value in node.items():
+        if isinstance(value, (dict, list)):
+            for child in as_list(value):
+                yield from _amount_records(event_type, child, context, key, label)
+
+
+def parsed_financial_event_records(parsed):
+    """Yields a :py:class:`FinancialEventRecord` for each monetary amount in a
+    page of ListFinancialEvents results that has already been parsed,
+    i.e. the ``.parsed`` content of an ``MWSResponse``.
+    """
+    event_lists = parsed.get("FinancialEvents") or {}
+    for list_name, events in event_lists.items():
+        if not list_name.endswith("EventList") or not isinstance(events, dict):
+            continue
+        event_type = list_name[: -len("List")]
+        # Each list wraps its events in a single child tag, i.e. "ShipmentEvent"
+        for event_group in events.values():
+            for event in as_list(event_group):
+                yield from financial_event_records(event_type, event)
+
+
+class FinancialEventsPage:
+    """Iterates the :py:class:`FinancialEventRecord` objects in one page of
+    ListFinancialEvents (or ListFinancialEventsByNextToken) results,
+    parsing the response body as a stream.
+
+    ``source`` may be a binary file-like object, ``bytes``, an iterable of
+    ``bytes`` chunks, or a (preferably streamed) response object. Each event is
+    discarded as soon as its records are produced.
+
+    Once iteration is complete, ``next_token`` holds the page's NextToken,
+    or ``None`` if it is the last page.
+    """
+
+    def __init__(self, source):
+        if hasattr(source, "iter_content") or hasattr(source, "original"):
+            source = response_stream(source)
+        self._source = as_binary_stream(source)
+        self.next_token = None
+
+    def __iter__(self):
+        # Depth of elements, from 1 for the document root:
+        # Response > Result > FinancialEvents > ...EventList > ...Event
+        depth = 0
+        event_list = None
+        event_type = None
+        for event, elem in iterparse(self._source, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 4 and local_tag(elem.tag).endswith("EventList"):
+                    event_list = elem
+                    event_type = local_tag(elem.tag)[: -len("List")]
+                continue
+            depth -= 1
+            if depth == 2 and local_tag(elem.tag) == "NextToken":
+                self.next_token = elem.text or None
+            elif depth == 3:
+                event_list = None
+            elif depth == 4 and event_list is not None:
+                yield from financial_event_records(event_type, element_to_dict(elem))
+                # Drop the processed event from the tree to keep memory flat.
+                event_list.remove(elem)
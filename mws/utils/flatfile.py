@@ -0,0 +1,352 @@
+"""Utilities for reading tab-delimited flat file reports returned by MWS.
+
+Most report types (``_GET_MERCHANT_LISTINGS_ALL_DATA_``,
+``_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_ORDER_DATE_``, settlement flat files, etc.)
+are plain tab-delimited text with a single header row.
+:py:class:`FlatFileReader` reads those rows straight from a binary stream,
+so a report of any size can be processed in constant memory.
+"""
+
+import codecs
+import csv
+import datetime
+import io
+import keyword
+import re
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+from mws.models.reports import ReportType
+from mws.utils.streams import as_binary_stream
+
+FLAT_FILE_DEFAULT_ENCODING = "cp1252"
+"""Amazon documents flat file reports as Cp1252 (Windows-1252) encoded,
+with the exceptions listed in ``FLAT_FILE_ENCODINGS``.
+"""
+
+FLAT_FILE_ENCODINGS = {
+    "A1VC38T7YXB528": "cp932",  # JP: Shift_JIS, as extended by Windows-31J
+    "A2VIGQ35RCS4UG": "utf-8",  # AE
+    "ARBP9OOSHTCHU": "utf-8",  # EG
+    "A17E79C6D8DWNP": "utf-8",  # SA
+    "A33AVAJ2PDY3EV": "utf-8",  # TR
+}
+"""Flat file encodings for marketplaces that do not use the default, keyed by
+marketplace ID.
+"""
+
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+
+def detect_flat_file_encoding(marketplace=None, content_type=None):
+    """Returns the name of a codec to decode a flat file report.
+
+    A ``charset`` declared in ``content_type`` (the value of a "Content-Type"
+    header) takes precedence, provided Python knows that codec. Otherwise the
+    encoding is looked up for ``marketplace``, which may be a
+    :py:class:`Marketplaces <mws.Marketplaces>` member or a marketplace ID string.
+    Falls back to ``FLAT_FILE_DEFAULT_ENCODING``.
+    """
+    if content_type:
+        match = _CHARSET_RE.search(content_type)
+        if match:
+            try:
+                return codecs.lookup(match.group(1)).name
+            except LookupError:
+                # A charset Python doesn't know (Java names such as "Windows-31J"
+                # sometimes appear here). Fall back to the marketplace instead.
+                pass
+    marketplace_id = getattr(marketplace, "marketplace_id", marketplace)
+    return FLAT_FILE_ENCODINGS.get(marketplace_id, FLAT_FILE_DEFAULT_ENCODING)
+
+
+### Column converters ###
+_DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+)
+_UTC_SUFFIXES = (" UTC", " GMT", "Z")
+_TZ_ABBREVIATION_RE = re.compile(r"\s+[A-Z]{3,4}$")
+
+
+def parse_date(value):
+    """Converts a date string found in a flat file report to ``datetime.datetime``.
+
+    ISO 8601 strings are parsed with their offsets intact, and a trailing
+    "UTC", "GMT" or "Z" produces an aware datetime in UTC. Other timezone
+    abbreviations (such as "PST") are ambiguous and are dropped, returning a
+    naive datetime in the report's local time.
+
+    Empty values return ``None``.
+    """
+    if not value:
+        return None
+    tzinfo = None
+    for suffix in _UTC_SUFFIXES:
+        if value.endswith(suffix):
+            value = value[: -len(suffix)]
+            tzinfo = datetime.timezone.utc
+            break
+    else:
+        value = _TZ_ABBREVIATION_RE.sub("", value)
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in _DATE_FORMATS:
+            try:
+                parsed = datetime.datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Unrecognized date format: {value!r}")
+    if tzinfo is not None and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=tzinfo)
+    return parsed
+
+
+def parse_decimal(value):
+    """Converts a money or quantity string to ``decimal.Decimal``.
+
+    Reports for some EU marketplaces use a comma as the decimal separator
+    ("1.234,56"), which is handled here as well. Empty values return ``None``.
+    """
+    if not value:
+        return None
+    if "," in value:
+        if "." in value and value.rindex(".") > value.rindex(","):
+            # "1,234.56": commas are thousands separators.
+            value = value.replace(",", "")
+        else:
+            # "1.234,56" or "12,34": comma is the decimal separator.
+            value = value.replace(".", "").replace(",", ".")
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"Invalid decimal value: {value!r}")
+
+
+def parse_int(value):
+    """Converts an integer string to ``int``. Empty values return ``None``."""
+    if not value:
+        return None
+    return int(value)
+
+
+_LISTINGS_COLUMNS = {
+    "price": parse_decimal,
+    "quantity": parse_int,
+    "open-date": parse_date,
+    "pending-quantity": parse_int,
+    "zshop-shipping-fee": parse_decimal,
+}
+
+_ALL_ORDERS_COLUMNS = {
+    "purchase-date": parse_date,
+    "last-updated-date": parse_date,
+    "quantity": parse_int,
+    "item-price": parse_decimal,
+    "item-tax": parse_decimal,
+    "shipping-price": parse_decimal,
+    "shipping-tax": parse_decimal,
+    "gift-wrap-price": parse_decimal,
+    "gift-wrap-tax": parse_decimal,
+    "item-promotion-discount": parse_decimal,
+    "ship-promotion-discount": parse_decimal,
+}
+
+_SETTLEMENT_COMMON_COLUMNS = {
+    "settlement-start-date": parse_date,
+    "settlement-end-date": parse_date,
+    "deposit-date": parse_date,
+    "total-amount": parse_decimal,
+    "posted-date": parse_date,
+    "quantity-purchased": parse_int,
+}
+
+_SETTLEMENT_V1_COLUMNS = dict(
+    _SETTLEMENT_COMMON_COLUMNS,
+    **{
+        "shipment-fee-amount": parse_decimal,
+        "order-fee-amount": parse_decimal,
+        "price-amount": parse_decimal,
+        "item-related-fee-amount": parse_decimal,
+        "misc-fee-amount": parse_decimal,
+        "other-fee-amount": parse_decimal,
+        "promotion-amount": parse_decimal,
+        "direct-payment-amount": parse_decimal,
+        "other-amount": parse_decimal,
+    },
+)
+
+_SETTLEMENT_V2_COLUMNS = dict(
+    _SETTLEMENT_COMMON_COLUMNS,
+    **{
+        "amount": parse_decimal,
+        "posted-date-time": parse_date,
+    },
+)
+
+REPORT_COLUMN_TYPES = {
+    ReportType.INVENTORY.value: {
+        "price": parse_decimal,
+        "quantity": parse_int,
+    },
+    ReportType.ALL_LISTINGS.value: _LISTINGS_COLUMNS,
+    ReportType.ACTIVE_LISTINGS.value: _LISTINGS_COLUMNS,
+    ReportType.INACTIVE_LISTINGS.value: _LISTINGS_COLUMNS,
+    ReportType.TRACKING_BY_LAST_UPDATE.value: _ALL_ORDERS_COLUMNS,
+    ReportType.TRACKING_BY_ORDER_DATE.value: _ALL_ORDERS_COLUMNS,
+    ReportType.TRACKING_ARCHIVED_ORDERS_FLATFILE.value: _ALL_ORDERS_COLUMNS,
+    ReportType.SETTLEMENT_FLATFILE.value: _SETTLEMENT_V1_COLUMNS,
+    ReportType.SETTLEMENT_V2_FLATFILE.value: _SETTLEMENT_V2_COLUMNS,
+    ReportType.FBA_INVENTORY_AFN.value: {
+        "Quantity Available": parse_int,
+    },
+}
+"""Column converters for known flat file report types, keyed by ``ReportType``
+value, then by the column's header name. Columns not listed are left as ``str``.
+"""
+
+
+def record_field_name(header):
+    """Converts a flat file column header ("seller-sku", "Quantity Available")
+    into a valid Python identifier ("seller_sku", "quantity_available").
+    """
+    name = re.sub(r"\W+", "_", header.strip()).strip("_").lower()
+    if not name or name[0].isdigit() or keyword.iskeyword(name):
+        name = f"f_{name}"
+    return name
+
+
+class FlatFileReader:
+    """Iterates over the rows of a tab-delimited flat file report.
+
+    ``source`` may be a binary file-like object, ``bytes``, or an iterable of
+    ``bytes`` chunks (such as ``requests.Response.iter_content()``). Content is
+    decoded incrementally, so memory use does not grow with the size of the report.
+
+    The first row is read as the header, available from :py:attr:`header` once
+    iteration has begun (or after calling :py:meth:`read_header`).
+
+    :param encoding: Codec used to decode ``source``. If omitted, one is chosen
+     by :py:func:`detect_flat_file_encoding` from ``marketplace``.
+    :param marketplace: A ``Marketplaces`` member or marketplace ID,
+     used to pick a default encoding.
+    :param report_type: A ``ReportType`` (or its value). Used to look up column
+     converters from ``REPORT_COLUMN_TYPES`` when ``column_types`` is not given.
+    :param column_types: Mapping of header names to converter callables,
+     such as :py:func:`parse_date`, :py:func:`parse_decimal` and
+     :py:func:`parse_int`. Takes precedence over ``report_type``.
+    :param bool records: If ``True``, rows are yielded as named tuples whose fields
+     are named after the header (see :py:func:`record_field_name`).
+     Otherwise (the default), rows are yielded as plain tuples.
+    :param str errors: Passed to the decoder; defaults to ``"strict"``.
+    """
+
+    def __init__(
+        self,
+        source,
+        encoding=None,
+        marketplace=None,
+        report_type=None,
+        column_types=None,
+        records=False,
+        errors="strict",
+    ):
+        self.encoding = encoding or detect_flat_file_encoding(marketplace)
+        if column_types is None and report_type is not None:
+            report_type = getattr(report_type, "value", report_type)
+            column_types = REPORT_COLUMN_TYPES.get(report_type)
+        self.column_types = column_types or {}
+        self.records = records
+        self.header = None
+        self.record_class = None
+        self._converters = None
+        self._text = io.TextIOWrapper(
+            io.BufferedReader(_Readable(as_binary_stream(source))),
+            encoding=self.encoding,
+            errors=errors,
+            newline="",
+        )
+        self._reader = csv.reader(
+            self._text, delimiter="\t", quoting=csv.QUOTE_NONE, strict=False
+        )
+
+    def read_header(self):
+        """Reads and returns the header row, if it has not been read already."""
+        if self.header is None:
+            try:
+                self.header = tuple(next(self._reader))
+            except StopIteration:
+                self.header = ()
+            self._converters = [
+                (idx, self.column_types[name])
+                for idx, name in enumerate(self.header)
+                if name in self.column_types
+            ]
+            if self.records:
+                self.record_class = namedtuple(
+                    "FlatFileRecord",
+                    [record_field_name(name) for name in self.header],
+                    rename=True,
+                )
+        return self.header
+
+    def __iter__(self):
+        header = self.read_header()
+        width = len(header)
+        converters = self._converters
+        record_class = self.record_class
+        for row in self._reader:
+            if not row:
+                # Skip blank lines, usually trailing ones.
+                continue
+            if len(row) < width:
+                # Trailing empty columns are sometimes trimmed from a row.
+                row.extend([""] * (width - len(row)))
+            for idx, convert in converters:
+                row[idx] = convert(row[idx])
+            if record_class is not None:
+                if len(row) > width:
+                    raise ValueError(
+                        f"Row on line {self._reader.line_num} has {len(row)} columns, "
+                        f"but the header only has {width}."
+                    )
+                yield record_class._make(row)
+            else:
+                yield tuple(row)
+
+    def close(self):
+        """Closes the underlying text stream."""
+        self._text.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _Readable(io.RawIOBase):
+    """Adapts any object with a ``read()`` method to ``io.RawIOBase``, so that
+    ``io.BufferedReader`` can wrap it.
+    """
+
+    def __init__(self, fileobj):
+        super().__init__()
+        self._fileobj = fileobj
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._fileobj.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        return size
@@ -0,0 +1,77 @@
+"""Parsing of XML responses in a pool of processes.
+
+Converting a large XML response to a dict is CPU-bound, and holds the GIL while
+it runs. A :py:class:`ParsePool` hands the raw content of each response to a
+worker process, so that threads making requests keep running while others'
+responses are parsed. Only bytes are sent to the workers, and only the plain
+dict produced by :py:func:`mws_xml_to_dict <mws.utils.xml.mws_xml_to_dict>`
+comes back.
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from xml.parsers.expat import ExpatError
+
+from mws.utils.xml import MWS_ENCODING, mws_xml_to_dict
+
+PARSE_POOL_MIN_SIZE = 64 * 1024
+"""Default size, in bytes, below which content is parsed in the calling process:
+sending small responses to a worker costs more than parsing them.
+"""
+
+
+def parse_xml_content(content, encoding=MWS_ENCODING, force_cdata=False):
+    """Returns ``content`` parsed with ``mws_xml_to_dict``,
+    or ``None`` if it is not XML.
+    """
+    try:
+        return mws_xml_to_dict(content, encoding=encoding, force_cdata=force_cdata)
+    except ExpatError:
+        return None
+
+
+class ParsePool:
+    """Pool of up to ``max_workers`` processes (default: one per CPU) parsing
+    XML content, for use by ``MWSResponse``. Pass one as ``parse_pool`` when
+    creating API instances, which can share it:
+
+    .. code-block:: python
+
+        from mws import Orders
+        from mws.utils.parse_pool import ParsePool
+
+        with ParsePool() as pool:
+            api = Orders(..., parse_pool=pool)
+            api._use_feature_mwsresponse = True
+            response = api.list_orders(...)  # parsed in a worker process
+
+    Content smaller than ``min_size`` bytes is parsed in the calling process.
+    ``mp_context`` is passed to ``concurrent.futures.ProcessPoolExecutor``.
+    """
+
+    def __init__(self, max_workers=None, min_size=PARSE_POOL_MIN_SIZE, mp_context=None):
+        self.min_size = min_size
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=mp_context
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def submit(self, content, encoding=MWS_ENCODING, force_cdata=False):
+        """Returns a ``concurrent.futures.Future`` of ``content`` (``bytes``)
+        parsed to a dict, or of ``None`` if it is not XML.
+        """
+        if len(content) < self.min_size:
+            future = Future()
+            try:
+                future.set_result(parse_xml_content(content, encoding, force_cdata))
+            except Exception as exc:
+                future.set_exception(exc)
+            return future
+        return self._executor.submit(parse_xml_content, content, encoding, force_cdata)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,155 @@
+"""Streaming parser for feed processing reports.
+
+The processing report returned by GetFeedSubmissionResult holds a ``Result``
+node for every message that failed or raised a warning, which can run to many
+thousands for large feeds. :py:class:`ProcessingReport` reads the report as a
+stream, keeping only the summary counts and a compact record of each result,
+indexed by MessageID and by SKU.
+"""
+
+from typing import NamedTuple, Optional
+
+from defusedxml.ElementTree import iterparse
+
+from mws.utils.flatfile import parse_int
+from mws.utils.streams import as_binary_stream, response_stream
+from mws.utils.xml import local_tag
+
+RESULT_ERROR = "Error"
+RESULT_WARNING = "Warning"
+
+
+class ProcessingResult(NamedTuple):
+    """A single ``Result`` of a feed processing report."""
+
+    message_id: int
+    """MessageID of the feed message the result refers to.
+    0 for results about the feed as a whole.
+    """
+    result_code: str
+    """"Error" or "Warning"."""
+    result_message_code: Optional[str]
+    result_description: Optional[str]
+    sku: Optional[str]
+    """The ``SKU`` from the result's ``AdditionalInfo``, if any."""
+    additional_info: dict
+    """All values of the result's ``AdditionalInfo``, keyed by tag name."""
+
+
+def _result(elem):
+    values = {}
+    additional_info = {}
+    for child in elem:
+        tag = local_tag(child.tag)
+        if tag == "AdditionalInfo":
+            for info in child:
+                additional_info[local_tag(info.tag)] = info.text
+        else:
+            values[tag] = child.text
+    return ProcessingResult(
+        message_id=parse_int(values.get("MessageID")) or 0,
+        result_code=values.get("ResultCode"),
+        result_message_code=values.get("ResultMessageCode"),
+        result_description=values.get("ResultDescription"),
+        sku=additional_info.get("SKU"),
+        additional_info=additional_info,
+    )
+
+
+class ProcessingReport:
+    """Parses a feed processing report from ``source``: a binary file-like
+    object, ``bytes``, an iterable of ``bytes`` chunks, or a (preferably streamed)
+    response object, such as that of
+    :py:meth:`Feeds.get_feed_submission_result(..., stream=True)
+    <mws.apis.feeds.Feeds.get_feed_submission_result>`.
+
+    The report is read in full on creation, discarding each ``Result`` node as
+    soon as it is recorded. Summary counts are available as attributes, results
+    as :py:class:`ProcessingResult` tuples through :py:attr:`results`,
+    :py:meth:`for_message` and :py:meth:`for_sku`.
+    """
+
+    def __init__(self, source):
+        if hasattr(source, "iter_content") or hasattr(source, "original"):
+            source = response_stream(source)
+        self.document_transaction_id = None
+        self.status_code = None
+        self.messages_processed = None
+        self.messages_successful = None
+        self.messages_with_error = None
+        self.messages_with_warning = None
+        self.results = []
+        self._by_message_id = {}
+        self._by_sku = {}
+        self._parse(as_binary_stream(source))
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}(status_code={self.status_code!r}, "
+            f"errors={self.messages_with_error}, warnings={self.messages_with_warning})>"
+        )
+
+    def _parse(self, stream):
+        summary_fields = {
+            "MessagesProcessed": "messages_processed",
+            "MessagesSuccessful": "messages_successful",
+            "MessagesWithError": "messages_with_error",
+            "MessagesWithWarning": "messages_with_warning",
+        }
+        report = None
+        for event, elem in iterparse(stream, events=("start", "end")):
+            tag = local_tag(elem.tag)
+            if event == "start":
+                if tag == "ProcessingReport":
+                    report = elem
+                continue
+            if report is None:
+                continue
+            if tag == "Result":
+                self._add(_result(elem))
+                # Drop the processed result from the tree to keep memory flat.
+                report.remove(elem)
+            elif tag == "DocumentTransactionID":
+                self.document_transaction_id = elem.text
+            elif tag == "StatusCode":
+                self.status_code = elem.text
+            elif tag in summary_fields:
+                setattr(self, summary_fields[tag], parse_int(elem.text))
+            elif tag == "ProcessingReport":
+                report = None
+
+    def _add(self, result):
+        if result.result_code not in (RESULT_ERROR, RESULT_WARNING):
+            return
+        self.results.append(result)
+        self._by_message_id.setdefault(result.message_id, []).append(result)
+        if result.sku is not None:
+            self._by_sku.setdefault(result.sku, []).append(result)
+
+    @property
+    def errors(self):
+        return [result for result in self.results if result.result_code == RESULT_ERROR]
+
+    @property
+    def warnings(self):
+        return [
+            result for result in self.results if result.result_code == RESULT_WARNING
+        ]
+
+    def for_message(self, message_id):
+        """Returns the results for the feed message ``message_id``, along with
+        any results about the feed as a whole (MessageID 0).
+        """
+        message_id = int(message_id)
+        results = list(self._by_message_id.get(message_id, []))
+        if message_id != 0:
+            results = self._by_message_id.get(0, []) + results
+        return results
+
+    def for_sku(self, sku):
+        """Returns the results whose ``AdditionalInfo`` names ``sku``."""
+        return list(self._by_sku.get(sku, []))
+
+    def failed_message_ids(self):
+        """Returns the sorted MessageIDs of messages with errors."""
+        return sorted({result.message_id for result in self.errors} - {0})
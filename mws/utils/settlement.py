@@ -0,0 +1,356 @@
+"""Streaming parsers for settlement reports.
+
+Settlement reports (``ReportType.SETTLEMENT_V2_XML``,
+``ReportType.SETTLEMENT_FLATFILE`` and ``ReportType.SETTLEMENT_V2_FLATFILE``)
+can reach hundreds of thousands of lines. The parsers here read them as a stream,
+yielding one :py:class:`SettlementRecord` per monetary amount without ever
+building the full document tree, so memory use stays flat regardless of size.
+"""
+
+import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import NamedTuple, Optional
+
+from defusedxml.ElementTree import iterparse
+
+from mws.models.reports import ReportType
+from mws.utils.flatfile import FlatFileReader, parse_date, parse_decimal
+from mws.utils.streams import as_binary_stream, response_stream
+from mws.utils.xml import local_tag
+
+
+class TransactionKind(str, Enum):
+    """Normalized kinds of settlement transactions."""
+
+    ORDER = "order"
+    REFUND = "refund"
+    FEE = "fee"
+    ADJUSTMENT = "adjustment"
+
+
+class SettlementRecord(NamedTuple):
+    """A single monetary amount from a settlement report."""
+
+    settlement_id: Optional[str]
+    kind: TransactionKind
+    transaction_type: Optional[str]
+    """The transaction type as named in the report, i.e. "Order", "Refund",
+    "ServiceFee", "Subscription Fee".
+    """
+    order_id: Optional[str]
+    merchant_order_id: Optional[str]
+    adjustment_id: Optional[str]
+    shipment_id: Optional[str]
+    marketplace_name: Optional[str]
+    posted_date: Optional[datetime.datetime]
+    sku: Optional[str]
+    order_item_code: Optional[str]
+    quantity: Optional[int]
+    amount_type: Optional[str]
+    """Group of the amount, i.e. "ItemPrice", "ItemFees", "Promotion"."""
+    amount_description: Optional[str]
+    """Detail of the amount, i.e. "Principal", "Commission", "FBAPerUnitFulfillmentFee"."""
+    amount: Decimal
+    currency: Optional[str]
+
+
+def transaction_kind(transaction_type):
+    """Maps a transaction type named in a settlement report to a
+    :py:class:`TransactionKind`.
+    """
+    name = (transaction_type or "").lower()
+    if name.startswith("order"):
+        return TransactionKind.ORDER
+    if "refund" in name or "chargeback" in name or "guarantee" in name:
+        return TransactionKind.REFUND
+    if "fee" in name or "advertising" in name or "subscription" in name:
+        return TransactionKind.FEE
+    return TransactionKind.ADJUSTMENT
+
+
+def _source_stream(source):
+    if hasattr(source, "iter_content") or hasattr(source, "original"):
+        # A `requests.Response` or `MWSResponse`
+        return response_stream(source)
+    return as_binary_stream(source)
+
+
+### XML ###
+_XML_TRANSACTION_TYPES = {
+    "Order": "Order",
+    "Refund": "Refund",
+    "Chargeback": "Chargeback",
+    "GuaranteeClaim": "GuaranteeClaim",
+    "OtherFee": "OtherFee",
+    "AdvertisingTransactionDetails": "Advertising",
+    "SellerDealPayment": "SellerDealPayment",
+    "SellerCouponPayment": "SellerCouponPayment",
+    "OtherTransaction": None,  # Named by its own <TransactionType>
+}
+"""Top-level transaction tags found under ``<SettlementReport>``,
+mapped to their transaction type.
+"""
+
+_XML_ITEM_TAGS = ("Item", "AdjustedItem")
+
+
+def _child_text(elem, name):
+    for child in elem:
+        if local_tag(child.tag) == name:
+            text = child.text
+            return text.strip() if text else None
+    return None
+
+
+def _amounts(elem, amount_type=None):
+    """Yields ``(amount_type, description, amount, currency)`` for every
+    ``<Amount>`` nested in ``elem``, labelled by a sibling ``<Type>``.
+    """
+    description = None
+    for child in elem:
+        if local_tag(child.tag) == "Type":
+            description = child.text
+            break
+    for child in elem:
+        tag = local_tag(child.tag)
+        if tag == "Amount" or (tag.endswith("Amount") and child.get("currency")):
+            yield (
+                amount_type,
+                description or tag,
+                parse_decimal(child.text),
+                child.get("currency"),
+            )
+        elif len(child):
+            yield from _amounts(child, amount_type or tag)
+
+
+def _xml_transaction_records(elem, settlement_id, default_currency):
+    tag = local_tag(elem.tag)
+    transaction_type = _XML_TRANSACTION_TYPES[tag] or _child_text(
+        elem, "TransactionType"
+    )
+    kind = transaction_kind(transaction_type)
+    if tag == "OtherTransaction" and kind != TransactionKind.FEE:
+        # Anything else outside of orders and refunds adjusts the balance.
+        kind = TransactionKind.ADJUSTMENT
+    order_id = _child_text(elem, "AmazonOrderID")
+    merchant_order_id = _child_text(elem, "MerchantOrderID")
+    adjustment_id = _child_text(elem, "AdjustmentID")
+    shipment_id = _child_text(elem, "ShipmentID")
+    marketplace_name = _child_text(elem, "MarketplaceName")
+    posted = _child_text(elem, "PostedDate")
+
+    def _record(posted_date, sku, item_code, quantity, amount):
+        amount_type, description, value, currency = amount
+        return SettlementRecord(
+            settlement_id=settlement_id,
+            kind=kind,
+            transaction_type=transaction_type,
+            order_id=order_id,
+            merchant_order_id=merchant_order_id,
+            adjustment_id=adjustment_id,
+            shipment_id=shipment_id,
+            marketplace_name=marketplace_name,
+            posted_date=parse_date(posted_date),
+            sku=sku,
+            order_item_code=item_code,
+            quantity=int(quantity) if quantity else None,
+            amount_type=amount_type or transaction_type,
+            amount_description=description,
+            amount=value,
+            currency=currency or default_currency,
+        )
+
+    for child in elem:
+        child_tag = local_tag(child.tag)
+        if child_tag == "Fulfillment":
+            fulfillment_posted = _child_text(child, "PostedDate") or posted
+            for item in child:
+                if local_tag(item.tag) not in _XML_ITEM_TAGS:
+                    continue
+                sku = _child_text(item, "SKU")
+                item_code = _child_text(item, "AmazonOrderItemCode")
+                quantity = _child_text(item, "Quantity")
+                for group in item:
+                    if len(group):
+                        for amount in _amounts(group, local_tag(group.tag)):
+                            yield _record(
+                                fulfillment_posted, sku, item_code, quantity, amount
+                            )
+        elif child_tag == "Amount":
+            yield _record(
+                posted,
+                _child_text(elem, "SKU"),
+                None,
+                _child_text(elem, "Quantity"),
+                (
+                    None,
+                    transaction_type,
+                    parse_decimal(child.text),
+                    child.get("currency"),
+                ),
+            )
+        elif len(child):
+            for amount in _amounts(child, child_tag):
+                yield _record(
+                    posted,
+                    _child_text(elem, "SKU"),
+                    None,
+                    _child_text(elem, "Quantity"),
+                    amount,
+                )
+
+
+def iter_settlement_xml(source):
+    """Yields a :py:class:`SettlementRecord` for each amount in a
+    ``_GET_V2_SETTLEMENT_REPORT_DATA_XML_`` report.
+
+    ``source`` may be a binary file-like object, ``bytes``, an iterable of
+    ``bytes`` chunks, or a (preferably streamed) response object. Each transaction
+    element is discarded as soon as its records are produced, so memory use is
+    bounded by the size of a single transaction.
+    """
+    settlement_id = None
+    currency = None
+    report = None
+    report_depth = None
+    depth = 0
+    for event, elem in iterparse(_source_stream(source), events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if local_tag(elem.tag) == "SettlementReport":
+                report = elem
+                report_depth = depth
+            continue
+        depth -= 1
+        if report is None or depth != report_depth:
+            # Only direct children of <SettlementReport> are processed,
+            # once they are complete.
+            continue
+        tag = local_tag(elem.tag)
+        if tag == "SettlementData":
+            settlement_id = _child_text(elem, "AmazonSettlementID")
+            for child in elem:
+                if local_tag(child.tag) == "TotalAmount":
+                    currency = child.get("currency")
+        elif tag in _XML_TRANSACTION_TYPES:
+            yield from _xml_transaction_records(elem, settlement_id, currency)
+        # Drop the processed element from the tree to keep memory flat.
+        report.remove(elem)
+
+
+### Flat files ###
+_V1_AMOUNT_COLUMNS = (
+    # (amount column, type column, amount_type)
+    ("price-amount", "price-type", "ItemPrice"),
+    ("item-related-fee-amount", "item-related-fee-type", "ItemFees"),
+    ("shipment-fee-amount", "shipment-fee-type", "ShipmentFees"),
+    ("order-fee-amount", "order-fee-type", "OrderFees"),
+    ("promotion-amount", "promotion-type", "Promotion"),
+    ("direct-payment-amount", "direct-payment-type", "DirectPayment"),
+    ("misc-fee-amount", None, "MiscFee"),
+    ("other-fee-amount", "other-fee-reason-description", "OtherFee"),
+    ("other-amount", None, "Other"),
+)
+
+
+def iter_settlement_flat_file(source, encoding=None, marketplace=None):
+    """Yields a :py:class:`SettlementRecord` for each amount in a settlement
+    flat file report, either ``_GET_V2_SETTLEMENT_REPORT_DATA_FLAT_FILE_``
+    (one column per kind of amount) or
+    ``_GET_V2_SETTLEMENT_REPORT_DATA_FLAT_FILE_V2_`` (one amount per row).
+    The format is detected from the header.
+
+    The summary row at the top of the report only sets the settlement ID and
+    currency for the records that follow. ``encoding`` and ``marketplace``
+    are passed to :py:class:`FlatFileReader <mws.utils.flatfile.FlatFileReader>`.
+    """
+    reader = FlatFileReader(
+        _source_stream(source), encoding=encoding, marketplace=marketplace
+    )
+    header = reader.read_header()
+    if "amount-type" in header:
+        report_type = ReportType.SETTLEMENT_V2_FLATFILE
+    else:
+        report_type = ReportType.SETTLEMENT_FLATFILE
+    reader.column_types = {}
+    index = {name: idx for idx, name in enumerate(header)}
+
+    def _get(row, name):
+        idx = index.get(name)
+        if idx is None or idx >= len(row):
+            return None
+        return row[idx] or None
+
+    currency = None
+    for row in reader:
+        transaction_type = _get(row, "transaction-type")
+        if transaction_type is None:
+            # Summary row: no transaction, just totals for the settlement.
+            currency = _get(row, "currency") or currency
+            continue
+        quantity = _get(row, "quantity-purchased")
+        base = dict(
+            settlement_id=_get(row, "settlement-id"),
+            kind=transaction_kind(transaction_type),
+            transaction_type=transaction_type,
+            order_id=_get(row, "order-id"),
+            merchant_order_id=_get(row, "merchant-order-id"),
+            adjustment_id=_get(row, "adjustment-id"),
+            shipment_id=_get(row, "shipment-id"),
+            marketplace_name=_get(row, "marketplace-name"),
+            posted_date=parse_date(
+                _get(row, "posted-date-time") or _get(row, "posted-date")
+            ),
+            sku=_get(row, "sku"),
+            order_item_code=_get(row, "order-item-code"),
+            quantity=int(quantity) if quantity else None,
+            currency=_get(row, "currency") or currency,
+        )
+        if report_type == ReportType.SETTLEMENT_V2_FLATFILE:
+            amount = parse_decimal(_get(row, "amount"))
+            if amount is None:
+                continue
+            yield SettlementRecord(
+                amount_type=_get(row, "amount-type"),
+                amount_description=_get(row, "amount-description"),
+                amount=amount,
+                **base,
+            )
+            continue
+        for amount_column, type_column, amount_type in _V1_AMOUNT_COLUMNS:
+            amount = parse_decimal(_get(row, amount_column))
+            if amount is None:
+                continue
+            yield SettlementRecord(
+                amount_type=amount_type,
+                amount_description=(_get(row, type_column) if type_column else None)
+                or amount_type,
+                amount=amount,
+                **base,
+            )
+
+
+def iter_settlement_records(source, report_type, **kwargs):
+    """Yields :py:class:`SettlementRecord` objects from a settlement report of
+    the given ``report_type``, dispatching to :py:func:`iter_settlement_xml` or
+    :py:func:`iter_settlement_flat_file`.
+
+    For example, streaming a settlement report straight from MWS:
+
+    .. code-block:: python
+
+        response = reports_api.get_report(report_id, stream=True)
+        for record in iter_settlement_records(response, ReportType.SETTLEMENT_V2_XML):
+            ...
+    """
+    report_type = ReportType(getattr(report_type, "value", report_type))
+    if report_type == ReportType.SETTLEMENT_V2_XML:
+        return iter_settlement_xml(source)
+    if report_type in (
+        ReportType.SETTLEMENT_FLATFILE,
+        ReportType.SETTLEMENT_V2_FLATFILE,
+    ):
+        return iter_settlement_flat_file(source, **kwargs)
+    raise ValueError(f"{report_type.value} is not a settlement report type.")
@@ -0,0 +1,98 @@
+"""Utilities for working with streamed response content."""
+
+import hashlib
+import io
+from base64 import b64encode
+
+STREAM_CHUNK_SIZE = 64 * 1024
+"""Default number of bytes to read from a response at a time when streaming."""
+
+
+class ChunkStream(io.RawIOBase):
+    """Read-only, binary file-like object wrapping an iterable of ``bytes`` chunks,
+    such as the output of ``requests.Response.iter_content()``.
+
+    Only one chunk is held in memory at a time, so the wrapped content can be
+    handed to any consumer expecting a file (``io.TextIOWrapper``,
+    ``ElementTree.iterparse``, etc.) without first loading it in full.
+
+    The MD5 hash of all content read is calculated along the way. If
+    ``expected_md5`` is provided (typically the value of a "Content-MD5" header),
+    the hash is verified once the stream is exhausted, raising ``ValueError``
+    on a mismatch.
+    """
+
+    def __init__(self, chunks, expected_md5=None):
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._buffer = b""
+        self._md5 = hashlib.md5()  # nosec This hash is not used for password encryption
+        self._exhausted = False
+        self.expected_md5 = expected_md5
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._buffer:
+            if self._exhausted:
+                return 0
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._exhausted = True
+                self._verify_md5()
+                return 0
+            self._md5.update(chunk)
+            self.bytes_read += len(chunk)
+            self._buffer = chunk
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    @property
+    def md5(self):
+        """Base64-encoded MD5 hash of the content read so far, matching the format
+        of :py:func:`calc_md5 <mws.utils.crypto.calc_md5>`.
+        """
+        return b64encode(self._md5.digest())
+
+    def _verify_md5(self):
+        if self.expected_md5 is None:
+            return
+        expected = self.expected_md5
+        if isinstance(expected, str):
+            expected = expected.encode()
+        if expected.strip() != self.md5:
+            raise ValueError(
+                "MD5 hash validation failed: wrong content length for response"
+            )
+
+
+def response_stream(response, chunk_size=STREAM_CHUNK_SIZE):
+    """Returns a :py:class:`ChunkStream` reading the content of ``response``,
+    which may be either a ``requests.Response`` or an ``MWSResponse``.
+
+    The response's "Content-MD5" header, if present, is checked when the stream
+    is exhausted.
+    """
+    original = getattr(response, "original", response)
+    return ChunkStream(
+        original.iter_content(chunk_size=chunk_size),
+        expected_md5=original.headers.get("content-md5"),
+    )
+
+
+def as_binary_stream(source):
+    """Coerces ``source`` to a readable binary file-like object.
+
+    ``source`` may be a file-like object (returned unchanged), ``bytes``,
+    or an iterable of ``bytes`` chunks.
+    """
+    if hasattr(source, "read"):
+        return source
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return ChunkStream(source)
@@ -0,0 +1,134 @@
+"""Client-side request throttling, mirroring the quotas MWS enforces.
+
+MWS throttles each operation with a "leaky bucket": a maximum request quota
+that can be spent in a burst, refilled by one request every ``restore_rate``
+seconds. `MWS Docs: Throttling
+<https://docs.developer.amazonservices.com/en_US/dev_guide/DG_Throttling.html>`_
+"""
+
+import threading
+import time
+
+NEXT_TOKEN_SUFFIX = "ByNextToken"  # nosec This is not a password
+
+
+def throttle_action(action):
+    """Returns the Action name whose quota ``action`` counts against.
+
+    "...ByNextToken" operations share the quota of their parent operation.
+    """
+    if action.endswith(NEXT_TOKEN_SUFFIX):
+        return action[: -len(NEXT_TOKEN_SUFFIX)]
+    return action
+
+
+class Throttle:
+    """Thread-safe token bucket holding up to ``max_quota`` requests,
+    restoring one request every ``restore_rate`` seconds.
+    """
+
+    def __init__(self, max_quota, restore_rate, clock=time.monotonic, sleep=time.sleep):
+        if max_quota < 1:
+            raise ValueError("`max_quota` must be at least 1.")
+        self.max_quota = max_quota
+        self.restore_rate = restore_rate
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(max_quota)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}(max_quota={self.max_quota}, "
+            f"restore_rate={self.restore_rate})>"
+        )
+
+    def _refill(self):
+        now = self._clock()
+        if self.restore_rate > 0:
+            restored = (now - self._updated) / self.restore_rate
+            self._tokens = min(float(self.max_quota), self._tokens + restored)
+        else:
+            self._tokens = float(self.max_quota)
+        self._updated = now
+
+    def try_acquire(self):
+        """Takes a request from the bucket if one is available, returning ``True``;
+        otherwise returns ``False`` immediately.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        """Takes a request from the bucket, blocking until one is available.
+        Returns the number of seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) * self.restore_rate
+            self._sleep(wait)
+            waited += wait
+
+    @property
+    def available(self):
+        """Number of whole requests that can be made right now without waiting."""
+        with self._lock:
+            self._refill()
+            return int(self._tokens)
+
+
+class ThrottleRegistry:
+    """Thread-safe collection of :py:class:`Throttle` buckets, one per endpoint
+    and Action.
+
+    Buckets are created on first use from the limits supplied by the caller.
+    A registry can be shared between API instances acting for the same seller,
+    so that they draw on the same quotas. Quotas apply separately to each
+    endpoint (and so each region), so requests to different endpoints draw on
+    different buckets.
+    """
+
+    def __init__(self, clock=time.monotonic, sleep=time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self._throttles = {}
+        self._lock = threading.Lock()
+
+    def get(self, action, limits=None, endpoint=None):
+        """Returns the :py:class:`Throttle` for ``action`` at ``endpoint``,
+        creating it from ``limits`` (a tuple of ``(max_quota, restore_rate)``)
+        if needed.
+
+        Returns ``None`` if no bucket exists yet and ``limits`` is not provided.
+        """
+        key = (endpoint, throttle_action(action))
+        with self._lock:
+            throttle = self._throttles.get(key)
+            if throttle is None and limits is not None:
+                max_quota, restore_rate = limits
+                throttle = Throttle(
+                    max_quota, restore_rate, clock=self._clock, sleep=self._sleep
+                )
+                self._throttles[key] = throttle
+            return throttle
+
+    def acquire(self, action, limits=None, endpoint=None):
+        """Blocks until a request for ``action`` at ``endpoint`` is available.
+        Actions with no known limits are not throttled.
+
+        Returns the number of seconds spent waiting.
+        """
+        throttle = self.get(action, limits, endpoint)
+        if throttle is None:
+            return 0.0
+        return throttle.acquire()
@@ -10,3 +10,39 @@ def mws_utc_now():
     if you want the true UTC datetime, just run `datetime.datetime.utcnow()`.
     """
     return datetime.datetime.utcnow().replace(microsecond=0)
+
+
+def date_windows(start, end, window):
+    """Splits the range from ``start`` to ``end`` into consecutive
+    ``(window_start, window_end)`` pairs, each spanning at most ``window``
+    (a ``datetime.timedelta``). The end of each window is the start of the next.
+
+    Example:
+      date_windows(datetime.date(2020, 1, 1), datetime.date(2020, 1, 10), datetime.timedelta(days=4))
+    Returns:
+      [(date(2020, 1, 1), date(2020, 1, 5)),
+       (date(2020, 1, 5), date(2020, 1, 9)),
+       (date(2020, 1, 9), date(2020, 1, 10))]
+    """
+    if window <= datetime.timedelta(0):
+        raise ValueError("`window` must be a positive timedelta.")
+    if end < start:
+        raise ValueError("`end` must not be earlier than `start`.")
+    windows = []
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + window, end)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+
+def as_utc(value):
+    """Returns ``value`` (a date or datetime) as an aware UTC datetime, assuming
+    naive values are UTC and taking dates as midnight UTC.
+    """
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
@@ -26,6 +26,43 @@ def remove_xml_namespaces(data):
     return re.sub(pattern, replacement, data)
 
 
+def local_tag(tag):
+    """Strips the namespace from an ElementTree element tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def as_list(node):
+    """Returns a parsed node that may hold one item or a list of items as a list:
+    parsed XML only makes a list of an element repeated more than once.
+    """
+    if node is None:
+        return []
+    if isinstance(node, list):
+        return node
+    return [node]
+
+
+def element_to_dict(elem):
+    """Converts a small ElementTree element to nested dicts, in the shape produced
+    by ``mws_xml_to_dict``: repeated tags become lists, and leaves become text.
+    Attributes are ignored.
+    """
+    children = list(elem)
+    if not children:
+        return elem.text
+    node = {}
+    for child in children:
+        key = local_tag(child.tag)
+        value = element_to_dict(child)
+        if key not in node:
+            node[key] = value
+        elif isinstance(node[key], list):
+            node[key].append(value)
+        else:
+            node[key] = [node[key], value]
+    return node
+
+
 def mws_xml_to_dict(data, encoding=MWS_ENCODING, force_cdata=False, **kwargs):
     """Convert XML expected from MWS to a Python dict.
     Extracts namespaces and passes data into `xmltodict.parse`
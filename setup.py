@@ -20,6 +20,12 @@ install_requires = [
 ]
 
 ## Extras ##
+# Columnar exports of reports and list responses (see `mws.utils.columnar`)
+extras_require_columnar = [
+    "numpy",
+    "pyarrow",
+]
+
 # Development tools
 extras_require_dev = [
     # pre-commit hooks to ensure code quality before committing.
@@ -47,10 +53,11 @@ docs_requirements = BASE_DIR / "docs" / "requirements.txt"
 extras_require_docs = docs_requirements.read_text().strip().split("\n")
 
 extras_require = {
+    "columnar": extras_require_columnar,
     "develop": extras_require_dev,
     "docs": extras_require_docs,
     # Combine all extras into a shorthand 'all' for convenience
-    "all": extras_require_dev + extras_require_docs,
+    "all": extras_require_columnar + extras_require_dev + extras_require_docs,
 }
 
 setuptools.setup(
@@ -65,6 +72,8 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     packages=setuptools.find_packages(
         exclude=[
+            "benchmarks",
+            "benchmarks.*",
             "tests",
             "tests.*",
         ]
@@ -0,0 +1,167 @@
+"""Tests for bulk request helpers on the Feeds API."""
+
+import re
+import threading
+
+import pytest
+
+from mws import Feeds
+from mws.apis.feeds import SplitFeedError
+
+from ..conftest import stream_response, xml_response
+
+SUBMIT_FEED_XML = """<?xml version="1.0"?>
+<SubmitFeedResponse xmlns="http://mws.amazonaws.com/doc/2009-01-01/">
+  <SubmitFeedResult>
+    <FeedSubmissionInfo>
+      <FeedSubmissionId>{feed_id}</FeedSubmissionId>
+      <FeedProcessingStatus>_SUBMITTED_</FeedProcessingStatus>
+    </FeedSubmissionInfo>
+  </SubmitFeedResult>
+</SubmitFeedResponse>
+"""
+
+SUBMISSION_LIST_XML = """<?xml version="1.0"?>
+<GetFeedSubmissionListResponse xmlns="http://mws.amazonaws.com/doc/2009-01-01/">
+  <GetFeedSubmissionListResult>{infos}</GetFeedSubmissionListResult>
+</GetFeedSubmissionListResponse>
+"""
+
+SUBMISSION_INFO_XML = """
+    <FeedSubmissionInfo>
+      <FeedSubmissionId>{feed_id}</FeedSubmissionId>
+      <FeedProcessingStatus>{status}</FeedProcessingStatus>
+    </FeedSubmissionInfo>"""
+
+PROCESSING_REPORT_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<AmazonEnvelope>
+  <Message>
+    <MessageID>1</MessageID>
+    <ProcessingReport>
+      <StatusCode>Complete</StatusCode>
+      <Result>
+        <MessageID>2</MessageID>
+        <ResultCode>Error</ResultCode>
+      </Result>
+    </ProcessingReport>
+  </Message>
+</AmazonEnvelope>
+"""
+
+
+class FakeFeeds(Feeds):
+    """Feeds API keeping submitted feeds in ``feeds``, keyed by FeedSubmissionId,
+    with their processing status in ``statuses``.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.feeds = {}
+        self.statuses = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        with self.lock:
+            self.requests.append((action, params))
+        if action == "SubmitFeed":
+            content = kwargs["body"].read().decode("utf-8")
+            if "FAIL" in content:
+                raise RuntimeError("Request is throttled")
+            with self.lock:
+                feed_id = str(len(self.feeds) + 1)
+                self.feeds[feed_id] = content
+                self.statuses[feed_id] = "_SUBMITTED_"
+            return xml_response(SUBMIT_FEED_XML.format(feed_id=feed_id), action)
+        if action == "GetFeedSubmissionList":
+            feed_ids = [
+                value
+                for key, value in params.items()
+                if key.startswith("FeedSubmissionIdList.Id.")
+            ]
+            infos = "".join(
+                SUBMISSION_INFO_XML.format(
+                    feed_id=feed_id, status=self.statuses[feed_id]
+                )
+                for feed_id in feed_ids
+            )
+            return xml_response(SUBMISSION_LIST_XML.format(infos=infos), action)
+        if action == "GetFeedSubmissionResult":
+            return stream_response(PROCESSING_REPORT_XML.encode("utf-8"))
+        raise AssertionError(f"Unexpected action {action}")
+
+
+def pricing_feed(count):
+    messages = "".join(
+        f"<Message><MessageID>{n}</MessageID><Price><SKU>SKU-{n}</SKU></Price></Message>"
+        for n in range(1, count + 1)
+    )
+    return (
+        '<?xml version="1.0"?><AmazonEnvelope><Header><MerchantIdentifier>seller'
+        "</MerchantIdentifier></Header><MessageType>Price</MessageType>"
+        f"{messages}</AmazonEnvelope>"
+    ).encode("utf-8")
+
+
+def test_submit_split_feed(mws_credentials):
+    api = FakeFeeds(**mws_credentials)
+    submission = api.submit_split_feed(
+        pricing_feed(25),
+        "_POST_PRODUCT_PRICING_DATA_",
+        max_messages=10,
+        marketplace_ids=["ATVPDKIKX0DER"],
+    )
+
+    assert sorted(submission.feed_submission_ids) == ["1", "2", "3"]
+    assert sum(submission.message_counts.values()) == 25
+    assert not submission.done
+    for action, params in api.requests:
+        assert params["MarketplaceIdList.Id.1"] == "ATVPDKIKX0DER"
+    skus = sorted(
+        sku
+        for content in api.feeds.values()
+        for sku in re.findall(r"<SKU>(.*?)</SKU>", content)
+    )
+    assert skus == sorted(f"SKU-{n}" for n in range(1, 26))
+
+    # Parts keep the order of the original feed.
+    last_part = submission.feed_submission_ids[-1]
+    assert submission.message_counts[last_part] == 5
+    assert submission.source_message_id(last_part, 2) == 22
+
+    api.statuses.update({"1": "_DONE_", "2": "_DONE_", "3": "_IN_PROGRESS_"})
+    assert submission.poll() == {"1": "_DONE_", "2": "_DONE_", "3": "_IN_PROGRESS_"}
+    assert not submission.done
+    reports = submission.processing_reports()
+    assert sorted(reports) == ["1", "2"]
+    assert reports["1"].failed_message_ids() == [2]
+
+    api.requests.clear()
+    api.statuses["3"] = "_DONE_"
+    submission.poll()
+    assert submission.done
+    # Only parts still processing are checked.
+    ((_, params),) = api.requests
+    assert params["FeedSubmissionIdList.Id.1"] == "3"
+
+
+def test_submit_split_feed_partial_failure(mws_credentials):
+    api = FakeFeeds(**mws_credentials)
+    feed = pricing_feed(25).replace(b"SKU-15<", b"FAIL<")
+    with pytest.raises(SplitFeedError) as exc:
+        api.submit_split_feed(feed, "_POST_PRODUCT_PRICING_DATA_", max_messages=10)
+
+    # The parts that were submitted can still be tracked.
+    submission = exc.value.submission
+    assert sorted(submission.feed_submission_ids) == ["1", "2"]
+    assert sum(submission.message_counts.values()) == 15
+    assert exc.value.failed_message_ids == list(range(11, 21))
+    assert [type(error) for error in exc.value.errors] == [RuntimeError]
+    assert isinstance(exc.value.__cause__, RuntimeError)
+
+
+def test_submit_split_feed_rejects_purge(mws_credentials):
+    with pytest.raises(ValueError):
+        FakeFeeds(**mws_credentials).submit_split_feed(
+            pricing_feed(2), "_POST_PRODUCT_PRICING_DATA_", purge=True
+        )
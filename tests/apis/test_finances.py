@@ -0,0 +1,154 @@
+"""Tests for streaming helpers on the Finances API."""
+
+import datetime
+import threading
+
+from mws import Finances
+
+from ..conftest import stream_response
+
+EVENTS_XML = """<?xml version="1.0"?>
+<{action}Response xmlns="http://mws.amazonservices.com/Finances/2015-05-01">
+  <{action}Result>
+    {next_token}
+    <FinancialEvents>
+      <ShipmentEventList>{events}</ShipmentEventList>
+    </FinancialEvents>
+  </{action}Result>
+</{action}Response>
+"""
+
+EVENT_XML = """
+        <ShipmentEvent>
+          <AmazonOrderId>{order_id}</AmazonOrderId>
+          <ShipmentItemList>
+            <ShipmentItem>
+              <ItemChargeList>
+                <ChargeComponent>
+                  <ChargeType>Principal</ChargeType>
+                  <ChargeAmount>
+                    <CurrencyCode>USD</CurrencyCode>
+                    <CurrencyAmount>10.0</CurrencyAmount>
+                  </ChargeAmount>
+                </ChargeComponent>
+              </ItemChargeList>
+            </ShipmentItem>
+          </ShipmentItemList>
+        </ShipmentEvent>"""
+
+
+def utc(*args):
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc)
+
+
+class FakeFinances(Finances):
+    """Finances API answering ListFinancialEvents from memory: ``pages`` maps the
+    PostedAfter date of each window to a list of pages of order IDs.
+    """
+
+    def __init__(self, pages, **kwargs):
+        super().__init__(**kwargs)
+        self.pages = pages
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        assert kwargs["stream"] is True
+        with self.lock:
+            self.requests.append((action, params))
+        if action == "ListFinancialEvents":
+            key, page = params["PostedAfter"].date().isoformat(), 0
+        else:
+            key, page = params["NextToken"].split("/")
+            page = int(page)
+        pages = self.pages[key]
+        next_token = ""
+        if page + 1 < len(pages):
+            next_token = f"<NextToken>{key}/{page + 1}</NextToken>"
+        events = "".join(
+            EVENT_XML.format(order_id=order_id) for order_id in pages[page]
+        )
+        xml = EVENTS_XML.format(action=action, events=events, next_token=next_token)
+        return stream_response(xml.encode("utf-8"))
+
+
+def test_iter_financial_events_partitions_and_follows_pages(mws_credentials):
+    api = FakeFinances(
+        {
+            "2020-01-01": [["111-1", "111-2"], ["111-3"]],
+            "2020-01-02": [[]],
+            "2020-01-03": [["111-4"]],
+        },
+        **mws_credentials,
+    )
+    records = api.iter_financial_events(
+        datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 3, 12)
+    )
+    assert sorted(record.amazon_order_id for record in records) == [
+        "111-1",
+        "111-2",
+        "111-3",
+        "111-4",
+    ]
+    windows = sorted(
+        (params["PostedAfter"], params["PostedBefore"])
+        for action, params in api.requests
+        if action == "ListFinancialEvents"
+    )
+    # Naive bounds are taken as UTC.
+    assert windows == [
+        (utc(2020, 1, 1), utc(2020, 1, 2)),
+        (utc(2020, 1, 2), utc(2020, 1, 3)),
+        (utc(2020, 1, 3), utc(2020, 1, 3, 12)),
+    ]
+    assert [action for action, _ in api.requests].count(
+        "ListFinancialEventsByNextToken"
+    ) == 1
+
+
+def _windows(api):
+    return sorted(
+        (params["PostedAfter"], params["PostedBefore"])
+        for action, params in api.requests
+        if action == "ListFinancialEvents"
+    )
+
+
+def test_iter_financial_events_date_and_aware_bounds(mws_credentials):
+    api = FakeFinances(
+        {"2020-01-01": [["111-1"]], "2020-01-02": [["111-2"]]}, **mws_credentials
+    )
+    paris = datetime.timezone(datetime.timedelta(hours=1))
+    records = api.iter_financial_events(
+        datetime.date(2020, 1, 1), datetime.datetime(2020, 1, 2, 13, tzinfo=paris)
+    )
+    assert sorted(record.amazon_order_id for record in records) == ["111-1", "111-2"]
+    assert _windows(api) == [
+        (utc(2020, 1, 1), utc(2020, 1, 2)),
+        (utc(2020, 1, 2), utc(2020, 1, 2, 12)),
+    ]
+
+
+def test_iter_financial_events_default_end(monkeypatch, mws_credentials):
+    # An aware start is compared with the default end, two minutes before now.
+    monkeypatch.setattr(
+        "mws.apis.finances.mws_utc_now", lambda: datetime.datetime(2020, 1, 2, 0, 2)
+    )
+    api = FakeFinances({"2020-01-01": [["111-1"]]}, **mws_credentials)
+    records = list(api.iter_financial_events(utc(2020, 1, 1)))
+    assert [record.amazon_order_id for record in records] == ["111-1"]
+    assert _windows(api) == [(utc(2020, 1, 1), utc(2020, 1, 2))]
+
+
+def test_stream_financial_events_params_match_list(mws_credentials):
+    api = FakeFinances({"2020-01-01": [["111-1"]]}, **mws_credentials)
+    list(api.stream_financial_events(posted_after=utc(2020, 1, 1), max_results=20))
+    action, params = api.requests[0]
+    assert action == "ListFinancialEvents"
+    assert params == {
+        "FinancialEventGroupId": None,
+        "AmazonOrderId": None,
+        "PostedAfter": utc(2020, 1, 1),
+        "PostedBefore": None,
+        "MaxResultsPerPage": 20,
+    }
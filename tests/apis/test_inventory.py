@@ -0,0 +1,83 @@
+"""Tests for bulk request helpers on the Inventory API."""
+
+import threading
+
+from mws import Inventory
+
+from ..conftest import xml_response
+
+SUPPLY_XML = """<?xml version="1.0"?>
+<{action}Response xmlns="http://mws.amazonaws.com/FulfillmentInventory/2010-10-01/">
+  <{action}Result>
+    {next_token}
+    <InventorySupplyList>{members}</InventorySupplyList>
+  </{action}Result>
+</{action}Response>
+"""
+
+MEMBER_XML = """
+      <member>
+        <SellerSKU>{sku}</SellerSKU>
+        <InStockSupplyQuantity>{quantity}</InStockSupplyQuantity>
+      </member>"""
+
+
+class FakeInventory(Inventory):
+    """Inventory API answering ListInventorySupply for the SKUs in ``supply``,
+    a dict of SKU to quantity, returning up to ``page_size`` members per page.
+    """
+
+    def __init__(self, supply, page_size=20, **kwargs):
+        super().__init__(**kwargs)
+        self.supply = supply
+        self.page_size = page_size
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        with self.lock:
+            self.requests.append((action, params))
+        if action == "ListInventorySupply":
+            skus = [
+                value
+                for key, value in params.items()
+                if key.startswith("SellerSkus.member.")
+            ]
+            assert len(skus) <= 50
+            skus = [sku for sku in skus if sku in self.supply]
+        else:
+            skus = params["NextToken"].split(",")
+        page, rest = skus[: self.page_size], skus[self.page_size :]
+        next_token = f"<NextToken>{','.join(rest)}</NextToken>" if rest else ""
+        members = "".join(
+            MEMBER_XML.format(sku=sku, quantity=self.supply[sku]) for sku in page
+        )
+        xml = SUPPLY_XML.format(action=action, next_token=next_token, members=members)
+        return xml_response(xml, action)
+
+
+def test_get_inventory_supply_chunks_and_pages(mws_credentials):
+    supply = {f"SKU-{n}": n for n in range(120)}
+    api = FakeInventory(supply, **mws_credentials)
+    skus = [f"SKU-{n}" for n in reversed(range(130))] + ["SKU-5"]
+
+    result = api.get_inventory_supply(
+        skus, marketplace_id="ATVPDKIKX0DER", max_workers=3
+    )
+
+    # Unknown SKUs are left out; the rest keep the order they were given in.
+    assert list(result) == [f"SKU-{n}" for n in reversed(range(120))]
+    assert result["SKU-7"].InStockSupplyQuantity == "7"
+    actions = [action for action, _ in api.requests]
+    assert actions.count("ListInventorySupply") == 3
+    assert actions.count("ListInventorySupplyByNextToken") == 4
+    for action, params in api.requests:
+        if action == "ListInventorySupply":
+            assert params["MarketplaceId"] == "ATVPDKIKX0DER"
+            assert params["ResponseGroup"] == "Basic"
+
+
+def test_get_inventory_supply_empty(mws_credentials):
+    api = FakeInventory({}, **mws_credentials)
+    assert api.get_inventory_supply([]) == {}
+    assert api.requests == []
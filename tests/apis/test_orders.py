@@ -0,0 +1,141 @@
+"""Tests for bulk request helpers on the Orders API."""
+
+import threading
+import time
+
+from mws import Orders
+
+from ..conftest import xml_response
+
+LIST_ORDER_ITEMS_XML = """<?xml version="1.0"?>
+<{action}Response xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <{action}Result>
+    {next_token}
+    <AmazonOrderId>{order_id}</AmazonOrderId>
+    <OrderItems>{items}</OrderItems>
+  </{action}Result>
+</{action}Response>
+"""
+
+GET_ORDER_XML = """<?xml version="1.0"?>
+<GetOrderResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <GetOrderResult>
+    <Orders>{orders}</Orders>
+  </GetOrderResult>
+</GetOrderResponse>
+"""
+
+ORDER_XML = """
+      <Order>
+        <AmazonOrderId>{order_id}</AmazonOrderId>
+      </Order>"""
+
+ORDER_ITEM_XML = """
+      <OrderItem>
+        <OrderItemId>{item_id}</OrderItemId>
+        <SellerSKU>{sku}</SellerSKU>
+      </OrderItem>"""
+
+
+class FakeOrders(Orders):
+    """Orders API answering requests from memory.
+
+    ``order_items`` maps each AmazonOrderId to a list of pages of SKUs.
+    Requests for orders listed in ``slow`` are delayed.
+    """
+
+    def __init__(self, order_items=None, slow=(), **kwargs):
+        super().__init__(**kwargs)
+        self.order_items = order_items or {}
+        self.slow = slow
+        self.actions = []
+        self.lock = threading.Lock()
+
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        with self.lock:
+            self.actions.append(action)
+        if action == "GetOrder":
+            order_ids = [
+                value
+                for key, value in params.items()
+                if key.startswith("AmazonOrderId.Id.")
+            ]
+            assert len(order_ids) <= 50
+            # Orders come back in no particular order; unknown IDs are skipped.
+            orders = "".join(
+                ORDER_XML.format(order_id=order_id)
+                for order_id in sorted(order_ids)
+                if not order_id.startswith("missing")
+            )
+            return xml_response(GET_ORDER_XML.format(orders=orders), action)
+        if action == "ListOrderItems":
+            order_id, page = params["AmazonOrderId"], 0
+        elif action == "ListOrderItemsByNextToken":
+            order_id, page = params["NextToken"].split(":")
+            page = int(page)
+        else:
+            raise AssertionError(f"Unexpected action {action}")
+        if order_id in self.slow:
+            time.sleep(0.2)
+        pages = self.order_items[order_id]
+        items = "".join(
+            ORDER_ITEM_XML.format(item_id=f"{order_id}-{sku}", sku=sku)
+            for sku in pages[page]
+        )
+        next_token = ""
+        if page + 1 < len(pages):
+            next_token = f"<NextToken>{order_id}:{page + 1}</NextToken>"
+        xml = LIST_ORDER_ITEMS_XML.format(
+            action=action, order_id=order_id, items=items, next_token=next_token
+        )
+        return xml_response(xml, action)
+
+
+class TestIterOrderItems:
+    """Test cases covering ``Orders.iter_order_items``."""
+
+    order_items = {
+        "111-1": [["A"]],
+        "111-2": [["B", "C"], ["D"]],
+        "111-3": [[]],
+    }
+
+    def skus(self, results):
+        return {
+            order_id: [item.SellerSKU for item in items] for order_id, items in results
+        }
+
+    def test_follows_next_token_per_order(self, mws_credentials):
+        api = FakeOrders(self.order_items, **mws_credentials)
+        results = list(api.iter_order_items(["111-1", "111-2", "111-3"]))
+        assert self.skus(results) == {
+            "111-1": ["A"],
+            "111-2": ["B", "C", "D"],
+            "111-3": [],
+        }
+        assert api.actions.count("ListOrderItemsByNextToken") == 1
+
+    def test_yields_as_completed(self, mws_credentials):
+        api = FakeOrders(self.order_items, slow=("111-1",), **mws_credentials)
+        results = list(api.iter_order_items(["111-1", "111-2", "111-3"]))
+        assert results[-1][0] == "111-1"
+
+    def test_ordered(self, mws_credentials):
+        api = FakeOrders(self.order_items, slow=("111-1",), **mws_credentials)
+        results = api.iter_order_items(["111-1", "111-2", "111-3"], ordered=True)
+        assert [order_id for order_id, _ in results] == ["111-1", "111-2", "111-3"]
+
+
+def test_get_orders_chunks_and_dedupes(mws_credentials):
+    api = FakeOrders(**mws_credentials)
+    order_ids = [f"111-{idx:03d}" for idx in range(120, 0, -1)]
+    requested = order_ids + order_ids[:10] + ["missing-1"]
+    orders = api.get_orders(requested)
+    assert list(orders) == order_ids
+    assert orders["111-050"].AmazonOrderId == "111-050"
+    assert api.actions == ["GetOrder"] * 3
+
+
+def test_get_orders_single_order(mws_credentials):
+    orders = FakeOrders(**mws_credentials).get_orders(["111-1"])
+    assert list(orders) == ["111-1"]
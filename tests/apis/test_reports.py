@@ -1,9 +1,12 @@
 import datetime
+import threading
 
 import pytest
 
 from mws import Marketplaces, MWSError, Reports
+from mws.utils.flatfile import FlatFileReader
 
+from ..conftest import stream_response, xml_response
 from .common import APITestCase
 
 
@@ -405,3 +408,135 @@ class TestReportsAPI(ReportsAPITestCase):
             processing_statuses=processing_status,
         )
         assert params["ReportProcessingStatusList.Status.1"] == "_DONE_NO_DATA_"
+
+
+REQUEST_REPORT_XML = """<?xml version="1.0"?>
+<RequestReportResponse xmlns="http://mws.amazonaws.com/doc/2009-01-01/">
+  <RequestReportResult>
+    <ReportRequestInfo>
+      <ReportRequestId>{request_id}</ReportRequestId>
+      <ReportProcessingStatus>_SUBMITTED_</ReportProcessingStatus>
+    </ReportRequestInfo>
+  </RequestReportResult>
+</RequestReportResponse>
+"""
+
+REPORT_REQUEST_INFO_XML = """
+    <ReportRequestInfo>
+      <ReportRequestId>{request_id}</ReportRequestId>
+      <ReportProcessingStatus>{status}</ReportProcessingStatus>
+      {generated}
+    </ReportRequestInfo>"""
+
+GET_REPORT_REQUEST_LIST_XML = """<?xml version="1.0"?>
+<GetReportRequestListResponse xmlns="http://mws.amazonaws.com/doc/2009-01-01/">
+  <GetReportRequestListResult>
+    <HasNext>false</HasNext>{infos}
+  </GetReportRequestListResult>
+</GetReportRequestListResponse>
+"""
+
+
+class FakePartitionedReports(Reports):
+    """Reports API answering requests from memory. Each report request is for one
+    partition, identified by its start date; each partition moves to the next of
+    ``statuses`` every time its status is checked.
+    """
+
+    def __init__(self, partitions, statuses=("_DONE_",), **kwargs):
+        super().__init__(**kwargs)
+        self.partitions = partitions
+        self.statuses = statuses
+        self.checks = {}
+        self.actions = []
+        self.lock = threading.Lock()
+
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        with self.lock:
+            self.actions.append(action)
+        if action == "RequestReport":
+            request_id = params["StartDate"].isoformat()
+            return xml_response(
+                REQUEST_REPORT_XML.format(request_id=request_id), action
+            )
+        if action == "GetReportRequestList":
+            infos = []
+            for key, request_id in params.items():
+                if not key.startswith("ReportRequestIdList.Id."):
+                    continue
+                checks = self.checks.get(request_id, 0)
+                self.checks[request_id] = checks + 1
+                status = self.statuses[min(checks, len(self.statuses) - 1)]
+                if status == "_DONE_" and self.partitions[request_id] is None:
+                    status = "_DONE_NO_DATA_"
+                generated = ""
+                if status == "_DONE_":
+                    generated = f"<GeneratedReportId>R{request_id}</GeneratedReportId>"
+                infos.append(
+                    REPORT_REQUEST_INFO_XML.format(
+                        request_id=request_id, status=status, generated=generated
+                    )
+                )
+            xml = GET_REPORT_REQUEST_LIST_XML.format(infos="".join(infos))
+            return xml_response(xml, action)
+        if action == "GetReport":
+            assert kwargs["stream"] is True
+            return stream_response(self.partitions[params["ReportId"][1:]])
+        raise AssertionError(f"Unexpected action {action}")
+
+
+class TestPartitionedReport:
+    """Test cases covering ``Reports.iter_partitioned_report``."""
+
+    partitions = {
+        "2020-01-01": b"sku\tqty\r\nA\t1\r\nB\t2\r\n",
+        "2020-01-11": None,
+        "2020-01-21": b"sku\tqty\nC\t3",
+    }
+
+    def fetch(self, api, **kwargs):
+        return api.iter_partitioned_report(
+            Reports.ReportType.INVENTORY,
+            start_date=datetime.date(2020, 1, 1),
+            end_date=datetime.date(2020, 1, 25),
+            window=datetime.timedelta(days=10),
+            poll_interval=0,
+            **kwargs,
+        )
+
+    def test_partitions_merged_in_order(self, mws_credentials):
+        api = FakePartitionedReports(
+            self.partitions,
+            statuses=("_SUBMITTED_", "_IN_PROGRESS_", "_DONE_"),
+            **mws_credentials,
+        )
+        lines = list(self.fetch(api))
+        assert lines == [
+            b"sku\tqty\r\n",
+            b"A\t1\r\n",
+            b"B\t2\r\n",
+            b"C\t3\n",
+        ]
+        assert api.actions.count("RequestReport") == 3
+        assert api.actions.count("GetReport") == 2
+        # The instance passed in is left unthrottled.
+        assert api.throttle_requests is False
+
+    def test_partitions_read_by_flat_file_reader(self, mws_credentials):
+        api = FakePartitionedReports(self.partitions, **mws_credentials)
+        reader = FlatFileReader(self.fetch(api, ordered=False), records=True)
+        assert sorted(record.sku for record in reader) == ["A", "B", "C"]
+
+    def test_cancelled_partition_raises(self, mws_credentials):
+        api = FakePartitionedReports(
+            self.partitions, statuses=("_CANCELLED_",), **mws_credentials
+        )
+        with pytest.raises(MWSError):
+            list(self.fetch(api))
+
+    def test_timeout_raises(self, mws_credentials):
+        api = FakePartitionedReports(
+            self.partitions, statuses=("_IN_PROGRESS_",), **mws_credentials
+        )
+        with pytest.raises(MWSError):
+            list(self.fetch(api, timeout=0))
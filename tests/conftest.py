@@ -1,4 +1,5 @@
 import datetime
+import io
 
 import pytest
 from requests import Response
@@ -165,6 +166,26 @@ def mock_response(content):
     return response
 
 
+def xml_response(xml, action=None, result_key=None):
+    """Returns an ``MWSResponse`` for the XML document ``xml`` (a ``str``),
+    parsed from the result key of ``action`` (i.e. "ListOrdersResult"),
+    or from ``result_key`` if given.
+    """
+    if result_key is None and action is not None:
+        result_key = f"{action}Result"
+    return MWSResponse(mock_response(xml.encode(MWS_ENCODING)), result_key=result_key)
+
+
+def stream_response(content):
+    """Returns an ``MWSResponse`` for ``content`` (``bytes``), as requested
+    with ``stream=True``: its content is read from ``raw``, not loaded up front.
+    """
+    response = Response()
+    response.raw = io.BytesIO(content)
+    response.status_code = 200
+    return MWSResponse(response, stream=True)
+
+
 @pytest.fixture
 def create_inbound_shipment_plan_dummy_response(create_inbound_shipment_plan_dummy_xml):
     content = create_inbound_shipment_plan_dummy_xml.encode(MWS_ENCODING)
@@ -0,0 +1,132 @@
+"""Testing for the record/replay cassette in ``mws.contrib.cassette``."""
+
+import datetime
+import zipfile
+
+import pytest
+from requests import Response
+
+from mws import MWSError, Orders
+from mws.contrib.cassette import Cassette, CassetteMiss
+from mws.utils.streams import response_stream
+from mws.utils.xml import MWS_ENCODING
+
+STATUS_XML = """<?xml version="1.0"?>
+<GetServiceStatusResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <GetServiceStatusResult>
+    <Status>{status}</Status>
+  </GetServiceStatusResult>
+</GetServiceStatusResponse>
+"""
+
+
+class FakeSession:
+    """Stands in for ``requests.Session``, answering each request with the next status."""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.requests = []
+
+    def request(self, **kwargs):
+        self.requests.append(kwargs)
+        response = Response()
+        response._content = STATUS_XML.format(status=self.statuses.pop(0)).encode(
+            MWS_ENCODING
+        )
+        response.encoding = MWS_ENCODING
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers["Content-Type"] = "text/xml"
+        response.elapsed = datetime.timedelta(seconds=0.25)
+        return response
+
+
+def orders_api(cassette, access_key="access", auth_token="token"):
+    api = Orders(
+        access_key, "secret", "seller", auth_token=auth_token, session=cassette
+    )
+    api._use_feature_mwsresponse = True
+    return api
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """Path of a cassette recording two ``GetServiceStatus`` requests."""
+    path = tmp_path / "orders.zip"
+    with Cassette(path, mode="record", session=FakeSession("GREEN", "RED")) as cassette:
+        api = orders_api(cassette)
+        api.get_service_status()
+        api.get_service_status()
+    return path
+
+
+def test_record_sends_through_session(tmp_path):
+    session = FakeSession("GREEN")
+    cassette = Cassette(tmp_path / "orders.zip", mode="record", session=session)
+    response = orders_api(cassette).get_service_status()
+    assert response.parsed.Status == "GREEN"
+    assert len(session.requests) == 1
+    assert len(cassette) == 1
+    assert cassette.interactions[0].action == "GetServiceStatus"
+    assert cassette.interactions[0].elapsed == 0.25
+    assert not (tmp_path / "orders.zip").exists()
+
+
+def test_archive_leaves_out_credentials(recording):
+    with zipfile.ZipFile(recording) as archive:
+        index = archive.read("cassette.json").decode()
+    assert "GetServiceStatus" in index
+    assert "access" not in index
+    assert "token" not in index
+
+
+def test_replay(recording):
+    # Other credentials and timestamps still match the recorded requests.
+    cassette = Cassette(recording)
+    api = orders_api(cassette, access_key="other", auth_token="other")
+    assert len(cassette) == 2
+    response = api.get_service_status()
+    assert response.parsed.Status == "GREEN"
+    assert response.headers["content-type"] == "text/xml"
+    # Recorded responses are replayed in turn, then the last one repeats.
+    assert api.get_service_status().parsed.Status == "RED"
+    assert api.get_service_status().parsed.Status == "RED"
+
+
+def test_replay_miss(recording):
+    api = orders_api(Cassette(recording))
+    with pytest.raises(CassetteMiss) as exc:
+        api.list_orders(marketplace_ids=["ATVPDKIKX0DER"], created_after="2020-01-01")
+    assert isinstance(exc.value, MWSError)
+    assert "ListOrders" in str(exc.value)
+
+
+def test_replay_streamed(recording):
+    response = orders_api(Cassette(recording)).make_request(
+        "GetServiceStatus", stream=True
+    )
+    assert b"GREEN" in response_stream(response, chunk_size=16).read()
+
+
+@pytest.mark.parametrize(
+    "latency, expected",
+    [
+        (None, []),
+        (0.1, [0.1, 0.1]),
+        ("recorded", [0.25, 0.25]),
+        (lambda interaction: len(interaction.action), [16, 16]),
+    ],
+)
+def test_replay_latency(recording, latency, expected):
+    delays = []
+    cassette = Cassette(recording, latency=latency, sleep=delays.append)
+    api = orders_api(cassette)
+    api.get_service_status()
+    response = api.get_service_status()
+    assert delays == expected
+    assert response.elapsed.total_seconds() == (expected[-1] if expected else 0)
+
+
+def test_invalid_mode(tmp_path):
+    with pytest.raises(ValueError):
+        Cassette(tmp_path / "orders.zip", mode="rewind")
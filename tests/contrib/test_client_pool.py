@@ -0,0 +1,155 @@
+"""Testing for the seller client pool in ``mws.contrib.client_pool``."""
+
+import pytest
+from requests import Response
+
+from mws import MWSResponse, Orders, Reports
+from mws.contrib.client_pool import ClientPool
+from mws.utils.xml import MWS_ENCODING
+
+STATUS_XML = """<?xml version="1.0"?>
+<GetServiceStatusResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <GetServiceStatusResult>
+    <Status>GREEN</Status>
+  </GetServiceStatusResult>
+</GetServiceStatusResponse>
+"""
+
+
+class FakeSession:
+    """Stands in for ``requests.Session``, recording the requests sent through it."""
+
+    def __init__(self):
+        self.requests = []
+
+    def request(self, **kwargs):
+        self.requests.append(kwargs)
+        response = Response()
+        response._content = STATUS_XML.encode(MWS_ENCODING)
+        response.encoding = MWS_ENCODING
+        response.status_code = 200
+        return response
+
+
+class FakeOrders(Orders):
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        if self.account_id == "BROKEN":
+            raise RuntimeError("Access denied")
+        return (self.account_id, action)
+
+
+@pytest.fixture
+def pool():
+    pool = ClientPool()
+    pool.add_account("S1", "access", "secret", auth_token="token-1")
+    pool.add_account("S2", "access", "secret", region="CA")
+    yield pool
+    pool.close()
+
+
+def test_make_request_uses_session(mws_credentials):
+    session = FakeSession()
+    api = Orders(session=session, **mws_credentials)
+    api._use_feature_mwsresponse = True
+    response = api.get_service_status()
+    assert isinstance(response, MWSResponse)
+    assert response.parsed.Status == "GREEN"
+    assert len(session.requests) == 1
+    assert session.requests[0]["url"] == api.endpoint
+    assert session.requests[0]["data"]["Action"] == "GetServiceStatus"
+
+
+def test_accounts(pool):
+    assert len(pool) == 2
+    assert "S1" in pool
+    assert pool.seller_ids == ["S1", "S2"]
+    assert pool.account("S2").region == "CA"
+    with pytest.raises(KeyError):
+        pool.account("S3")
+    with pytest.raises(ValueError):
+        pool.add_account("S3", "access", "secret", region="XX")
+
+
+def test_clients_are_built_lazily_and_cached(pool):
+    orders = pool.client("S1", Orders)
+    assert orders is pool.client("S1", Orders)
+    assert orders is pool.client("S1", Orders, region="US")
+    assert orders.account_id == "S1"
+    assert orders.auth_token == "token-1"
+    assert orders.throttle_requests is True
+    assert pool.client("S1", Orders, region="UK").domain == (
+        "https://mws-eu.amazonservices.com"
+    )
+    assert pool.client("S2", Orders).domain == "https://mws.amazonservices.ca"
+    assert pool.client("S1", Reports) is not orders
+
+
+def test_sessions_are_shared_per_endpoint(pool):
+    pool.add_account("S3", "access", "secret")
+    s1_orders = pool.client("S1", Orders)
+    assert s1_orders.session is pool.client("S1", Reports).session
+    assert s1_orders.session is pool.client("S3", Orders).session
+    assert s1_orders.session is not pool.client("S2", Orders).session
+
+
+def test_throttles_are_kept_per_seller(pool):
+    pool.add_account("S3", "access", "secret")
+    s1_orders = pool.client("S1", Orders)
+    assert s1_orders.throttles is not pool.client("S3", Orders).throttles
+    # One registry per seller, keeping buckets per endpoint and action.
+    assert s1_orders.throttles is pool.client("S1", Reports).throttles
+    de_orders = pool.client("S1", Orders, region="DE")
+    uk_orders = pool.client("S1", Orders, region="UK")
+    assert de_orders.throttles is uk_orders.throttles is s1_orders.throttles
+    limits = Orders.THROTTLE_LIMITS["ListOrders"]
+
+    def bucket(api):
+        return api.throttles.get("ListOrders", limits, api.endpoint)
+
+    assert bucket(de_orders) is bucket(uk_orders)
+    assert bucket(de_orders) is not bucket(s1_orders)
+    # Clients rebuilt for new credentials keep drawing on the same quotas.
+    pool.add_account("S1", "access", "new-secret")
+    assert pool.client("S1", Orders).throttles is s1_orders.throttles
+
+
+def test_throttle_in_api_kwargs():
+    with ClientPool(throttle=False) as pool:
+        pool.add_account("S1", "access", "secret")
+        assert pool.client("S1", Orders).throttle_requests is False
+
+
+def test_replacing_and_removing_accounts(pool):
+    orders = pool.client("S1", Orders)
+    pool.add_account("S1", "access", "secret", auth_token="token-2")
+    replaced = pool.client("S1", Orders)
+    assert replaced is not orders
+    assert replaced.auth_token == "token-2"
+
+    pool.remove_account("S1")
+    assert "S1" not in pool
+    with pytest.raises(KeyError):
+        pool.client("S1", Orders)
+
+
+def test_fan_out(pool):
+    pool.add_account("BROKEN", "access", "secret")
+    outcomes = list(
+        pool.fan_out(FakeOrders, lambda api: api.get_service_status(), ordered=True)
+    )
+    assert [outcome.seller_id for outcome in outcomes] == ["S1", "S2", "BROKEN"]
+    assert outcomes[0].ok
+    assert outcomes[0].result == ("S1", "GetServiceStatus")
+    assert outcomes[1].result == ("S2", "GetServiceStatus")
+    assert not outcomes[2].ok
+    assert outcomes[2].result is None
+    assert isinstance(outcomes[2].error, RuntimeError)
+
+
+def test_fan_out_subset_of_sellers(pool):
+    outcomes = list(
+        pool.fan_out(
+            FakeOrders, lambda api: api.get_service_status(), seller_ids=["S2"]
+        )
+    )
+    assert [outcome.result for outcome in outcomes] == [("S2", "GetServiceStatus")]
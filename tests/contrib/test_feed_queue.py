@@ -0,0 +1,257 @@
+"""Testing for the feed batching queue in ``mws.contrib.feed_queue``."""
+
+import re
+
+import pytest
+
+from mws import Feeds
+from mws.contrib.feed_queue import FeedQueue, FeedUpdateStatus
+
+from ..conftest import TEST_MWS_ACCOUNT_ID, stream_response, xml_response
+
+INVENTORY = "_POST_INVENTORY_AVAILABILITY_DATA_"
+PRICING = "_POST_PRODUCT_PRICING_DATA_"
+
+SUBMIT_FEED_XML = """<?xml version="1.0"?>
+<SubmitFeedResponse xmlns="http://mws.amazonaws.com/doc/2009-01-01/">
+  <SubmitFeedResult>
+    <FeedSubmissionInfo>
+      <FeedSubmissionId>{feed_id}</FeedSubmissionId>
+      <FeedType>{feed_type}</FeedType>
+      <FeedProcessingStatus>_SUBMITTED_</FeedProcessingStatus>
+    </FeedSubmissionInfo>
+  </SubmitFeedResult>
+</SubmitFeedResponse>
+"""
+
+SUBMISSION_LIST_XML = """<?xml version="1.0"?>
+<GetFeedSubmissionListResponse xmlns="http://mws.amazonaws.com/doc/2009-01-01/">
+  <GetFeedSubmissionListResult>{infos}</GetFeedSubmissionListResult>
+</GetFeedSubmissionListResponse>
+"""
+
+SUBMISSION_INFO_XML = """
+    <FeedSubmissionInfo>
+      <FeedSubmissionId>{feed_id}</FeedSubmissionId>
+      <FeedProcessingStatus>{status}</FeedProcessingStatus>
+    </FeedSubmissionInfo>"""
+
+PROCESSING_REPORT_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<AmazonEnvelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+  <Header><DocumentVersion>1.02</DocumentVersion></Header>
+  <MessageType>ProcessingReport</MessageType>
+  <Message>
+    <MessageID>1</MessageID>
+    <ProcessingReport>
+      <StatusCode>Complete</StatusCode>
+      <ProcessingSummary>
+        <MessagesProcessed>{processed}</MessagesProcessed>
+      </ProcessingSummary>{results}
+    </ProcessingReport>
+  </Message>
+</AmazonEnvelope>
+"""
+
+RESULT_XML = """
+      <Result>
+        <MessageID>{message_id}</MessageID>
+        <ResultCode>{code}</ResultCode>
+        <ResultMessageCode>8560</ResultMessageCode>
+        <ResultDescription>Bad value</ResultDescription>
+      </Result>"""
+
+
+class FakeFeeds(Feeds):
+    """Feeds API answering requests from memory.
+
+    Submitted feeds are kept in ``feeds``, keyed by FeedSubmissionId, with their
+    status in ``statuses`` and the ``(message_id, result_code)`` results of their
+    processing report in ``results``.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.feeds = {}
+        self.statuses = {}
+        self.results = {}
+        self.requests = []
+        self.fail_submit = False
+
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        self.requests.append((action, params))
+        if action == "SubmitFeed":
+            if self.fail_submit:
+                raise ConnectionError("Upload failed")
+            feed_id = str(len(self.feeds) + 1)
+            self.feeds[feed_id] = kwargs["body"].read().decode("utf-8")
+            self.statuses[feed_id] = "_SUBMITTED_"
+            xml = SUBMIT_FEED_XML.format(feed_id=feed_id, feed_type=params["FeedType"])
+        elif action == "GetFeedSubmissionList":
+            feed_ids = [
+                value
+                for key, value in params.items()
+                if key.startswith("FeedSubmissionIdList.Id.")
+            ]
+            assert params["MaxCount"] == len(feed_ids)
+            xml = SUBMISSION_LIST_XML.format(
+                infos="".join(
+                    SUBMISSION_INFO_XML.format(
+                        feed_id=feed_id, status=self.statuses[feed_id]
+                    )
+                    for feed_id in feed_ids
+                )
+            )
+        elif action == "GetFeedSubmissionResult":
+            feed_id = params["FeedSubmissionId"]
+            results = self.results.get(feed_id, [])
+            xml = PROCESSING_REPORT_XML.format(
+                processed=len(message_ids(self.feeds[feed_id])),
+                results="".join(
+                    RESULT_XML.format(message_id=message_id, code=code)
+                    for message_id, code in results
+                ),
+            )
+            assert kwargs["stream"] is True
+            return stream_response(xml.encode("utf-8"))
+        else:
+            raise AssertionError(f"Unexpected action {action}")
+        return xml_response(xml, action, result_key=kwargs.get("result_key"))
+
+
+def message_ids(feed):
+    return [int(value) for value in re.findall(r"<MessageID>(\d+)</MessageID>", feed)]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def api(mws_credentials):
+    return FakeFeeds(**mws_credentials)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def inventory(sku, quantity):
+    return f"<Inventory><SKU>{sku}</SKU><Quantity>{quantity}</Quantity></Inventory>"
+
+
+def test_add_submits_full_feeds(api, clock):
+    queue = FeedQueue(
+        api, marketplace_ids=["ATVPDKIKX0DER"], max_messages=3, clock=clock
+    )
+    updates = [queue.add(INVENTORY, inventory(f"SKU-{n}", n)) for n in range(4)]
+    assert len(api.feeds) == 1
+    assert [update.status for update in updates] == [FeedUpdateStatus.SUBMITTED] * 3 + [
+        FeedUpdateStatus.PENDING
+    ]
+    assert len(queue) == 1
+
+    feed = api.feeds["1"]
+    assert f"<MerchantIdentifier>{TEST_MWS_ACCOUNT_ID}</MerchantIdentifier>" in feed
+    assert "<MessageType>Inventory</MessageType>" in feed
+    assert message_ids(feed) == [1, 2, 3]
+    assert inventory("SKU-2", 2) in feed
+    action, params = api.requests[0]
+    assert params["FeedType"] == INVENTORY
+    assert params["MarketplaceIdList.Id.1"] == "ATVPDKIKX0DER"
+
+
+def test_add_submits_feeds_by_size(api, clock):
+    queue = FeedQueue(api, max_bytes=100, clock=clock)
+    queue.add(INVENTORY, inventory("SKU-1", 1))
+    assert not api.feeds
+    queue.add(INVENTORY, inventory("SKU-2", 2))
+    assert len(api.feeds) == 1
+
+
+def test_updates_coalesce_by_key(api, clock):
+    queue = FeedQueue(api, clock=clock)
+    first = queue.add(INVENTORY, inventory("A", 1), key="A")
+    queue.add(INVENTORY, inventory("B", 1), key="B")
+    last = queue.add(INVENTORY, inventory("A", 2), key="A")
+    assert len(queue) == 2
+    assert first.status == FeedUpdateStatus.SUPERSEDED
+    assert first.superseded_by is last
+
+    queue.flush()
+    feed = api.feeds["1"]
+    assert inventory("A", 2) in feed
+    assert inventory("A", 1) not in feed
+    assert last.message_id == 2
+
+
+def test_submit_due_by_age_and_type(api, clock):
+    queue = FeedQueue(api, max_age=60, clock=clock)
+    queue.add(INVENTORY, inventory("A", 1))
+    clock.now = 30
+    queue.add(PRICING, "<Price><SKU>A</SKU></Price>")
+    assert queue.submit_due() == []
+
+    clock.now = 60
+    (batch,) = queue.submit_due()
+    assert batch.feed_type == INVENTORY
+    assert batch.feed_submission_id == "1"
+    assert len(queue) == 1
+
+    (batch,) = queue.flush()
+    assert batch.feed_type == PRICING
+    assert "<MessageType>Price</MessageType>" in api.feeds["2"]
+
+
+def test_failed_submission_is_requeued(api, clock):
+    queue = FeedQueue(api, clock=clock)
+    first = queue.add(INVENTORY, inventory("A", 1), key="A")
+    queue.api.fail_submit = True
+    with pytest.raises(ConnectionError):
+        queue.flush()
+    assert len(queue) == 1
+    assert first.status == FeedUpdateStatus.PENDING
+
+    queue.api.fail_submit = False
+    (batch,) = queue.flush()
+    assert batch.updates == [first]
+
+
+def test_poll_maps_results_to_updates(api, clock):
+    queue = FeedQueue(api, clock=clock)
+    updates = [queue.add(INVENTORY, inventory(f"SKU-{n}", n)) for n in range(3)]
+    (inventory_batch,) = queue.flush()
+    other = queue.add(PRICING, "<Price><SKU>A</SKU></Price>")
+    queue.flush()
+    assert len(queue.in_flight) == 2
+
+    assert queue.poll() == []
+    api.statuses["1"] = "_DONE_"
+    api.results["1"] = [(2, "Error"), (3, "Warning")]
+    api.statuses["2"] = "_IN_PROGRESS_"
+    assert queue.poll() == [inventory_batch]
+    assert inventory_batch.done
+    assert inventory_batch.processing_report.status_code == "Complete"
+    assert [update.status for update in updates] == [
+        FeedUpdateStatus.SUCCEEDED,
+        FeedUpdateStatus.FAILED,
+        FeedUpdateStatus.SUCCEEDED,
+    ]
+    assert updates[1].errors[0].result_message_code == "8560"
+    assert len(updates[2].warnings) == 1
+    assert other.status == FeedUpdateStatus.SUBMITTED
+    assert queue.in_flight == [other.batch]
+
+    api.statuses["2"] = "_CANCELLED_"
+    assert queue.poll() == [other.batch]
+    assert other.status == FeedUpdateStatus.FAILED
+    assert queue.in_flight == []
+
+
+def test_add_rejects_unknown_feed_types(api):
+    with pytest.raises(ValueError):
+        FeedQueue(api).add("_POST_FLAT_FILE_LISTINGS_DATA_", "sku\tprice")
@@ -0,0 +1,195 @@
+"""Testing for the financial event index in ``mws.contrib.financial_index``."""
+
+import datetime
+import threading
+from decimal import Decimal
+
+import pytest
+
+from mws import Finances
+from mws.contrib.financial_index import FinancialEventIndex
+
+from ..conftest import stream_response, xml_response
+
+GROUPS_XML = """<?xml version="1.0"?>
+<ListFinancialEventGroupsResponse xmlns="http://mws.amazonservices.com/Finances/2015-05-01">
+  <ListFinancialEventGroupsResult>
+    <FinancialEventGroupList>{groups}</FinancialEventGroupList>
+  </ListFinancialEventGroupsResult>
+</ListFinancialEventGroupsResponse>
+"""
+
+GROUP_XML = """
+      <FinancialEventGroup>
+        <FinancialEventGroupId>{group_id}</FinancialEventGroupId>
+        <ProcessingStatus>{status}</ProcessingStatus>
+        <FundTransferStatus>Initiated</FundTransferStatus>
+        <OriginalTotal>
+          <CurrencyCode>USD</CurrencyCode>
+          <CurrencyAmount>{total}</CurrencyAmount>
+        </OriginalTotal>
+        <FinancialEventGroupStart>{start}</FinancialEventGroupStart>
+      </FinancialEventGroup>"""
+
+EVENTS_XML = """<?xml version="1.0"?>
+<ListFinancialEventsResponse xmlns="http://mws.amazonservices.com/Finances/2015-05-01">
+  <ListFinancialEventsResult>
+    <FinancialEvents>
+      <ShipmentEventList>{events}</ShipmentEventList>
+    </FinancialEvents>
+  </ListFinancialEventsResult>
+</ListFinancialEventsResponse>
+"""
+
+EVENT_XML = """
+        <ShipmentEvent>
+          <AmazonOrderId>{order_id}</AmazonOrderId>
+          <PostedDate>2020-01-02T00:00:00Z</PostedDate>
+          <ShipmentItemList>
+            <ShipmentItem>
+              <ItemChargeList>
+                <ChargeComponent>
+                  <ChargeType>Principal</ChargeType>
+                  <ChargeAmount>
+                    <CurrencyCode>USD</CurrencyCode>
+                    <CurrencyAmount>{amount}</CurrencyAmount>
+                  </ChargeAmount>
+                </ChargeComponent>
+              </ItemChargeList>
+            </ShipmentItem>
+          </ShipmentItemList>
+        </ShipmentEvent>"""
+
+
+class FakeFinances(Finances):
+    """Finances API answering requests from memory.
+
+    ``groups`` maps group IDs to ``(status, start, [(order_id, amount), ...])``.
+    """
+
+    def __init__(self, groups, **kwargs):
+        super().__init__(**kwargs)
+        self.groups = groups
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        with self.lock:
+            self.requests.append((action, params))
+        if action == "ListFinancialEventGroups":
+            after = params["FinancialEventGroupStartedAfter"].isoformat()
+            groups = "".join(
+                GROUP_XML.format(
+                    group_id=group_id,
+                    status=status,
+                    start=start,
+                    total=sum(amount for _, amount in events),
+                )
+                for group_id, (status, start, events) in self.groups.items()
+                if start.rstrip("Z") >= after
+            )
+            return xml_response(GROUPS_XML.format(groups=groups), action)
+        if action == "ListFinancialEvents":
+            assert kwargs["stream"] is True
+            _, _, events = self.groups[params["FinancialEventGroupId"]]
+            xml = EVENTS_XML.format(
+                events="".join(
+                    EVENT_XML.format(order_id=order_id, amount=amount)
+                    for order_id, amount in events
+                )
+            )
+            return stream_response(xml.encode("utf-8"))
+        raise AssertionError(f"Unexpected action {action}")
+
+    def event_requests(self):
+        return sorted(
+            params["FinancialEventGroupId"]
+            for action, params in self.requests
+            if action == "ListFinancialEvents"
+        )
+
+
+@pytest.fixture
+def api(mws_credentials):
+    return FakeFinances(
+        {
+            "G1": ("Closed", "2020-01-01T00:00:00Z", [("111-1", 10), ("111-2", 5)]),
+            "G2": ("Open", "2020-01-15T00:00:00Z", [("111-3", 7)]),
+        },
+        **mws_credentials,
+    )
+
+
+def test_update_and_lookups(api):
+    index = FinancialEventIndex(api, ":memory:")
+    loaded = index.update(started_after=datetime.datetime(2020, 1, 1))
+    assert sorted(loaded) == ["G1", "G2"]
+
+    group = index.group("G1")
+    assert group["processing_status"] == "Closed"
+    assert group["original_total"] == Decimal("15")
+    assert group["group_start"] == datetime.datetime(
+        2020, 1, 1, tzinfo=datetime.timezone.utc
+    )
+    assert index.group("G9") is None
+    assert index.group_ids() == ["G1", "G2"]
+    assert index.group_ids("Open") == ["G2"]
+
+    (record,) = index.events_for_order("111-2")
+    assert record.amount == Decimal("5")
+    assert record.amount_type == "Principal"
+    assert record.posted_date == datetime.datetime(
+        2020, 1, 2, tzinfo=datetime.timezone.utc
+    )
+    assert [r.amazon_order_id for r in index.events_for_group("G1")] == [
+        "111-1",
+        "111-2",
+    ]
+    assert index.groups_for_order("111-3") == ["G2"]
+
+
+def test_update_fetches_only_new_or_open_groups(api, tmp_path):
+    database = tmp_path / "finances.sqlite"
+    FinancialEventIndex(api, database).update(
+        started_after=datetime.datetime(2020, 1, 1)
+    )
+    api.requests.clear()
+
+    # G2 gets a new event and closes; G3 is new.
+    api.groups["G2"] = ("Closed", "2020-01-15T00:00:00Z", [("111-3", 7), ("111-4", 1)])
+    api.groups["G3"] = ("Open", "2020-02-01T00:00:00Z", [("111-5", 2)])
+    index = FinancialEventIndex(api, database)
+    assert sorted(index.update(started_after=datetime.datetime(2020, 1, 1))) == [
+        "G2",
+        "G3",
+    ]
+    assert api.event_requests() == ["G2", "G3"]
+    assert len(index.events_for_group("G2")) == 2
+
+    # By default, updates resume from the earliest open group.
+    api.requests.clear()
+    assert index.update() == ["G3"]
+    _, params = api.requests[0]
+    assert params["FinancialEventGroupStartedAfter"] == datetime.datetime(2020, 2, 1)
+
+
+def test_update_accepts_dates_and_aware_datetimes(api):
+    index = FinancialEventIndex(api, ":memory:")
+    assert sorted(index.update(started_after=datetime.date(2020, 1, 10))) == ["G2"]
+    _, params = api.requests[0]
+    assert params["FinancialEventGroupStartedAfter"] == datetime.datetime(2020, 1, 10)
+
+    api.requests.clear()
+    est = datetime.timezone(datetime.timedelta(hours=-5))
+    index.update(
+        started_after=datetime.datetime(2019, 12, 31, 19, tzinfo=est),
+        started_before=datetime.date(2020, 2, 1),
+    )
+    _, params = api.requests[0]
+    assert params["FinancialEventGroupStartedAfter"] == datetime.datetime(2020, 1, 1)
+    assert params["FinancialEventGroupStartedBefore"] == datetime.datetime(2020, 2, 1)
+
+
+def test_update_empty_index_requires_start(api):
+    with pytest.raises(ValueError):
+        FinancialEventIndex(api, ":memory:").update()
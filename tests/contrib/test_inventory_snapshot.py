@@ -0,0 +1,179 @@
+"""Testing for the inventory supply snapshot in ``mws.contrib.inventory_snapshot``."""
+
+import datetime
+
+import pytest
+
+from mws import Inventory
+from mws.contrib.inventory_snapshot import InventoryChange, InventorySnapshot
+
+from ..conftest import xml_response
+
+UTC = datetime.timezone.utc
+
+SUPPLY_XML = """<?xml version="1.0"?>
+<{action}Response xmlns="http://mws.amazonaws.com/FulfillmentInventory/2010-10-01/">
+  <{action}Result>
+    {next_token}
+    <InventorySupplyList>{members}</InventorySupplyList>
+  </{action}Result>
+</{action}Response>
+"""
+
+MEMBER_XML = """
+      <member>
+        <SellerSKU>{sku}</SellerSKU>
+        <ASIN>ASIN-{sku}</ASIN>
+        <TotalSupplyQuantity>{total}</TotalSupplyQuantity>
+        <InStockSupplyQuantity>{in_stock}</InStockSupplyQuantity>
+      </member>"""
+
+
+class FakeInventory(Inventory):
+    """Inventory API answering ListInventorySupply from ``pages``: a list of
+    pages, each a list of ``(sku, total, in_stock)`` tuples, or an exception
+    to raise when that page is requested.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.pages = [[]]
+        self.requests = []
+
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        self.requests.append((action, params))
+        if action == "ListInventorySupply":
+            page = 0
+        else:
+            page = int(params["NextToken"])
+        if isinstance(self.pages[page], Exception):
+            raise self.pages[page]
+        members = "".join(
+            MEMBER_XML.format(sku=sku, total=total, in_stock=in_stock)
+            for sku, total, in_stock in self.pages[page]
+        )
+        next_token = ""
+        if page + 1 < len(self.pages):
+            next_token = f"<NextToken>{page + 1}</NextToken>"
+        xml = SUPPLY_XML.format(action=action, next_token=next_token, members=members)
+        return xml_response(xml, action)
+
+
+T1 = datetime.datetime(2020, 1, 1, 12, tzinfo=UTC)
+T2 = T1 + datetime.timedelta(minutes=10)
+T3 = T2 + datetime.timedelta(minutes=10)
+
+
+@pytest.fixture
+def api(mws_credentials):
+    return FakeInventory(**mws_credentials)
+
+
+@pytest.fixture
+def snapshot(api):
+    snapshot = InventorySnapshot(
+        api, marketplace_id="ATVPDKIKX0DER", start=datetime.datetime(2020, 1, 1)
+    )
+    api.pages[:] = [[("A", 5, 3), ("B", 2, 2)], [("C", 0, 0)]]
+    snapshot.update(now=T1)
+    api.pages[:] = [[("A", 4, 3), ("B", 2, 2)]]
+    snapshot.update(now=T2)
+    api.pages[:] = [[("A", 1, 1), ("D", 7, 7)]]
+    snapshot.update(now=T3)
+    return snapshot
+
+
+def test_update_pulls_deltas(api):
+    snapshot = InventorySnapshot(api, start=datetime.datetime(2020, 1, 1))
+    api.pages[:] = [[("A", 5, 3)], [("B", 2, 2)]]
+    changes = snapshot.update(now=T1)
+    assert changes == [
+        InventoryChange("A", T1, None, 5, None, 3),
+        InventoryChange("B", T1, None, 2, None, 2),
+    ]
+    _, params = api.requests[0]
+    assert params["QueryStartDateTime"] == datetime.datetime(2020, 1, 1)
+    assert api.requests[1][0] == "ListInventorySupplyByNextToken"
+    assert snapshot.last_pulled == T1
+
+    api.requests.clear()
+    api.pages[:] = [[("A", 5, 3), ("B", 1, 0)]]
+    assert snapshot.update(now=T2) == [InventoryChange("B", T2, 2, 1, 2, 0)]
+    _, params = api.requests[0]
+    assert params["QueryStartDateTime"] == datetime.datetime(2020, 1, 1, 11, 55)
+
+
+def test_failed_update_leaves_snapshot_unchanged(api):
+    snapshot = InventorySnapshot(api, start=datetime.datetime(2020, 1, 1))
+    api.pages[:] = [[("A", 5, 3)], RuntimeError("Request is throttled")]
+    with pytest.raises(RuntimeError):
+        snapshot.update(now=T1)
+    assert len(snapshot) == 0
+    assert snapshot.changes() == []
+    assert snapshot.last_pulled is None
+
+    api.pages[:] = [[("A", 5, 3)], [("B", 2, 2)]]
+    assert snapshot.update(now=T1) == [
+        InventoryChange("A", T1, None, 5, None, 3),
+        InventoryChange("B", T1, None, 2, None, 2),
+    ]
+
+
+def test_update_requires_start(api):
+    with pytest.raises(ValueError):
+        InventorySnapshot(api).update()
+
+
+def test_current_supply(snapshot):
+    assert len(snapshot) == 4
+    assert "D" in snapshot
+    assert "E" not in snapshot
+    supply = snapshot.get("A")
+    assert supply.asin == "ASIN-A"
+    assert (supply.total_supply_quantity, supply.in_stock_supply_quantity) == (1, 1)
+    assert snapshot.get("E") is None
+    assert sorted(supply.seller_sku for supply in snapshot) == ["A", "B", "C", "D"]
+
+
+def test_changes(snapshot):
+    assert [change.seller_sku for change in snapshot.changes(since=T1)] == [
+        "A",
+        "A",
+        "D",
+    ]
+    assert [change.changed_at for change in snapshot.changes(seller_sku="A")] == [
+        T1,
+        T2,
+        T3,
+    ]
+    assert snapshot.changes(since=T1, until=T2) == [
+        InventoryChange("A", T2, 5, 4, 3, 3)
+    ]
+    assert snapshot.changes(seller_sku="E") == []
+
+
+def test_point_in_time(snapshot):
+    assert snapshot.supply_at("A", T2).total_supply_quantity == 4
+    assert snapshot.supply_at("A", T1 - datetime.timedelta(seconds=1)) is None
+    assert snapshot.supply_at("D", T2) is None
+    assert snapshot.supply_at("D", T3).total_supply_quantity == 7
+
+    past = snapshot.snapshot_at(T2)
+    assert sorted(past) == ["A", "B", "C"]
+    assert past["A"].total_supply_quantity == 4
+    assert snapshot.get("A").total_supply_quantity == 1
+
+
+def test_prune(snapshot):
+    snapshot.prune(T2)
+    assert len(snapshot.changes()) == 3
+    # SKUs first seen in pruned history remain, with their supply before T2.
+    past = snapshot.snapshot_at(T1 - datetime.timedelta(seconds=1))
+    assert sorted(past) == ["A", "B", "C"]
+    assert past["A"].total_supply_quantity == 5
+    assert snapshot.get("A").total_supply_quantity == 1
+
+
+def test_apply_rejects_earlier_changes(snapshot):
+    with pytest.raises(ValueError):
+        snapshot.apply([], T1)
@@ -0,0 +1,164 @@
+"""Testing for incremental order sync in ``mws.contrib.order_sync``."""
+
+import datetime
+
+import pytest
+
+from mws import Orders
+from mws.contrib.order_sync import OrderSync
+
+from ..conftest import xml_response
+
+UTC = datetime.timezone.utc
+
+LIST_ORDERS_XML = """<?xml version="1.0"?>
+<{action}Response xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <{action}Result>
+    {next_token}
+    <Orders>{orders}</Orders>
+  </{action}Result>
+</{action}Response>
+"""
+
+ORDER_XML = """
+      <Order>
+        <AmazonOrderId>{order_id}</AmazonOrderId>
+        <LastUpdateDate>{last_update}</LastUpdateDate>
+      </Order>"""
+
+
+class FakeOrders(Orders):
+    """Orders API answering ListOrders from ``pages``: a list of pages,
+    each a list of ``(order_id, last_update)`` pairs. Like MWS, only orders
+    updated within the requested window are listed.
+    """
+
+    def __init__(self, pages=None, **kwargs):
+        super().__init__(**kwargs)
+        self.pages = pages or [[]]
+        self.requests = []
+
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        self.requests.append((action, params))
+        page = 0
+        if action == "ListOrdersByNextToken":
+            page = int(params["NextToken"])
+        else:
+            self.window = (params["LastUpdatedAfter"], params["LastUpdatedBefore"])
+        after, before = (value.isoformat() for value in self.window)
+        orders = "".join(
+            ORDER_XML.format(order_id=order_id, last_update=last_update)
+            for order_id, last_update in self.pages[page]
+            if after <= last_update.rstrip("Z") < before
+        )
+        next_token = ""
+        if page + 1 < len(self.pages):
+            next_token = f"<NextToken>{page + 1}</NextToken>"
+        xml = LIST_ORDERS_XML.format(
+            action=action, orders=orders, next_token=next_token
+        )
+        return xml_response(xml, action)
+
+
+START = datetime.datetime(2020, 1, 1)
+NOW = datetime.datetime(2020, 1, 2, 12, 0)
+
+
+def order_ids(orders):
+    return [order.AmazonOrderId for order in orders]
+
+
+def test_first_sync_follows_pages_and_sets_watermark(mws_credentials):
+    api = FakeOrders(
+        [
+            [("111-1", "2020-01-01T10:00:00Z")],
+            [("111-2", "2020-01-02T10:00:00.500Z")],
+        ],
+        **mws_credentials,
+    )
+    sync = OrderSync(api, ":memory:", ["ATVPDKIKX0DER"], start=START)
+    assert order_ids(sync.sync(now=NOW)) == ["111-1", "111-2"]
+    action, params = api.requests[0]
+    assert action == "ListOrders"
+    assert params["LastUpdatedAfter"] == START
+    assert params["LastUpdatedBefore"] == datetime.datetime(2020, 1, 2, 11, 58)
+    assert params["MarketplaceId.Id.1"] == "ATVPDKIKX0DER"
+    assert api.requests[1][0] == "ListOrdersByNextToken"
+    assert sync.watermark == datetime.datetime(2020, 1, 2, 11, 58, tzinfo=UTC)
+
+
+def test_overlapping_sync_yields_only_changed_orders(tmp_path, mws_credentials):
+    database = tmp_path / "sync.sqlite"
+    api = FakeOrders(
+        [
+            [
+                ("111-1", "2020-01-02T11:50:00Z"),
+                ("111-2", "2020-01-02T11:55:00Z"),
+                ("111-4", "2020-01-02T11:56:00Z"),
+            ]
+        ],
+        **mws_credentials,
+    )
+    first = OrderSync(api, database, ["ATVPDKIKX0DER"], start=START)
+    assert order_ids(first.sync(now=NOW)) == ["111-1", "111-2", "111-4"]
+    first.close()
+
+    # A new instance picks up from the stored watermark. Orders in the overlap
+    # with the previous window are yielded only if they have changed.
+    api.pages = [
+        [
+            ("111-1", "2020-01-02T11:50:00Z"),
+            ("111-4", "2020-01-02T11:56:00Z"),
+            ("111-3", "2020-01-02T12:00:00Z"),
+            ("111-2", "2020-01-02T12:05:00Z"),
+        ]
+    ]
+    sync = OrderSync(api, database, ["ATVPDKIKX0DER"])
+    later = NOW + datetime.timedelta(minutes=10)
+    assert order_ids(sync.sync(now=later)) == ["111-3", "111-2"]
+    _, params = api.requests[-1]
+    assert params["LastUpdatedAfter"] == datetime.datetime(2020, 1, 2, 11, 43)
+    # The same window again yields nothing new.
+    assert order_ids(sync.sync(now=later)) == []
+
+
+def test_watermarks_kept_per_marketplace_set(mws_credentials):
+    api = FakeOrders(**mws_credentials)
+    first = OrderSync(api, ":memory:", ["ATVPDKIKX0DER"], start=START)
+    list(first.sync(now=NOW))
+    second = OrderSync(api, ":memory:", ["A2EUQ1WTGCTBG2"])
+    assert second.watermark is None
+    with pytest.raises(ValueError):
+        list(second.sync(now=NOW))
+
+
+def test_abandoned_sync_is_repeated(mws_credentials):
+    api = FakeOrders(
+        [[("111-1", "2020-01-01T10:00:00Z"), ("111-2", "2020-01-01T11:00:00Z")]],
+        **mws_credentials,
+    )
+    sync = OrderSync(api, ":memory:", ["ATVPDKIKX0DER"], start=START)
+    orders = sync.sync(now=NOW)
+    next(orders)
+    orders.close()
+    assert sync.watermark is None
+    assert order_ids(sync.sync(now=NOW)) == ["111-1", "111-2"]
+
+
+def test_reset(mws_credentials):
+    api = FakeOrders([[("111-1", "2020-01-01T10:00:00Z")]], **mws_credentials)
+    sync = OrderSync(api, ":memory:", ["ATVPDKIKX0DER"], start=START)
+    list(sync.sync(now=NOW))
+    sync.reset()
+    assert sync.watermark is None
+    assert order_ids(sync.sync(now=NOW)) == ["111-1"]
+
+
+def test_lag_below_minimum_rejected(mws_credentials):
+    with pytest.raises(ValueError):
+        OrderSync(
+            FakeOrders(**mws_credentials),
+            ":memory:",
+            [],
+            lag=datetime.timedelta(minutes=1),
+        )
@@ -0,0 +1,127 @@
+"""Testing for the on-disk report cache in ``mws.contrib.report_cache``."""
+
+import hashlib
+import io
+
+import pytest
+from requests import Response
+
+from mws import MWSResponse
+from mws.contrib.report_cache import ReportCache
+from mws.utils.crypto import calc_md5
+
+REPORTS = {
+    "1001": b"sku\tqty\nA\t1\nB\t2\n",
+    "1002": b"sku\tqty\nC\t3\n",
+    "1003": b"sku\tqty\nA\t1\nB\t2\n",
+}
+
+
+class FakeReports:
+    """Stands in for the Reports API, recording requests made."""
+
+    def __init__(self, reports, content_md5=None):
+        self.reports = reports
+        self.content_md5 = content_md5
+        self.downloads = []
+        self.acknowledged = []
+
+    def get_report(self, report_id, stream=False):
+        assert stream is True
+        self.downloads.append(report_id)
+        content = self.reports[report_id]
+        response = Response()
+        response.raw = io.BytesIO(content)
+        response.status_code = 200
+        response.headers["Content-MD5"] = self.content_md5 or calc_md5(content)
+        response.headers["Content-Type"] = "text/plain;charset=UTF-8"
+        return MWSResponse(response, stream=True)
+
+    def update_report_acknowledgements(self, report_ids=None, acknowledged=None):
+        assert acknowledged is True
+        self.acknowledged.append(list(report_ids))
+
+
+@pytest.fixture
+def api():
+    return FakeReports(REPORTS)
+
+
+@pytest.fixture
+def cache(tmp_path, api):
+    return ReportCache(tmp_path, api)
+
+
+def test_fetch_downloads_once(cache, api):
+    report = cache.fetch("1001")
+    assert report.read() == REPORTS["1001"]
+    assert report.metadata["size"] == len(REPORTS["1001"])
+    assert report.metadata["content_md5"] == calc_md5(REPORTS["1001"]).decode()
+    assert cache.fetch("1001").read() == REPORTS["1001"]
+    assert api.downloads == ["1001"]
+    assert "1001" in cache
+    assert "1002" not in cache
+
+
+def test_cache_persists_across_instances(tmp_path, api):
+    ReportCache(tmp_path, api).fetch("1002")
+    report = ReportCache(tmp_path).fetch("1002")
+    assert report.read() == REPORTS["1002"]
+    assert api.downloads == ["1002"]
+
+
+def test_identical_content_stored_once(cache, tmp_path):
+    first = cache.fetch("1001")
+    second = cache.fetch("1003")
+    assert first.path == second.path
+    assert len(list((tmp_path / "content").iterdir())) == 1
+
+
+def test_add_from_file(cache):
+    report = cache.add("1002", io.BytesIO(REPORTS["1002"]))
+    assert report.read() == REPORTS["1002"]
+    assert report.metadata["size"] == len(REPORTS["1002"])
+    assert report.metadata["content_md5"] == calc_md5(REPORTS["1002"]).decode()
+    assert report.path.name == f"{hashlib.md5(REPORTS['1002']).hexdigest()}.gz"
+
+
+def test_report_locks_are_released(cache):
+    for report_id in REPORTS:
+        cache.fetch(report_id)
+    assert len(cache._report_locks) == 0
+
+
+def test_md5_mismatch_is_not_cached(tmp_path):
+    api = FakeReports(REPORTS, content_md5=calc_md5(b"something else"))
+    cache = ReportCache(tmp_path, api)
+    with pytest.raises(ValueError):
+        cache.fetch("1001")
+    assert "1001" not in cache
+    assert list((tmp_path / "content").iterdir()) == []
+
+
+def test_iter_flat_file(cache):
+    reader = cache.fetch("1001").iter_flat_file(records=True)
+    assert [record.sku for record in reader] == ["A", "B"]
+
+
+def test_acknowledge_evicts(cache, api, tmp_path):
+    for report_id in ("1001", "1002", "1003"):
+        cache.fetch(report_id)
+    assert [report.report_id for report in cache.pending()] == ["1001", "1002", "1003"]
+
+    cache.acknowledge(["1001", "1002"])
+    assert api.acknowledged == [["1001", "1002"]]
+    assert [report.report_id for report in cache.pending()] == ["1003"]
+    # Content shared with a pending report is kept.
+    assert cache.get("1003").read() == REPORTS["1003"]
+    assert len(list((tmp_path / "content").iterdir())) == 1
+
+    cache.acknowledge(["1003"])
+    assert len(cache) == 0
+    assert list((tmp_path / "content").iterdir()) == []
+
+
+def test_fetch_requires_api(tmp_path):
+    with pytest.raises(ValueError):
+        ReportCache(tmp_path).fetch("1001")
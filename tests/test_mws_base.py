@@ -1,10 +1,13 @@
 """Tests for the mws.MWS class and Marketplaces."""
 
 import datetime
+import threading
 
 import pytest
+from requests import Response
 
 from mws import MWS, Marketplaces, MWSError
+from mws.utils.xml import MWS_ENCODING
 
 
 def test_invalid_region(mws_credentials):
@@ -147,3 +150,244 @@ def test_mws_get_service_status_deprecated(mws_credentials):
     assert resp.parsed.Status in ("GREEN", "GREEN_I", "YELLOW", "RED")
     utc_now_date_str = datetime.datetime.utcnow().date().isoformat()
     assert resp.parsed.Timestamp[:10] == utc_now_date_str
+
+
+@pytest.mark.parametrize("value", (Marketplaces.DE, "DE", "A1PA6795UKMFR9"))
+def test_marketplaces_lookup(value):
+    assert Marketplaces.lookup(value) is Marketplaces.DE
+
+
+def test_marketplaces_lookup_unknown():
+    with pytest.raises(ValueError):
+        Marketplaces.lookup("XX")
+
+
+class RecordingMWS(MWS):
+    """Answers requests with the instance, endpoint and params used to make them."""
+
+    def list_things(self, marketplace_id, flavor=None):
+        if marketplace_id == Marketplaces.IN.marketplace_id:
+            raise MWSError("Not registered in this marketplace")
+        return self.make_request("ListThings", {"MarketplaceId": marketplace_id})
+
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        return self, self.endpoint, params["MarketplaceId"]
+
+
+def test_for_marketplaces(mws_credentials):
+    api = RecordingMWS(**mws_credentials)
+    results = api.for_marketplaces(
+        "list_things", ["FR", Marketplaces.DE, "ATVPDKIKX0DER", Marketplaces.IN]
+    )
+    assert list(results) == [
+        Marketplaces.FR,
+        Marketplaces.DE,
+        Marketplaces.US,
+        Marketplaces.IN,
+    ]
+    fr_api, fr_endpoint, fr_id = results[Marketplaces.FR].result
+    de_api, de_endpoint, de_id = results[Marketplaces.DE].result
+    us_api, us_endpoint, us_id = results[Marketplaces.US].result
+    assert fr_id == Marketplaces.FR.marketplace_id
+    assert de_id == Marketplaces.DE.marketplace_id
+    assert fr_endpoint == de_endpoint == "https://mws-eu.amazonservices.com/"
+    assert us_endpoint == "https://mws.amazonservices.com/"
+    # Marketplaces sharing an endpoint share a client and its connections.
+    assert fr_api is de_api
+    assert fr_api is not us_api
+    assert fr_api.session is not us_api.session
+    assert fr_api.throttle_requests is True
+    # Clients share one registry, whose buckets are kept per endpoint.
+    assert fr_api.throttles is api.throttles
+    assert api.domain == "https://mws.amazonservices.com"
+
+    assert not results[Marketplaces.IN].ok
+    assert isinstance(results[Marketplaces.IN].error, MWSError)
+
+
+def test_for_marketplaces_callable(mws_credentials):
+    api = RecordingMWS(**mws_credentials)
+    results = api.for_marketplaces(
+        lambda api, marketplace: (marketplace.name, api.domain), ["JP"]
+    )
+    assert results[Marketplaces.JP].result == ("JP", "https://mws.amazonservices.jp")
+
+
+def test_for_marketplaces_unknown_operation(mws_credentials):
+    api = RecordingMWS(**mws_credentials)
+    with pytest.raises(ValueError):
+        api.for_marketplaces("list_nothing", ["US"])
+
+
+class BlockingSession:
+    """Stands in for ``requests.Session``: holds each request until released."""
+
+    def __init__(self):
+        self.requests = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+
+    def request(self, **kwargs):
+        with self.lock:
+            self.requests.append(kwargs)
+        self.started.set()
+        self.release.wait(5)
+        response = Response()
+        response._content = (
+            "<GetServiceStatusResponse><GetServiceStatusResult><Status>GREEN</Status>"
+            "</GetServiceStatusResult></GetServiceStatusResponse>"
+        ).encode(MWS_ENCODING)
+        response.encoding = MWS_ENCODING
+        response.status_code = 200
+        return response
+
+
+def _concurrent_requests(api, session, calls):
+    """Runs ``calls`` (functions of ``api``) in threads, the first alone until its
+    request is sent, and returns their results in order.
+    """
+    results = [None] * len(calls)
+
+    def _call(idx):
+        results[idx] = calls[idx](api)
+
+    threads = [threading.Thread(target=_call, args=(idx,)) for idx in range(len(calls))]
+    threads[0].start()
+    session.started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    threading.Timer(0.1, session.release.set).start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_request_key_ignores_timestamp_and_signature(mws_credentials):
+    api = MWS(**mws_credentials)
+    key = api.request_key("ListThings", {"A": 1, "Timestamp": "now"})
+    assert key == api.request_key("ListThings", {"A": 1, "Signature": "abc"})
+    assert key != api.request_key("ListThings", {"A": 2})
+    assert key != api.request_key("ListThings", {"A": 1}, method="GET")
+    assert key != api.request_key("ListOtherThings", {"A": 1})
+
+
+def test_coalesced_requests_share_one_round_trip(mws_credentials):
+    session = BlockingSession()
+    api = MWS(**mws_credentials, session=session, coalesce=["GetServiceStatus"])
+    api._use_feature_mwsresponse = True
+    results = _concurrent_requests(
+        api, session, [lambda api: api.get_service_status()] * 4
+    )
+    assert len(session.requests) == 1
+    assert results[0].parsed.Status == "GREEN"
+    assert all(result is results[0] for result in results)
+    assert len(api.requests_in_flight) == 0
+
+
+def test_requests_with_different_params_are_not_coalesced(mws_credentials):
+    session = BlockingSession()
+    api = MWS(**mws_credentials, session=session, coalesce=["GetThing"])
+    api._use_feature_mwsresponse = True
+    _concurrent_requests(
+        api,
+        session,
+        [
+            lambda api: api.make_request("GetThing", {"Id": "1"}),
+            lambda api: api.make_request("GetThing", {"Id": "2"}),
+        ],
+    )
+    assert len(session.requests) == 2
+
+
+def test_requests_are_not_coalesced_unless_opted_in(mws_credentials):
+    session = BlockingSession()
+    api = MWS(**mws_credentials, session=session)
+    api._use_feature_mwsresponse = True
+    results = _concurrent_requests(
+        api, session, [lambda api: api.get_service_status()] * 2
+    )
+    assert len(session.requests) == 2
+    assert results[0] is not results[1]
+
+
+class EchoMWS(MWS):
+    """Answers each request with its thread and params."""
+
+    def get_thing(self, thing_id):
+        if thing_id == "bad":
+            raise MWSError("Bad thing")
+        return self.make_request("GetThing", {"Id": thing_id})
+
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        return threading.current_thread().name, self, params["Id"]
+
+
+def test_submit(mws_credentials):
+    with EchoMWS(**mws_credentials, max_workers=2) as api:
+        future = api.submit("get_thing", "1")
+        thread_name, worker_api, thing_id = future.result(5)
+        assert thread_name.startswith("EchoMWS")
+        assert thing_id == "1"
+        # Operations run on a throttled copy sharing the instance's quotas.
+        assert worker_api is not api
+        assert worker_api.throttle_requests is True
+        assert worker_api.throttles is api.throttles
+        assert worker_api._use_feature_mwsresponse is True
+        # A session is created for the workers to share, leaving the instance's alone.
+        assert api.session is None
+        assert worker_api.session is not None
+        assert api.submit("get_thing", "2").result(5)[1].session is worker_api.session
+
+        with pytest.raises(MWSError):
+            api.submit("get_thing", "bad").result(5)
+
+        future = api.submit(lambda api, value: api.get_thing(value * 2), "x")
+        assert future.result(5)[2] == "xx"
+    assert api.session is None
+
+
+def test_submit_keeps_own_session(mws_credentials):
+    session = BlockingSession()
+    api = EchoMWS(**mws_credentials, session=session)
+    assert api.submit("get_thing", "1").result(5)[1].session is session
+    api.shutdown()
+    assert api.session is session
+
+
+def test_submit_queued_operations_run_after_shutdown(mws_credentials):
+    release = threading.Event()
+    api = EchoMWS(**mws_credentials, max_workers=1)
+    blocked = api.submit(lambda api: release.wait(5))
+    queued = api.submit("get_thing", "1")
+    api.shutdown(wait=False)
+    release.set()
+    assert blocked.result(5) is True
+    assert queued.result(5)[2] == "1"
+
+
+def test_throttled_copy_submits_on_its_own_endpoint(mws_credentials):
+    with EchoMWS(**mws_credentials) as api:
+        assert api.submit("get_thing", "1").result(5)[1].domain == api.domain
+        clone = api.throttled()
+        clone.domain = Marketplaces.DE.endpoint
+        with clone:
+            worker_api = clone.submit("get_thing", "2").result(5)[1]
+        assert worker_api.endpoint == "https://mws-eu.amazonservices.com/"
+
+
+def test_submit_after_throttled_copy_shut_down(mws_credentials):
+    with EchoMWS(**mws_credentials) as api:
+        api.submit("get_thing", "1").result(5)
+        with api.throttled() as clone:
+            clone.submit("get_thing", "2").result(5)
+        assert api.submit("get_thing", "3").result(5)[2] == "3"
+
+
+def test_map(mws_credentials):
+    with EchoMWS(**mws_credentials, max_workers=3) as api:
+        ids = [str(idx) for idx in range(20)]
+        assert [result[2] for result in api.map("get_thing", ids)] == ids
+        assert len({result[0] for result in api.map("get_thing", ids)}) <= 3
+        with pytest.raises(MWSError):
+            list(api.map("get_thing", ["1", "bad", "2"]))
@@ -152,6 +152,18 @@ class TestDotDictObject:
         assert isinstance(dot_dict.d, dict)
         assert dot_dict.d.a == 3
 
+    def test_dotdict_nested_values_built_once(self):
+        """Each nested mapping is converted once, not again at every level above it."""
+        built = []
+
+        class CountingDotDict(DotDict):
+            def __init__(self, *args, **kwargs):
+                built.append(1)
+                super().__init__(*args, **kwargs)
+
+        CountingDotDict({"a": {"b": {"c": {"d": [{"e": 1}]}}}})
+        assert len(built) == 5
+
     def test_dotdict_attr_key_access_methods(self):
         """Various methods for accessing contents of a parsed XML response
         should all return the same way.
@@ -0,0 +1,270 @@
+"""Testing for columnar exports in ``mws.utils.columnar``."""
+
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from mws.models.reports import ReportType
+from mws.utils import columnar
+from mws.utils.flatfile import FlatFileReader
+
+from ..conftest import xml_response
+
+LIST_ORDERS_XML = """<?xml version="1.0"?>
+<ListOrdersResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <ListOrdersResult>
+    <Orders>
+      <Order>
+        <AmazonOrderId>902-3159896-1390916</AmazonOrderId>
+        <PurchaseDate>2017-02-20T19:49:35Z</PurchaseDate>
+        <LastUpdateDate>2017-02-20T19:49:35Z</LastUpdateDate>
+        <OrderStatus>Shipped</OrderStatus>
+        <OrderTotal>
+          <CurrencyCode>USD</CurrencyCode>
+          <Amount>25.00</Amount>
+        </OrderTotal>
+        <NumberOfItemsShipped>1</NumberOfItemsShipped>
+        <ShippingAddress>
+          <City>Seattle</City>
+          <CountryCode>US</CountryCode>
+        </ShippingAddress>
+      </Order>
+      <Order>
+        <AmazonOrderId>483-3488972-0896720</AmazonOrderId>
+        <PurchaseDate>2017-02-21T10:00:00Z</PurchaseDate>
+        <LastUpdateDate>2017-02-21T11:00:00Z</LastUpdateDate>
+        <OrderStatus>Pending</OrderStatus>
+      </Order>
+    </Orders>
+  </ListOrdersResult>
+</ListOrdersResponse>
+"""
+
+LIST_FINANCIAL_EVENTS_XML = """<?xml version="1.0"?>
+<ListFinancialEventsResponse xmlns="http://mws.amazonservices.com/Finances/2015-05-01">
+  <ListFinancialEventsResult>
+    <FinancialEvents>
+      <ShipmentEventList>
+        <ShipmentEvent>
+          <AmazonOrderId>333-7654321-7654321</AmazonOrderId>
+          <MarketplaceName>amazon.com</MarketplaceName>
+          <PostedDate>2015-02-12T00:00:00Z</PostedDate>
+          <ShipmentItemList>
+            <ShipmentItem>
+              <SellerSKU>NABetaASINB</SellerSKU>
+              <ItemChargeList>
+                <ChargeComponent>
+                  <ChargeType>Principal</ChargeType>
+                  <ChargeAmount>
+                    <CurrencyCode>USD</CurrencyCode>
+                    <CurrencyAmount>10.0</CurrencyAmount>
+                  </ChargeAmount>
+                </ChargeComponent>
+                <ChargeComponent>
+                  <ChargeType>Tax</ChargeType>
+                  <ChargeAmount>
+                    <CurrencyCode>USD</CurrencyCode>
+                    <CurrencyAmount>1.0</CurrencyAmount>
+                  </ChargeAmount>
+                </ChargeComponent>
+              </ItemChargeList>
+              <ItemFeeList>
+                <FeeComponent>
+                  <FeeType>Commission</FeeType>
+                  <FeeAmount>
+                    <CurrencyCode>USD</CurrencyCode>
+                    <CurrencyAmount>-1.5</CurrencyAmount>
+                  </FeeAmount>
+                </FeeComponent>
+              </ItemFeeList>
+            </ShipmentItem>
+          </ShipmentItemList>
+        </ShipmentEvent>
+      </ShipmentEventList>
+      <RefundEventList/>
+      <ServiceFeeEventList>
+        <ServiceFeeEvent>
+          <FeeList>
+            <FeeComponent>
+              <FeeType>FBACustomerReturnPerUnitFee</FeeType>
+              <FeeAmount>
+                <CurrencyCode>USD</CurrencyCode>
+                <CurrencyAmount>-2.0</CurrencyAmount>
+              </FeeAmount>
+            </FeeComponent>
+          </FeeList>
+        </ServiceFeeEvent>
+      </ServiceFeeEventList>
+    </FinancialEvents>
+  </ListFinancialEventsResult>
+</ListFinancialEventsResponse>
+"""
+
+REPORT = (
+    b"seller-sku\tprice\tquantity\topen-date\n"
+    b"MUG-1\t12.50\t3\t2020-08-24 16:30:00 PDT\n"
+    b"MUG-2\t9.99\t\t2020-08-25 10:00:00 PDT\n"
+    b"MUG-3\t1.00\t7\t2020-08-26 10:00:00 PDT\n"
+)
+
+
+def test_list_response_rows():
+    response = xml_response(LIST_ORDERS_XML, "ListOrders")
+    schema = columnar.LIST_ACTION_SCHEMAS["ListOrders"]
+    rows = list(columnar.list_response_rows(response.parsed, schema))
+    names = [column.name for column in schema.columns]
+    first = dict(zip(names, rows[0]))
+    second = dict(zip(names, rows[1]))
+    assert first["AmazonOrderId"] == "902-3159896-1390916"
+    assert first["PurchaseDate"] == datetime.datetime(
+        2017, 2, 20, 19, 49, 35, tzinfo=datetime.timezone.utc
+    )
+    assert first["OrderTotalAmount"] == Decimal("25.00")
+    assert first["NumberOfItemsShipped"] == 1
+    assert first["ShipCity"] == "Seattle"
+    assert second["OrderTotalAmount"] is None
+
+
+def test_financial_event_rows():
+    response = xml_response(LIST_FINANCIAL_EVENTS_XML, "ListFinancialEvents")
+    rows = list(columnar.financial_event_rows(response.parsed))
+    posted = datetime.datetime(2015, 2, 12, tzinfo=datetime.timezone.utc)
+    assert rows == [
+        (
+            "ShipmentEvent",
+            posted,
+            "333-7654321-7654321",
+            None,
+            "amazon.com",
+            "NABetaASINB",
+            "Principal",
+            Decimal("10.0"),
+            "USD",
+        ),
+        (
+            "ShipmentEvent",
+            posted,
+            "333-7654321-7654321",
+            None,
+            "amazon.com",
+            "NABetaASINB",
+            "Tax",
+            Decimal("1.0"),
+            "USD",
+        ),
+        (
+            "ShipmentEvent",
+            posted,
+            "333-7654321-7654321",
+            None,
+            "amazon.com",
+            "NABetaASINB",
+            "Commission",
+            Decimal("-1.5"),
+            "USD",
+        ),
+        (
+            "ServiceFeeEvent",
+            None,
+            None,
+            None,
+            None,
+            None,
+            "FBACustomerReturnPerUnitFee",
+            Decimal("-2.0"),
+            "USD",
+        ),
+    ]
+
+
+def test_report_columns():
+    reader = FlatFileReader(REPORT, report_type=ReportType.ALL_LISTINGS)
+    columns = columnar.report_columns(reader.read_header(), reader.column_types)
+    assert [(column.name, column.kind) for column in columns] == [
+        ("seller-sku", columnar.STRING),
+        ("price", columnar.DECIMAL),
+        ("quantity", columnar.INT),
+        ("open-date", columnar.TIMESTAMP),
+    ]
+
+
+def test_list_action_columns_unknown_action():
+    with pytest.raises(ValueError):
+        columnar.list_action_columns("ListSomethingElse")
+    assert columnar.list_action_columns(
+        "ListOrdersByNextToken"
+    ) == columnar.list_action_columns("ListOrders")
+
+
+def test_report_batches_arrow():
+    pytest.importorskip("pyarrow")
+    batches = list(
+        columnar.report_batches(
+            REPORT, batch_size=2, report_type=ReportType.ALL_LISTINGS
+        )
+    )
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    first = batches[0].to_pydict()
+    assert first["seller-sku"] == ["MUG-1", "MUG-2"]
+    assert first["price"] == [Decimal("12.50"), Decimal("9.99")]
+    assert first["quantity"] == [3, None]
+    assert first["open-date"][0] == datetime.datetime(2020, 8, 24, 16, 30)
+
+
+def test_report_batches_numpy():
+    np = pytest.importorskip("numpy")
+    (batch,) = columnar.report_batches(
+        REPORT, output="numpy", report_type=ReportType.ALL_LISTINGS
+    )
+    assert batch["quantity"].tolist() == [3, None, 7]
+    assert batch["price"][0] == Decimal("12.50")
+    assert batch["open-date"][0] == np.datetime64("2020-08-24T16:30:00")
+
+
+def test_report_batches_unknown_output():
+    with pytest.raises(ValueError):
+        list(columnar.report_batches(REPORT, output="csv"))
+
+
+def test_list_response_batches_arrow():
+    pytest.importorskip("pyarrow")
+    pages = [
+        xml_response(LIST_ORDERS_XML, "ListOrders"),
+        xml_response(LIST_ORDERS_XML, "ListOrders"),
+    ]
+    (batch,) = columnar.list_response_batches(pages, "ListOrders")
+    assert batch.num_rows == 4
+    data = batch.to_pydict()
+    # Aware timestamps are normalized to naive UTC.
+    assert data["PurchaseDate"][0] == datetime.datetime(2017, 2, 20, 19, 49, 35)
+    assert data["OrderTotalAmount"][:2] == [Decimal("25.00"), None]
+
+
+def test_list_response_batches_financial_events_numpy():
+    pytest.importorskip("numpy")
+    page = xml_response(LIST_FINANCIAL_EVENTS_XML, "ListFinancialEvents")
+    (batch,) = columnar.list_response_batches(
+        [page], "ListFinancialEventsByNextToken", output="numpy"
+    )
+    assert batch["AmountType"].tolist() == [
+        "Principal",
+        "Tax",
+        "Commission",
+        "FBACustomerReturnPerUnitFee",
+    ]
+
+
+def test_write_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    path = tmp_path / "listings.parquet"
+    batches = columnar.report_batches(
+        REPORT, batch_size=1, report_type=ReportType.ALL_LISTINGS
+    )
+    assert columnar.write_parquet(batches, str(path)) == 3
+    parquet_file = pq.ParquetFile(str(path))
+    assert parquet_file.metadata.num_row_groups == 3
+    table = parquet_file.read()
+    assert table.column("seller-sku").to_pylist() == ["MUG-1", "MUG-2", "MUG-3"]
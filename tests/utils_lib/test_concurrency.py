@@ -0,0 +1,176 @@
+"""Testing for concurrency helpers in ``mws.utils.concurrency``."""
+
+import threading
+
+import pytest
+
+from mws.utils.concurrency import (
+    SingleFlight,
+    chunked,
+    concurrent_chain,
+    concurrent_map,
+)
+
+
+def test_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunked([], 2)) == []
+    with pytest.raises(ValueError):
+        list(chunked([1], 0))
+
+
+def test_concurrent_map_ordered():
+    results = list(concurrent_map(lambda x: x * 2, range(20), max_workers=3))
+    assert results == [(x, x * 2) for x in range(20)]
+
+
+def test_concurrent_map_unordered_yields_as_completed():
+    release = threading.Event()
+
+    def _func(item):
+        if item == 0:
+            # The first item finishes last.
+            release.wait(5)
+        return item
+
+    results = concurrent_map(_func, range(3), max_workers=3, ordered=False)
+    first = [next(results), next(results)]
+    release.set()
+    assert sorted(first) == [(1, 1), (2, 2)]
+    assert list(results) == [(0, 0)]
+
+
+def test_concurrent_map_bounds_items_in_flight():
+    consumed = []
+
+    def _items():
+        for item in range(100):
+            consumed.append(item)
+            yield item
+
+    results = concurrent_map(lambda x: x, _items(), max_workers=2)
+    next(results)
+    assert len(consumed) <= 5
+    results.close()
+
+
+def test_concurrent_map_raises():
+    def _func(item):
+        if item == 2:
+            raise KeyError(item)
+        return item
+
+    with pytest.raises(KeyError):
+        list(concurrent_map(_func, range(10), max_workers=2))
+
+
+def test_concurrent_chain():
+    values = concurrent_chain(lambda item: range(item), [3, 0, 5], max_workers=2)
+    assert sorted(values) == [0, 0, 1, 1, 2, 2, 3, 4]
+
+
+def test_concurrent_chain_raises():
+    def _func(item):
+        yield item
+        if item == 2:
+            raise KeyError(item)
+
+    with pytest.raises(KeyError):
+        list(concurrent_chain(_func, range(5), max_workers=2))
+
+
+def test_concurrent_chain_close_stops_workers():
+    produced = []
+
+    def _func(item):
+        for value in range(1000):
+            produced.append(value)
+            yield value
+
+    values = concurrent_chain(_func, [1, 2], max_workers=2, buffer_size=1)
+    next(values)
+    values.close()
+    assert len(produced) < 10
+
+
+def _run_concurrently(flight, key, func, count):
+    """Starts ``count`` threads calling ``flight.do(key, func)``, one first and
+    the rest once it is running, returning their results or exceptions.
+    """
+    results = [None] * count
+
+    def _call(idx):
+        try:
+            results[idx] = flight.do(key, func)
+        except Exception as exc:
+            results[idx] = exc
+
+    threads = [threading.Thread(target=_call, args=(idx,)) for idx in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_single_flight_shares_result_of_call_in_flight():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def _func():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return object()
+
+    leader = threading.Thread(target=lambda: flight.do("key", _func))
+    leader.start()
+    started.wait(5)
+    assert len(flight) == 1
+    threading.Timer(0.1, release.set).start()
+    results = _run_concurrently(flight, "key", _func, 4)
+    leader.join(5)
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert len(flight) == 0
+
+    # Once finished, a call for the same key runs again.
+    release.set()
+    flight.do("key", _func)
+    assert len(calls) == 2
+
+
+def test_single_flight_shares_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def _func():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    leader_error = []
+
+    def _leader():
+        try:
+            flight.do("key", _func)
+        except ValueError as exc:
+            leader_error.append(exc)
+
+    leader = threading.Thread(target=_leader)
+    leader.start()
+    started.wait(5)
+    threading.Timer(0.1, release.set).start()
+    results = _run_concurrently(flight, "key", _func, 3)
+    leader.join(5)
+    assert all(result is leader_error[0] for result in results)
+    assert len(flight) == 0
+
+
+def test_single_flight_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
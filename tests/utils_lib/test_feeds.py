@@ -0,0 +1,278 @@
+"""Tests for the streaming feed writers in ``mws.utils.feeds``."""
+
+import gzip
+
+import pytest
+from defusedxml.ElementTree import fromstring
+
+from mws import Feeds
+from mws.utils.crypto import calc_md5
+from mws.utils.feeds import (
+    FlatFileFeedWriter,
+    GzipFeed,
+    XMLFeedWriter,
+    feed_writer,
+    split_feed,
+)
+
+
+class FakeFeeds(Feeds):
+    """Feeds API recording the body and headers of each request."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = []
+
+    def make_request(self, action, params=None, method="POST", **kwargs):
+        body = kwargs["body"]
+        content = body.read() if hasattr(body, "read") else body
+        self.requests.append((action, params, content, kwargs["extra_headers"]))
+
+
+def test_xml_feed_writer():
+    with XMLFeedWriter("_POST_PRODUCT_PRICING_DATA_", "M&S") as feed:
+        assert feed.add_message("<Price><SKU>A</SKU></Price>") == 1
+        assert feed.add_message(b"<Price><SKU>B</SKU></Price>", "Update") == 2
+        with pytest.raises(ValueError):
+            feed.read()
+
+    content = feed.getvalue()
+    assert feed.message_count == 2
+    assert len(feed) == len(content)
+    assert feed.content_md5 == calc_md5(content)
+    root = fromstring(content)
+    assert root.findtext("Header/MerchantIdentifier") == "M&S"
+    assert root.findtext("MessageType") == "Price"
+    messages = root.findall("Message")
+    assert [m.findtext("MessageID") for m in messages] == ["1", "2"]
+    assert messages[1].findtext("OperationType") == "Update"
+    assert messages[1].findtext("Price/SKU") == "B"
+    with pytest.raises(ValueError):
+        feed.add_message("<Price/>")
+
+
+def test_xml_feed_writer_spools_to_disk():
+    feed = XMLFeedWriter(
+        "_POST_INVENTORY_AVAILABILITY_DATA_", "SELLER", spool_max_size=1024
+    )
+    for n in range(100):
+        feed.add_message(f"<Inventory><SKU>SKU-{n}</SKU></Inventory>")
+    feed.close()
+    assert feed._file._rolled
+    assert len(fromstring(feed.getvalue()).findall("Message")) == 100
+    feed.discard()
+
+
+def test_xml_feed_writer_requires_message_type():
+    with pytest.raises(ValueError):
+        XMLFeedWriter("_POST_FLAT_FILE_LISTINGS_DATA_", "SELLER")
+    feed = XMLFeedWriter("_POST_CUSTOM_DATA_", "SELLER", message_type="Custom")
+    assert b"<MessageType>Custom</MessageType>" in feed.close().getvalue()
+
+
+def test_flat_file_feed_writer():
+    feed = FlatFileFeedWriter(
+        "_POST_FLAT_FILE_PRICEANDQUANTITYONLY_UPDATE_DATA_",
+        ["sku", "price", "quantity"],
+        template_rows=[["TemplateType=PriceInventory", "Version=2014.0703"]],
+        encoding="iso-8859-1",
+    )
+    assert feed.add_row({"sku": "A", "price": "1.50"}) == 1
+    assert feed.add_row(["B\tC", None, 4]) == 2
+    with pytest.raises(ValueError):
+        feed.add_row({"colour": "red"})
+    feed.add_row({"sku": "Café", "quantity": 1})
+    content = feed.close().getvalue()
+
+    assert content.decode("iso-8859-1").splitlines() == [
+        "TemplateType=PriceInventory\tVersion=2014.0703",
+        "sku\tprice\tquantity",
+        "A\t1.50\t",
+        "B C\t\t4",
+        "Café\t\t1",
+    ]
+    assert feed.message_count == 3
+    assert feed.content_type == "text/tab-separated-values; charset=iso-8859-1"
+
+
+def test_feed_writer_by_feed_type():
+    assert isinstance(
+        feed_writer(Feeds.FeedType.POST_PRODUCT_DATA, merchant_id="SELLER"),
+        XMLFeedWriter,
+    )
+    assert isinstance(
+        feed_writer("_POST_FLAT_FILE_LISTINGS_DATA_", columns=["sku"]),
+        FlatFileFeedWriter,
+    )
+    with pytest.raises(ValueError):
+        feed_writer("_POST_EASYSHIP_DOCUMENTS_")
+
+
+def test_discarded_on_error():
+    with pytest.raises(RuntimeError):
+        with XMLFeedWriter("_POST_PRODUCT_DATA_", "SELLER") as feed:
+            raise RuntimeError
+    assert feed._file.closed
+
+
+def test_submit_feed_with_writer(mws_credentials):
+    api = FakeFeeds(**mws_credentials)
+    feed = FlatFileFeedWriter("_POST_FLAT_FILE_LISTINGS_DATA_", ["sku"])
+    feed.add_row(["A"])
+    api.submit_feed(feed, feed.feed_type)
+
+    _, params, content, headers = api.requests[0]
+    assert content == b"sku\nA\n"
+    assert headers["Content-MD5"] == calc_md5(content)
+    assert headers["Content-Type"] == "text/tab-separated-values; charset=utf-8"
+
+    api.submit_feed(b"<xml/>", "_POST_PRODUCT_DATA_")
+    _, _, content, headers = api.requests[1]
+    assert headers == {"Content-MD5": calc_md5(b"<xml/>"), "Content-Type": "text/xml"}
+
+
+def test_split_xml_feed():
+    with XMLFeedWriter("_POST_PRODUCT_PRICING_DATA_", "SELLER") as feed:
+        for n in range(10):
+            feed.add_message(f"<Price><SKU>SKU-{n}</SKU><Note>a &amp; b</Note></Price>")
+    parts = split_feed(feed, "_POST_PRODUCT_PRICING_DATA_", max_messages=4)
+
+    assert [part.message_count for part in parts] == [4, 4, 2]
+    root = fromstring(parts[1].getvalue())
+    assert root.findtext("Header/MerchantIdentifier") == "SELLER"
+    assert root.findtext("MessageType") == "Price"
+    messages = root.findall("Message")
+    assert [m.findtext("MessageID") for m in messages] == ["1", "2", "3", "4"]
+    assert [m.findtext("Price/SKU") for m in messages] == [
+        "SKU-4",
+        "SKU-5",
+        "SKU-6",
+        "SKU-7",
+    ]
+    assert messages[0].findtext("Price/Note") == "a & b"
+    assert list(parts[1].source_message_ids) == [5, 6, 7, 8]
+    assert parts[1].content_md5 == calc_md5(parts[1].getvalue())
+
+
+def test_split_xml_feed_by_size_keeps_message_ids():
+    messages = "".join(
+        f"<Message><MessageID>{n * 10}</MessageID><OperationType>Update</OperationType>"
+        f"<Inventory><SKU>SKU-{n}</SKU></Inventory></Message>"
+        for n in range(1, 21)
+    )
+    content = (
+        '<?xml version="1.0"?>\n<AmazonEnvelope><Header><DocumentVersion>1.01'
+        "</DocumentVersion><MerchantIdentifier>SELLER</MerchantIdentifier></Header>"
+        f"<MessageType>Inventory</MessageType>{messages}</AmazonEnvelope>"
+    ).encode("utf-8")
+    parts = split_feed(content, "_POST_INVENTORY_AVAILABILITY_DATA_", max_bytes=1000)
+
+    assert len(parts) > 1
+    assert all(part.size <= 1100 for part in parts)
+    assert sum(part.message_count for part in parts) == 20
+    source_ids = [n for part in parts for n in part.source_message_ids]
+    assert source_ids == [n * 10 for n in range(1, 21)]
+    message = fromstring(parts[0].getvalue()).find("Message")
+    assert message.findtext("MessageID") == "1"
+    assert message.findtext("OperationType") == "Update"
+
+
+def test_split_xml_feed_with_byte_order_mark():
+    content = (
+        b"\xef\xbb\xbf\n<AmazonEnvelope><Header><MerchantIdentifier>SELLER"
+        b"</MerchantIdentifier></Header><MessageType>Price</MessageType>"
+        b"<Message><MessageID>1</MessageID><Price><SKU>A</SKU></Price></Message>"
+        b"<Message><MessageID>2</MessageID><Price><SKU>B</SKU></Price></Message>"
+        b"</AmazonEnvelope>"
+    )
+    parts = split_feed(content, "_POST_PRODUCT_PRICING_DATA_", max_messages=1)
+
+    assert all(isinstance(part, XMLFeedWriter) for part in parts)
+    assert [
+        fromstring(part.getvalue()).findtext("Message/Price/SKU") for part in parts
+    ] == [
+        "A",
+        "B",
+    ]
+
+
+def test_split_xml_feed_rejects_purge_and_replace():
+    feed = XMLFeedWriter("_POST_PRODUCT_DATA_", "SELLER", purge_and_replace=True)
+    feed.add_message("<Product><SKU>A</SKU></Product>")
+    with pytest.raises(ValueError):
+        split_feed(feed.close(), "_POST_PRODUCT_DATA_", max_messages=1)
+
+
+def test_split_flat_file_feed():
+    content = (
+        "TemplateType=Offer\tVersion=2014.0703\n"
+        "SKU\tPrice\n"
+        "sku\tprice\n" + "".join(f"SKU-{n}\t{n}.00\n" for n in range(1, 8))
+    ).encode("utf-8")
+    parts = split_feed(content, "_POST_FLAT_FILE_LISTINGS_DATA_", max_messages=3)
+
+    assert [part.message_count for part in parts] == [3, 3, 1]
+    assert parts[2].getvalue() == (
+        b"TemplateType=Offer\tVersion=2014.0703\nSKU\tPrice\nsku\tprice\nSKU-7\t7.00\n"
+    )
+    assert list(parts[1].source_message_ids) == [4, 5, 6]
+    assert parts[0].content_type == "text/tab-separated-values; charset=utf-8"
+
+
+def test_split_flat_file_feed_single_header():
+    content = b"sku\tquantity\r\nA\t1\r\n\r\nB\t2"
+    parts = split_feed(content, "_POST_FLAT_FILE_INVLOADER_DATA_", max_messages=1)
+    assert [part.getvalue() for part in parts] == [
+        b"sku\tquantity\nA\t1\n",
+        b"sku\tquantity\nB\t2\n",
+    ]
+
+
+def test_gzip_feed():
+    feed = FlatFileFeedWriter("_POST_FLAT_FILE_INVLOADER_DATA_", ["sku", "quantity"])
+    for n in range(1000):
+        feed.add_row([f"SKU-{n}", n])
+    original = feed.close().getvalue()
+
+    compressed = GzipFeed(feed)
+    content = compressed.getvalue()
+    assert gzip.decompress(content) == original
+    assert compressed.uncompressed_size == len(original)
+    # The writer is left to its owner, rewound for another read.
+    assert feed.read() == original
+    assert compressed.size == len(content) < len(original) // 2
+    assert compressed.content_md5 == calc_md5(content)
+    assert compressed.content_type == feed.content_type
+    assert compressed.message_count == 1000
+    assert GzipFeed(original).getvalue() == content
+
+
+def test_submit_feed_compressed_writer_can_be_resubmitted(mws_credentials):
+    api = FakeFeeds(**mws_credentials)
+    feed = XMLFeedWriter("_POST_PRODUCT_DATA_", "SELLER")
+    feed.add_message("<Product><SKU>A</SKU></Product>")
+    api.submit_feed(feed, feed.feed_type, compress=True)
+    api.submit_feed(feed, feed.feed_type, compress=True)
+    first, second = (content for _, _, content, _ in api.requests)
+    assert first == second
+    assert gzip.decompress(first) == feed.getvalue()
+    feed.discard()
+
+
+def test_submit_feed_compressed(mws_credentials):
+    api = FakeFeeds(**mws_credentials)
+    api.submit_feed(b"<xml/>", "_POST_PRODUCT_DATA_", compress=True)
+    _, _, content, headers = api.requests[0]
+    assert gzip.decompress(content) == b"<xml/>"
+    assert headers == {
+        "Content-MD5": calc_md5(content),
+        "Content-Type": "text/xml",
+        "Content-Encoding": "gzip",
+    }
+
+    feed = FlatFileFeedWriter("_POST_FLAT_FILE_LISTINGS_DATA_", ["sku"])
+    api.submit_feed(feed, feed.feed_type, compress=True)
+    _, _, content, headers = api.requests[1]
+    assert gzip.decompress(content) == b"sku\n"
+    assert headers["Content-Type"] == "text/tab-separated-values; charset=utf-8"
+    assert headers["Content-Encoding"] == "gzip"
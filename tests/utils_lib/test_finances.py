@@ -0,0 +1,160 @@
+"""Testing for financial event flattening in ``mws.utils.finances``."""
+
+import datetime
+from decimal import Decimal
+
+from requests import Response
+
+from mws import MWSResponse
+from mws.utils.finances import (
+    FinancialEventRecord,
+    FinancialEventsPage,
+    parsed_financial_event_records,
+)
+from mws.utils.xml import MWS_ENCODING
+
+LIST_FINANCIAL_EVENTS_XML = """<?xml version="1.0"?>
+<ListFinancialEventsResponse xmlns="http://mws.amazonservices.com/Finances/2015-05-01">
+  <ListFinancialEventsResult>
+    <FinancialEvents>
+      <ShipmentEventList>
+        <ShipmentEvent>
+          <AmazonOrderId>333-7654321-7654321</AmazonOrderId>
+          <MarketplaceName>amazon.com</MarketplaceName>
+          <PostedDate>2015-02-12T00:00:00Z</PostedDate>
+          <ShipmentItemList>
+            <ShipmentItem>
+              <SellerSKU>NABetaASINB</SellerSKU>
+              <ItemChargeList>
+                <ChargeComponent>
+                  <ChargeType>Principal</ChargeType>
+                  <ChargeAmount>
+                    <CurrencyCode>USD</CurrencyCode>
+                    <CurrencyAmount>10.0</CurrencyAmount>
+                  </ChargeAmount>
+                </ChargeComponent>
+                <ChargeComponent>
+                  <ChargeType>Tax</ChargeType>
+                  <ChargeAmount>
+                    <CurrencyCode>USD</CurrencyCode>
+                    <CurrencyAmount>1.0</CurrencyAmount>
+                  </ChargeAmount>
+                </ChargeComponent>
+              </ItemChargeList>
+            </ShipmentItem>
+          </ShipmentItemList>
+        </ShipmentEvent>
+        <ShipmentEvent>
+          <AmazonOrderId>333-1111111-1111111</AmazonOrderId>
+          <PostedDate>2015-02-13T00:00:00Z</PostedDate>
+          <ShipmentItemList>
+            <ShipmentItem>
+              <SellerSKU>OtherSKU</SellerSKU>
+              <ItemFeeList>
+                <FeeComponent>
+                  <FeeType>Commission</FeeType>
+                  <FeeAmount>
+                    <CurrencyCode>USD</CurrencyCode>
+                    <CurrencyAmount>-1.5</CurrencyAmount>
+                  </FeeAmount>
+                </FeeComponent>
+              </ItemFeeList>
+            </ShipmentItem>
+          </ShipmentItemList>
+        </ShipmentEvent>
+      </ShipmentEventList>
+      <RefundEventList/>
+      <ServiceFeeEventList>
+        <ServiceFeeEvent>
+          <FeeList>
+            <FeeComponent>
+              <FeeType>FBACustomerReturnPerUnitFee</FeeType>
+              <FeeAmount>
+                <CurrencyCode>USD</CurrencyCode>
+                <CurrencyAmount>-2.0</CurrencyAmount>
+              </FeeAmount>
+            </FeeComponent>
+          </FeeList>
+        </ServiceFeeEvent>
+      </ServiceFeeEventList>
+    </FinancialEvents>
+    <NextToken>2YgYW55IGNhcm5hbCBwbGVhc3VyZS4=</NextToken>
+  </ListFinancialEventsResult>
+</ListFinancialEventsResponse>
+"""
+
+FEB_12 = datetime.datetime(2015, 2, 12, tzinfo=datetime.timezone.utc)
+FEB_13 = datetime.datetime(2015, 2, 13, tzinfo=datetime.timezone.utc)
+EXPECTED = [
+    FinancialEventRecord(
+        "ShipmentEvent",
+        FEB_12,
+        "333-7654321-7654321",
+        None,
+        "amazon.com",
+        "NABetaASINB",
+        "Principal",
+        Decimal("10.0"),
+        "USD",
+    ),
+    FinancialEventRecord(
+        "ShipmentEvent",
+        FEB_12,
+        "333-7654321-7654321",
+        None,
+        "amazon.com",
+        "NABetaASINB",
+        "Tax",
+        Decimal("1.0"),
+        "USD",
+    ),
+    FinancialEventRecord(
+        "ShipmentEvent",
+        FEB_13,
+        "333-1111111-1111111",
+        None,
+        None,
+        "OtherSKU",
+        "Commission",
+        Decimal("-1.5"),
+        "USD",
+    ),
+    FinancialEventRecord(
+        "ServiceFeeEvent",
+        None,
+        None,
+        None,
+        None,
+        None,
+        "FBACustomerReturnPerUnitFee",
+        Decimal("-2.0"),
+        "USD",
+    ),
+]
+
+
+def test_page_streamed_from_chunks():
+    content = LIST_FINANCIAL_EVENTS_XML.encode(MWS_ENCODING)
+    chunks = (content[idx : idx + 7] for idx in range(0, len(content), 7))
+    page = FinancialEventsPage(chunks)
+    assert page.next_token is None
+    assert list(page) == EXPECTED
+    assert page.next_token == "2YgYW55IGNhcm5hbCBwbGVhc3VyZS4="
+
+
+def test_page_without_next_token():
+    xml = LIST_FINANCIAL_EVENTS_XML.replace(
+        "<NextToken>2YgYW55IGNhcm5hbCBwbGVhc3VyZS4=</NextToken>", ""
+    )
+    page = FinancialEventsPage(xml.encode(MWS_ENCODING))
+    assert len(list(page)) == 4
+    assert page.next_token is None
+
+
+def test_parsed_records_match_streamed_records():
+    response = Response()
+    response._content = LIST_FINANCIAL_EVENTS_XML.encode(MWS_ENCODING)
+    response.encoding = MWS_ENCODING
+    response.status_code = 200
+    parsed = MWSResponse(response, result_key="ListFinancialEventsResult").parsed
+    assert list(parsed_financial_event_records(parsed)) == EXPECTED
@@ -0,0 +1,205 @@
+"""Testing for flat file report utilities in ``mws.utils.flatfile``."""
+
+import datetime
+import io
+from decimal import Decimal
+
+import pytest
+from requests import Response
+
+from mws import Marketplaces, MWSResponse
+from mws.models.reports import ReportType
+from mws.utils.crypto import calc_md5
+from mws.utils.flatfile import (
+    FlatFileReader,
+    detect_flat_file_encoding,
+    parse_date,
+    parse_decimal,
+    parse_int,
+    record_field_name,
+)
+
+LISTINGS_REPORT = (
+    "item-name\tseller-sku\tprice\tquantity\topen-date\n"
+    "Café mug\tMUG-1\t12.50\t3\t2020-08-24 16:30:00 PDT\n"
+    "Plain mug\tMUG-2\t9.99\t\t2020-08-25 10:00:00 PDT\n"
+).encode("cp1252")
+
+
+def streamed_response(content, headers=None):
+    """Builds a ``requests.Response`` whose content has not been read yet."""
+    response = Response()
+    response.raw = io.BytesIO(content)
+    response.status_code = 200
+    response.headers.update(headers or {})
+    return response
+
+
+@pytest.mark.parametrize(
+    "marketplace, content_type, expected",
+    (
+        (None, None, "cp1252"),
+        (Marketplaces.US, None, "cp1252"),
+        (Marketplaces.JP, None, "cp932"),
+        ("A1VC38T7YXB528", None, "cp932"),
+        (Marketplaces.JP, "text/plain;charset=UTF-8", "utf-8"),
+        (Marketplaces.DE, "text/plain; charset=Cp1252", "cp1252"),
+        (Marketplaces.JP, "text/plain;charset=Not-A-Codec", "cp932"),
+    ),
+)
+def test_detect_flat_file_encoding(marketplace, content_type, expected):
+    assert detect_flat_file_encoding(marketplace, content_type) == expected
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    (
+        ("", None),
+        ("2020-08-24", datetime.datetime(2020, 8, 24)),
+        ("2020-08-24 16:30:00 PDT", datetime.datetime(2020, 8, 24, 16, 30)),
+        (
+            "2020-08-24T16:30:00+00:00",
+            datetime.datetime(2020, 8, 24, 16, 30, tzinfo=datetime.timezone.utc),
+        ),
+        (
+            "24.08.2020 16:30:00 UTC",
+            datetime.datetime(2020, 8, 24, 16, 30, tzinfo=datetime.timezone.utc),
+        ),
+    ),
+)
+def test_parse_date(value, expected):
+    assert parse_date(value) == expected
+
+
+def test_parse_date_unknown_format():
+    with pytest.raises(ValueError):
+        parse_date("sometime last week")
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    (
+        ("", None),
+        ("12.50", Decimal("12.50")),
+        ("-3.1", Decimal("-3.1")),
+        ("12,50", Decimal("12.50")),
+        ("1.234,56", Decimal("1234.56")),
+        ("1,234.56", Decimal("1234.56")),
+    ),
+)
+def test_parse_decimal(value, expected):
+    assert parse_decimal(value) == expected
+
+
+def test_parse_int():
+    assert parse_int("") is None
+    assert parse_int("42") == 42
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    (
+        ("seller-sku", "seller_sku"),
+        ("Quantity Available", "quantity_available"),
+        ("asin1", "asin1"),
+        ("1st-column", "f_1st_column"),
+        ("class", "f_class"),
+    ),
+)
+def test_record_field_name(header, expected):
+    assert record_field_name(header) == expected
+
+
+def test_reader_yields_tuples():
+    reader = FlatFileReader(LISTINGS_REPORT)
+    rows = list(reader)
+    assert reader.header == (
+        "item-name",
+        "seller-sku",
+        "price",
+        "quantity",
+        "open-date",
+    )
+    assert rows[0] == ("Café mug", "MUG-1", "12.50", "3", "2020-08-24 16:30:00 PDT")
+    assert len(rows) == 2
+
+
+def test_reader_typed_records_from_report_type():
+    reader = FlatFileReader(
+        LISTINGS_REPORT, report_type=ReportType.ALL_LISTINGS, records=True
+    )
+    first, second = list(reader)
+    assert first.seller_sku == "MUG-1"
+    assert first.price == Decimal("12.50")
+    assert first.quantity == 3
+    assert first.open_date == datetime.datetime(2020, 8, 24, 16, 30)
+    assert second.quantity is None
+
+
+def test_reader_custom_column_types_override_report_type():
+    reader = FlatFileReader(
+        LISTINGS_REPORT,
+        report_type=ReportType.ALL_LISTINGS,
+        column_types={"quantity": parse_int},
+    )
+    row = next(iter(reader))
+    assert row[2] == "12.50"
+    assert row[3] == 3
+
+
+def test_reader_from_chunks_across_line_and_character_boundaries():
+    """Chunks splitting rows and multi-byte characters are reassembled."""
+    content = "sku\tname\r\nA\tマグ\r\nB\tカップ\r\n".encode("cp932")
+    chunks = (content[i : i + 3] for i in range(0, len(content), 3))
+    reader = FlatFileReader(chunks, marketplace=Marketplaces.JP)
+    assert list(reader) == [("A", "マグ"), ("B", "カップ")]
+
+
+def test_reader_pads_short_rows_and_skips_blank_lines():
+    content = b"a\tb\tc\n1\t2\n\n"
+    assert list(FlatFileReader(content)) == [("1", "2", "")]
+
+
+def test_reader_records_reject_long_rows():
+    content = b"a\tb\n1\t2\t3\n"
+    with pytest.raises(ValueError):
+        list(FlatFileReader(content, records=True))
+
+
+def test_reader_empty_source():
+    reader = FlatFileReader(b"")
+    assert list(reader) == []
+    assert reader.header == ()
+
+
+def test_mwsresponse_iter_flat_file_streamed():
+    """A streamed response is left unparsed, and rows are read on demand."""
+    response = streamed_response(
+        LISTINGS_REPORT,
+        headers={"content-md5": calc_md5(LISTINGS_REPORT).decode()},
+    )
+    mws_response = MWSResponse(response, stream=True)
+    assert mws_response.stream is True
+    assert mws_response._dict is None
+    rows = list(
+        mws_response.iter_flat_file(
+            report_type=ReportType.ALL_LISTINGS, records=True, chunk_size=16
+        )
+    )
+    assert [row.seller_sku for row in rows] == ["MUG-1", "MUG-2"]
+
+
+def test_mwsresponse_iter_flat_file_md5_mismatch():
+    response = streamed_response(LISTINGS_REPORT, headers={"content-md5": "bogus=="})
+    mws_response = MWSResponse(response, stream=True)
+    with pytest.raises(ValueError):
+        list(mws_response.iter_flat_file())
+
+
+def test_mwsresponse_iter_flat_file_uses_content_type_charset():
+    content = "sku\tname\nA\tİstanbul\n".encode("utf-8")
+    response = streamed_response(
+        content, headers={"content-type": "text/plain;charset=UTF-8"}
+    )
+    rows = list(MWSResponse(response, stream=True).iter_flat_file())
+    assert rows == [("A", "İstanbul")]
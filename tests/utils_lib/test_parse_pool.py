@@ -0,0 +1,95 @@
+"""Testing for process-pool parsing in ``mws.utils.parse_pool``."""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from mws import MWS, MWSResponse
+from mws.utils.parse_pool import ParsePool, parse_xml_content
+from mws.utils.xml import MWS_ENCODING
+
+from ..conftest import mock_response
+
+
+@pytest.fixture(scope="module")
+def parse_pool():
+    with ParsePool(max_workers=1, min_size=0) as pool:
+        yield pool
+
+
+def test_parse_xml_content(simple_xml_response_str):
+    parsed = parse_xml_content(simple_xml_response_str.encode(MWS_ENCODING))
+    assert type(parsed) is dict
+    assert parsed["ResponseMetadata"]["RequestId"]
+    assert parse_xml_content(b"not xml") is None
+
+
+def test_submit_parses_in_worker(parse_pool, simple_xml_response_str):
+    content = simple_xml_response_str.encode(MWS_ENCODING)
+    assert parse_pool.submit(content).result(30) == parse_xml_content(content)
+    assert parse_pool.submit(b"not xml").result(30) is None
+
+
+def test_small_content_parsed_inline(simple_xml_response_str):
+    with ParsePool(max_workers=1) as pool:
+        future = pool.submit(simple_xml_response_str.encode(MWS_ENCODING))
+        assert future.done()
+        assert future.result() == parse_xml_content(
+            simple_xml_response_str.encode(MWS_ENCODING)
+        )
+
+
+def test_mwsresponse_with_parse_pool(parse_pool, simple_xml_response_str):
+    content = simple_xml_response_str.encode(MWS_ENCODING)
+    expected = MWSResponse(
+        mock_response(content), result_key="ListMatchingProductsResult"
+    )
+    response = MWSResponse(
+        mock_response(content),
+        result_key="ListMatchingProductsResult",
+        parse_pool=parse_pool,
+    )
+    assert response.parsed == expected.parsed
+    assert response.metadata == expected.metadata
+    assert response.request_id == expected.request_id
+
+
+class SlowPool:
+    """Stands in for ``ParsePool``, finishing each parse after a short delay."""
+
+    def submit(self, content, encoding=MWS_ENCODING, force_cdata=False):
+        future = Future()
+        result = parse_xml_content(content, encoding, force_cdata)
+        threading.Timer(0.1, future.set_result, [result]).start()
+        return future
+
+
+def test_mwsresponse_parsed_from_many_threads(simple_xml_response_str):
+    response = MWSResponse(
+        mock_response(simple_xml_response_str.encode(MWS_ENCODING)),
+        result_key="ListMatchingProductsResult",
+        parse_pool=SlowPool(),
+    )
+    start = threading.Barrier(8)
+
+    def _read(_):
+        start.wait(5)
+        return response.parsed
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(_read, range(8)))
+    assert {type(result).__name__ for result in results} == {"DotDict"}
+    assert all(result is results[0] for result in results)
+
+
+def test_mwsresponse_with_parse_pool_non_xml(parse_pool):
+    response = MWSResponse(mock_response(b"not xml"), parse_pool=parse_pool)
+    assert response.parsed == "not xml"
+    assert response.metadata is None
+
+
+def test_api_passes_parse_pool(parse_pool, mws_credentials):
+    api = MWS(**mws_credentials, parse_pool=parse_pool)
+    assert api.parse_pool is parse_pool
+    assert api.throttled().parse_pool is parse_pool
@@ -1,6 +1,8 @@
 """Testing for parsing wrappers, typically those in ``mws.utils.parsers``."""
 
+import copy
 import datetime
+import pickle
 
 import pytest
 from requests import Response
@@ -716,3 +718,73 @@ class TestMWSResponseObject:
     def test_mwsresponse_with_timestamp(self, simple_mwsresponse_with_timestamp):
         mws_response = simple_mwsresponse_with_timestamp
         assert mws_response.timestamp == datetime.datetime(2020, 8, 24, 16, 30)
+
+    def test_mwsresponse_state_round_trip(self, simple_mwsresponse_with_timestamp):
+        mws_response = simple_mwsresponse_with_timestamp
+        mws_response.original.headers["x-mws-request-id"] = "abc"
+        state = mws_response.to_state()
+        assert state["content"] is None
+        assert state["timestamp"] == "2020-08-24T16:30:00"
+        assert _plain(state)
+
+        restored = MWSResponse.from_state(state)
+        assert restored.parsed == mws_response.parsed
+        assert isinstance(restored.parsed, DotDict)
+        assert restored.metadata == mws_response.metadata
+        assert restored.request_id == mws_response.request_id
+        assert restored.timestamp == mws_response.timestamp
+        assert restored.status_code == 200
+        assert restored.encoding == MWS_ENCODING
+        assert restored.headers["X-MWS-Request-Id"] == "abc"
+        assert restored.content == b""
+
+        with_content = MWSResponse.from_state(
+            mws_response.to_state(include_content=True)
+        )
+        assert with_content.content == mws_response.content
+
+    def test_mwsresponse_state_non_xml(self):
+        mws_response = MWSResponse(mock_mws_response(b"col1\tcol2\n1\t2\n"))
+        restored = MWSResponse.from_state(mws_response.to_state())
+        assert restored.parsed == mws_response.parsed == "col1\tcol2\n1\t2\n"
+
+    def test_mwsresponse_state_unsupported(self, simple_mwsresponse):
+        state = simple_mwsresponse.to_state()
+        state["format"] = 0
+        with pytest.raises(ValueError):
+            MWSResponse.from_state(state)
+        streamed = MWSResponse(mock_mws_response(b""), stream=True)
+        with pytest.raises(ValueError):
+            streamed.to_state()
+
+    @pytest.mark.parametrize("protocol", (pickle.DEFAULT_PROTOCOL, 5))
+    def test_mwsresponse_pickle(self, simple_mwsresponse_with_resultkey, protocol):
+        mws_response = simple_mwsresponse_with_resultkey
+        restored = pickle.loads(pickle.dumps(mws_response, protocol=protocol))
+        assert isinstance(restored, MWSResponse)
+        assert restored.parsed == mws_response.parsed
+        assert restored.request_id == mws_response.request_id
+
+    def test_mwsresponse_msgpack(self, simple_mwsresponse_with_resultkey):
+        msgpack = pytest.importorskip("msgpack")
+        mws_response = simple_mwsresponse_with_resultkey
+        packed = msgpack.packb(mws_response.to_state())
+        restored = MWSResponse.from_state(msgpack.unpackb(packed))
+        assert restored.parsed == mws_response.parsed
+
+    def test_dotdict_copy(self, simple_mwsresponse):
+        parsed = simple_mwsresponse.parsed
+        assert copy.deepcopy(parsed) == parsed
+        assert copy.copy(parsed) == parsed
+        assert not hasattr(parsed, "__missing_dunder__")
+
+
+def _plain(value):
+    """Whether ``value`` is made only of plain, msgpack-friendly types."""
+    if isinstance(value, dict):
+        return type(value) is dict and all(
+            isinstance(key, str) and _plain(val) for key, val in value.items()
+        )
+    if isinstance(value, list):
+        return all(_plain(item) for item in value)
+    return value is None or type(value) in (str, bytes, int, bool)
@@ -0,0 +1,128 @@
+"""Tests for the feed processing report parser in ``mws.utils.processing_report``."""
+
+import io
+
+from requests import Response
+
+from mws import MWSResponse
+from mws.utils.processing_report import ProcessingReport, ProcessingResult
+
+REPORT_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<AmazonEnvelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+    xsi:noNamespaceSchemaLocation="amzn-envelope.xsd">
+  <Header>
+    <DocumentVersion>1.02</DocumentVersion>
+    <MerchantIdentifier>SELLER</MerchantIdentifier>
+  </Header>
+  <MessageType>ProcessingReport</MessageType>
+  <Message>
+    <MessageID>1</MessageID>
+    <ProcessingReport>
+      <DocumentTransactionID>4200000000</DocumentTransactionID>
+      <StatusCode>Complete</StatusCode>
+      <ProcessingSummary>
+        <MessagesProcessed>{processed}</MessagesProcessed>
+        <MessagesSuccessful>{successful}</MessagesSuccessful>
+        <MessagesWithError>{errors}</MessagesWithError>
+        <MessagesWithWarning>{warnings}</MessagesWithWarning>
+      </ProcessingSummary>{results}
+    </ProcessingReport>
+  </Message>
+</AmazonEnvelope>
+"""
+
+RESULT_XML = """
+      <Result>
+        <MessageID>{message_id}</MessageID>
+        <ResultCode>{code}</ResultCode>
+        <ResultMessageCode>{message_code}</ResultMessageCode>
+        <ResultDescription>Problem with {sku}</ResultDescription>
+        <AdditionalInfo>
+          <SKU>{sku}</SKU>
+        </AdditionalInfo>
+      </Result>"""
+
+
+def report_xml(results, processed=10):
+    errors = sum(1 for _, code, _ in results if code == "Error")
+    warnings = sum(1 for _, code, _ in results if code == "Warning")
+    return REPORT_XML.format(
+        processed=processed,
+        successful=processed - errors,
+        errors=errors,
+        warnings=warnings,
+        results="".join(
+            RESULT_XML.format(
+                message_id=message_id,
+                code=code,
+                message_code=8000 + message_id,
+                sku=sku,
+            )
+            for message_id, code, sku in results
+        ),
+    )
+
+
+def test_summary_and_index():
+    report = ProcessingReport(
+        report_xml(
+            [
+                (2, "Error", "B"),
+                (2, "Warning", "B"),
+                (5, "Warning", "E"),
+                (7, "Error", "G"),
+            ]
+        ).encode("utf-8")
+    )
+    assert report.document_transaction_id == "4200000000"
+    assert report.status_code == "Complete"
+    assert report.messages_processed == 10
+    assert report.messages_successful == 8
+    assert report.messages_with_error == 2
+    assert report.messages_with_warning == 2
+
+    assert len(report.results) == 4
+    assert [result.message_id for result in report.errors] == [2, 7]
+    assert [result.sku for result in report.warnings] == ["B", "E"]
+    assert report.failed_message_ids() == [2, 7]
+    assert report.for_message(2)[0] == ProcessingResult(
+        message_id=2,
+        result_code="Error",
+        result_message_code="8002",
+        result_description="Problem with B",
+        sku="B",
+        additional_info={"SKU": "B"},
+    )
+    assert [result.result_code for result in report.for_sku("B")] == [
+        "Error",
+        "Warning",
+    ]
+    assert report.for_message("3") == []
+    assert report.for_sku("Z") == []
+
+
+def test_feed_level_results_apply_to_every_message():
+    report = ProcessingReport(
+        report_xml([(0, "Error", "-"), (3, "Error", "C")]).encode()
+    )
+    assert [result.message_id for result in report.for_message(3)] == [0, 3]
+    assert [result.message_id for result in report.for_message(4)] == [0]
+    assert report.failed_message_ids() == [3]
+
+
+def test_streamed_response():
+    xml = report_xml([(n, "Error", f"SKU-{n}") for n in range(1, 2001)], processed=5000)
+    response = Response()
+    response.raw = io.BytesIO(xml.encode("utf-8"))
+    response.status_code = 200
+    report = ProcessingReport(MWSResponse(response, stream=True))
+    assert report.messages_with_error == 2000
+    assert report.failed_message_ids() == list(range(1, 2001))
+    assert report.for_sku("SKU-1500")[0].message_id == 1500
+
+
+def test_empty_report():
+    report = ProcessingReport(io.BytesIO(report_xml([]).encode("utf-8")))
+    assert report.results == []
+    assert report.errors == []
+    assert report.messages_processed == 10
@@ -0,0 +1,269 @@
+"""Testing for compact result models in ``mws.models.results``."""
+
+import datetime
+import pickle
+from decimal import Decimal
+
+import pytest
+
+from mws import DotDict
+from mws.models.results import (
+    InventorySupplyMember,
+    ModelPage,
+    Order,
+    OrderItem,
+    ProductPrice,
+)
+
+from ..conftest import stream_response, xml_response
+
+LIST_ORDERS_XML = """<?xml version="1.0"?>
+<ListOrdersResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <ListOrdersResult>
+    <NextToken>token-2</NextToken>
+    <Orders>
+      <Order>
+        <AmazonOrderId>902-3159896-1390916</AmazonOrderId>
+        <PurchaseDate>2017-02-20T19:49:35Z</PurchaseDate>
+        <OrderStatus>Shipped</OrderStatus>
+        <OrderTotal>
+          <CurrencyCode>USD</CurrencyCode>
+          <Amount>25.00</Amount>
+        </OrderTotal>
+        <NumberOfItemsShipped>1</NumberOfItemsShipped>
+        <ShippingAddress>
+          <City>Seattle</City>
+          <CountryCode>US</CountryCode>
+        </ShippingAddress>
+      </Order>
+      <Order>
+        <AmazonOrderId>483-3488972-0896720</AmazonOrderId>
+        <OrderStatus>Pending</OrderStatus>
+      </Order>
+    </Orders>
+  </ListOrdersResult>
+</ListOrdersResponse>
+"""
+
+LIST_ORDER_ITEMS_XML = """<?xml version="1.0"?>
+<ListOrderItemsResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <ListOrderItemsResult>
+    <OrderItems>
+      <OrderItem>
+        <OrderItemId>68828574383266</OrderItemId>
+        <ASIN>BT0093TELA</ASIN>
+        <SellerSKU>CBA_OTF_1</SellerSKU>
+        <QuantityOrdered>2</QuantityOrdered>
+        <ItemPrice>
+          <CurrencyCode>USD</CurrencyCode>
+          <Amount>25.99</Amount>
+        </ItemPrice>
+      </OrderItem>
+    </OrderItems>
+    <AmazonOrderId>902-3159896-1390916</AmazonOrderId>
+  </ListOrderItemsResult>
+</ListOrderItemsResponse>
+"""
+
+LIST_INVENTORY_SUPPLY_XML = """<?xml version="1.0"?>
+<ListInventorySupplyResponse xmlns="http://mws.amazonaws.com/FulfillmentInventory/2010-10-01/">
+  <ListInventorySupplyResult>
+    <InventorySupplyList>
+      <member>
+        <SellerSKU>SampleSKU1</SellerSKU>
+        <ASIN>B00000K3CQ</ASIN>
+        <TotalSupplyQuantity>20</TotalSupplyQuantity>
+        <InStockSupplyQuantity>15</InStockSupplyQuantity>
+        <EarliestAvailability>
+          <TimepointType>Immediately</TimepointType>
+        </EarliestAvailability>
+      </member>
+      <member>
+        <SellerSKU>SampleSKU2</SellerSKU>
+        <TotalSupplyQuantity>0</TotalSupplyQuantity>
+      </member>
+    </InventorySupplyList>
+  </ListInventorySupplyResult>
+</ListInventorySupplyResponse>
+"""
+
+OFFER_XML = """
+          <Offer>
+            <BuyingPrice>
+              <LandedPrice><CurrencyCode>USD</CurrencyCode><Amount>{landed}</Amount></LandedPrice>
+              <ListingPrice><CurrencyCode>USD</CurrencyCode><Amount>{listing}</Amount></ListingPrice>
+              <Shipping><CurrencyCode>USD</CurrencyCode><Amount>0.00</Amount></Shipping>
+            </BuyingPrice>
+            <RegularPrice><CurrencyCode>USD</CurrencyCode><Amount>{listing}</Amount></RegularPrice>
+            <FulfillmentChannel>MERCHANT</FulfillmentChannel>
+            <ItemCondition>New</ItemCondition>
+            <ItemSubCondition>New</ItemSubCondition>
+            <SellerId>A1SELLER</SellerId>
+            <SellerSKU>{sku}</SellerSKU>
+          </Offer>"""
+
+MY_PRICE_RESULT_XML = """
+  <GetMyPriceForASINResult ASIN="{asin}" status="Success">
+    <Product>
+      <Identifiers>
+        <MarketplaceASIN>
+          <MarketplaceId>ATVPDKIKX0DER</MarketplaceId>
+          <ASIN>{asin}</ASIN>
+        </MarketplaceASIN>
+      </Identifiers>
+      <Offers>{offers}
+      </Offers>
+    </Product>
+  </GetMyPriceForASINResult>"""
+
+
+def my_price_xml(*results):
+    return (
+        '<?xml version="1.0"?>\n'
+        '<GetMyPriceForASINResponse xmlns="http://mws.amazonservices.com/schema/Products/2011-10-01">'
+        + "".join(
+            MY_PRICE_RESULT_XML.format(
+                asin=asin,
+                offers="".join(
+                    OFFER_XML.format(sku=sku, landed=price, listing=price)
+                    for sku, price in offers
+                ),
+            )
+            for asin, offers in results
+        )
+        + "</GetMyPriceForASINResponse>"
+    )
+
+
+def parsed(xml, action):
+    return xml_response(xml, action).parsed
+
+
+def test_orders_from_parsed():
+    orders = Order.from_parsed(parsed(LIST_ORDERS_XML, "ListOrders"))
+    assert len(orders) == 2
+    order = orders[0]
+    assert order.AmazonOrderId == "902-3159896-1390916"
+    assert order.PurchaseDate == datetime.datetime(
+        2017, 2, 20, 19, 49, 35, tzinfo=datetime.timezone.utc
+    )
+    assert order.OrderTotalAmount == Decimal("25.00")
+    assert order.OrderTotalCurrencyCode == "USD"
+    assert order.NumberOfItemsShipped == 1
+    assert order.ShipCity == "Seattle"
+    assert orders[1].OrderTotalAmount is None
+
+
+def test_model_is_compact_and_dict_compatible():
+    order = Order.from_parsed(parsed(LIST_ORDERS_XML, "ListOrders"))[0]
+    assert not hasattr(order, "__dict__")
+    with pytest.raises(AttributeError):
+        order.NotAField = 1
+    assert order["OrderStatus"] == "Shipped"
+    assert order.get("OrderStatus") == "Shipped"
+    assert order.get("NotAField", "default") == "default"
+    assert "OrderStatus" in order
+    with pytest.raises(KeyError):
+        order["NotAField"]
+    as_dict = order.to_dict()
+    assert list(as_dict) == list(Order.__slots__)
+    assert as_dict["AmazonOrderId"] == "902-3159896-1390916"
+    dot_dict = order.to_dotdict()
+    assert isinstance(dot_dict, DotDict)
+    assert dot_dict.OrderTotalAmount == Decimal("25.00")
+    assert Order(**as_dict) == order
+    assert pickle.loads(pickle.dumps(order)) == order
+    assert "AmazonOrderId='902-3159896-1390916'" in repr(order)
+
+
+def test_model_init():
+    order = Order("111-1", OrderStatus="Pending")
+    assert order.AmazonOrderId == "111-1"
+    assert order.OrderStatus == "Pending"
+    assert order.PurchaseDate is None
+    with pytest.raises(TypeError):
+        Order(NotAField=1)
+    with pytest.raises(TypeError):
+        Order(*range(len(Order.__slots__) + 1))
+
+
+def test_order_items_from_parsed():
+    (item,) = OrderItem.from_parsed(parsed(LIST_ORDER_ITEMS_XML, "ListOrderItems"))
+    assert item.SellerSKU == "CBA_OTF_1"
+    assert item.QuantityOrdered == 2
+    assert item.ItemPriceAmount == Decimal("25.99")
+
+
+def test_inventory_supply_from_parsed():
+    members = InventorySupplyMember.from_parsed(
+        parsed(LIST_INVENTORY_SUPPLY_XML, "ListInventorySupply")
+    )
+    assert [member.SellerSKU for member in members] == ["SampleSKU1", "SampleSKU2"]
+    assert members[0].TotalSupplyQuantity == 20
+    assert members[0].EarliestAvailabilityTimepoint == "Immediately"
+    assert members[1].InStockSupplyQuantity is None
+
+
+def test_product_prices_from_parsed():
+    xml = my_price_xml(
+        ("B0001", [("SKU-1", "10.00"), ("SKU-2", "12.50")]), ("B0002", [("SKU-3", "5")])
+    )
+    prices = ProductPrice.from_parsed(parsed(xml, "GetMyPriceForASIN"))
+    assert [(p.ASIN, p.SellerSKU) for p in prices] == [
+        ("B0001", "SKU-1"),
+        ("B0001", "SKU-2"),
+        ("B0002", "SKU-3"),
+    ]
+    assert prices[1].MarketplaceId == "ATVPDKIKX0DER"
+    assert prices[1].LandedPriceAmount == Decimal("12.50")
+    assert prices[1].ShippingAmount == Decimal("0.00")
+    assert prices[1].ItemCondition == "New"
+
+    # A single result is not wrapped in a list.
+    single = ProductPrice.from_parsed(
+        parsed(my_price_xml(("B0001", [("SKU-1", "10.00")])), "GetMyPriceForASIN")
+    )
+    assert [p.SellerSKU for p in single] == ["SKU-1"]
+
+
+@pytest.mark.parametrize(
+    "model, xml, action",
+    (
+        (Order, LIST_ORDERS_XML, "ListOrders"),
+        (OrderItem, LIST_ORDER_ITEMS_XML, "ListOrderItems"),
+        (InventorySupplyMember, LIST_INVENTORY_SUPPLY_XML, "ListInventorySupply"),
+        (
+            ProductPrice,
+            my_price_xml(("B0001", [("SKU-1", "1"), ("SKU-2", "2")]), ("B0002", [])),
+            "GetMyPriceForASIN",
+        ),
+    ),
+)
+def test_model_page_matches_parsed(model, xml, action):
+    page = ModelPage(model, xml.encode("utf-8"))
+    assert list(page) == model.from_parsed(parsed(xml, action))
+
+
+def test_model_page_next_token():
+    page = ModelPage(Order, LIST_ORDERS_XML.encode("utf-8"))
+    assert len(list(page)) == 2
+    assert page.next_token == "token-2"
+    page = ModelPage(OrderItem, LIST_ORDER_ITEMS_XML.encode("utf-8"))
+    list(page)
+    assert page.next_token is None
+
+
+def test_model_page_from_responses():
+    response = xml_response(LIST_ORDERS_XML, "ListOrders")
+    assert len(list(ModelPage(Order, response))) == 2
+
+    page = ModelPage(Order, stream_response(LIST_ORDERS_XML.encode("utf-8")))
+    assert [order.AmazonOrderId for order in page][0] == "902-3159896-1390916"
+    assert page.next_token == "token-2"
+
+
+def test_low_cardinality_fields_are_interned():
+    first, second = ModelPage(Order, LIST_ORDERS_XML.encode("utf-8"))
+    other = Order(OrderStatus="".join(["Ship", "ped"]))
+    assert other.OrderStatus is first.OrderStatus
+    assert second.OrderStatus == "Pending"
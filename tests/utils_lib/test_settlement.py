@@ -0,0 +1,265 @@
+"""Testing for streaming settlement report parsers in ``mws.utils.settlement``."""
+
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from mws.models.reports import ReportType
+from mws.utils.settlement import (
+    SettlementRecord,
+    TransactionKind,
+    iter_settlement_flat_file,
+    iter_settlement_records,
+    iter_settlement_xml,
+    transaction_kind,
+)
+
+SETTLEMENT_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<AmazonEnvelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+  <Header>
+    <DocumentVersion>1.01</DocumentVersion>
+    <MerchantIdentifier>M_EXAMPLE_123</MerchantIdentifier>
+  </Header>
+  <MessageType>SettlementReport</MessageType>
+  <Message>
+    <MessageID>1</MessageID>
+    <SettlementReport>
+      <SettlementData>
+        <AmazonSettlementID>5566778899</AmazonSettlementID>
+        <TotalAmount currency="USD">17.50</TotalAmount>
+        <StartDate>2020-08-01T00:00:00+00:00</StartDate>
+        <EndDate>2020-08-15T00:00:00+00:00</EndDate>
+        <DepositDate>2020-08-17T00:00:00+00:00</DepositDate>
+      </SettlementData>
+      <Order>
+        <AmazonOrderID>111-1111111-1111111</AmazonOrderID>
+        <MerchantOrderID>M-1</MerchantOrderID>
+        <ShipmentID>S-1</ShipmentID>
+        <MarketplaceName>Amazon.com</MarketplaceName>
+        <Fulfillment>
+          <MerchantFulfillmentID>F-1</MerchantFulfillmentID>
+          <PostedDate>2020-08-02T10:00:00+00:00</PostedDate>
+          <Item>
+            <AmazonOrderItemCode>IC-1</AmazonOrderItemCode>
+            <SKU>MUG-1</SKU>
+            <Quantity>2</Quantity>
+            <ItemPrice>
+              <Component>
+                <Type>Principal</Type>
+                <Amount currency="USD">20.00</Amount>
+              </Component>
+              <Component>
+                <Type>Shipping</Type>
+                <Amount currency="USD">3.00</Amount>
+              </Component>
+            </ItemPrice>
+            <ItemFees>
+              <Fee>
+                <Type>Commission</Type>
+                <Amount currency="USD">-3.00</Amount>
+              </Fee>
+            </ItemFees>
+            <Promotion>
+              <MerchantPromotionID>PROMO</MerchantPromotionID>
+              <Type>Shipping</Type>
+              <Amount currency="USD">-3.00</Amount>
+            </Promotion>
+          </Item>
+        </Fulfillment>
+      </Order>
+      <Refund>
+        <AmazonOrderID>222-2222222-2222222</AmazonOrderID>
+        <AdjustmentID>ADJ-1</AdjustmentID>
+        <MarketplaceName>Amazon.com</MarketplaceName>
+        <Fulfillment>
+          <PostedDate>2020-08-03T10:00:00+00:00</PostedDate>
+          <AdjustedItem>
+            <AmazonOrderItemCode>IC-2</AmazonOrderItemCode>
+            <SKU>MUG-2</SKU>
+            <ItemPriceAdjustments>
+              <Component>
+                <Type>Principal</Type>
+                <Amount currency="USD">-10.00</Amount>
+              </Component>
+            </ItemPriceAdjustments>
+            <ItemFeeAdjustments>
+              <Fee>
+                <Type>Commission</Type>
+                <Amount currency="USD">1.50</Amount>
+              </Fee>
+            </ItemFeeAdjustments>
+          </AdjustedItem>
+        </Fulfillment>
+      </Refund>
+      <OtherTransaction>
+        <TransactionType>Subscription Fee</TransactionType>
+        <TransactionID>T-1</TransactionID>
+        <PostedDate>2020-08-04T00:00:00+00:00</PostedDate>
+        <Amount currency="USD">-39.99</Amount>
+      </OtherTransaction>
+      <OtherTransaction>
+        <TransactionType>WAREHOUSE_DAMAGE</TransactionType>
+        <PostedDate>2020-08-05T00:00:00+00:00</PostedDate>
+        <Amount currency="USD">48.99</Amount>
+      </OtherTransaction>
+    </SettlementReport>
+  </Message>
+</AmazonEnvelope>
+"""
+
+SETTLEMENT_V2_FLAT_FILE = (
+    "settlement-id\tsettlement-start-date\tsettlement-end-date\tdeposit-date\t"
+    "total-amount\tcurrency\ttransaction-type\torder-id\tmerchant-order-id\t"
+    "adjustment-id\tshipment-id\tmarketplace-name\tamount-type\t"
+    "amount-description\tamount\tfulfillment-id\tposted-date\tposted-date-time\t"
+    "order-item-code\tmerchant-order-item-id\tmerchant-adjustment-item-id\tsku\t"
+    "quantity-purchased\tpromotion-id\n"
+    "5566778899\t2020-08-01 00:00:00 UTC\t2020-08-15 00:00:00 UTC\t"
+    "2020-08-17 00:00:00 UTC\t5.50\tUSD\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\n"
+    "5566778899\t\t\t\t\t\tOrder\t111-1111111-1111111\tM-1\t\tS-1\tAmazon.com\t"
+    "ItemPrice\tPrincipal\t20.00\tMFN\t2020-08-02\t2020-08-02 10:00:00 UTC\t"
+    "IC-1\t\t\tMUG-1\t2\t\n"
+    "5566778899\t\t\t\t\t\tOrder\t111-1111111-1111111\tM-1\t\tS-1\tAmazon.com\t"
+    "ItemFees\tCommission\t-3.00\tMFN\t2020-08-02\t2020-08-02 10:00:00 UTC\t"
+    "IC-1\t\t\tMUG-1\t\t\n"
+    "5566778899\t\t\t\t\t\tRefund\t222-2222222-2222222\t\tADJ-1\t\tAmazon.com\t"
+    "ItemPrice\tPrincipal\t-10.00\tMFN\t2020-08-03\t2020-08-03 10:00:00 UTC\t"
+    "IC-2\t\t\tMUG-2\t\t\n"
+    "5566778899\t\t\t\t\t\tServiceFee\t\t\t\t\t\t"
+    "Cost of Advertising\tTransactionTotalAmount\t-7.50\t\t2020-08-04\t"
+    "2020-08-04 00:00:00 UTC\t\t\t\t\t\t\n"
+).encode("cp1252")
+
+SETTLEMENT_V1_FLAT_FILE = (
+    "settlement-id\tsettlement-start-date\tsettlement-end-date\tdeposit-date\t"
+    "total-amount\tcurrency\ttransaction-type\torder-id\tmerchant-order-id\t"
+    "adjustment-id\tshipment-id\tmarketplace-name\tshipment-fee-type\t"
+    "shipment-fee-amount\torder-fee-type\torder-fee-amount\tfulfillment-id\t"
+    "posted-date\torder-item-code\tmerchant-order-item-id\t"
+    "merchant-adjustment-item-id\tsku\tquantity-purchased\tprice-type\t"
+    "price-amount\titem-related-fee-type\titem-related-fee-amount\t"
+    "misc-fee-amount\tother-fee-amount\tother-fee-reason-description\t"
+    "promotion-id\tpromotion-type\tpromotion-amount\tdirect-payment-type\t"
+    "direct-payment-amount\tother-amount\n"
+    "5566778899\t01.08.2020 00:00:00 UTC\t15.08.2020 00:00:00 UTC\t"
+    "17.08.2020 00:00:00 UTC\t5,50\tEUR" + "\t" * 30 + "\n"
+    "5566778899\t\t\t\t\t\tOrder\t111-1111111-1111111\tM-1\t\tS-1\tAmazon.de\t"
+    "\t\t\t\tAFN\t02.08.2020\tIC-1\t\t\tMUG-1\t2\tPrincipal\t20,00\t"
+    "Commission\t-3,00\t\t\t\t\t\t\t\t\t\n"
+).encode("cp1252")
+
+
+def test_transaction_kind():
+    assert transaction_kind("Order") == TransactionKind.ORDER
+    assert transaction_kind("Refund") == TransactionKind.REFUND
+    assert transaction_kind("Chargeback Refund") == TransactionKind.REFUND
+    assert transaction_kind("ServiceFee") == TransactionKind.FEE
+    assert transaction_kind("Subscription Fee") == TransactionKind.FEE
+    assert transaction_kind("WAREHOUSE_DAMAGE") == TransactionKind.ADJUSTMENT
+    assert transaction_kind(None) == TransactionKind.ADJUSTMENT
+
+
+def test_iter_settlement_xml():
+    records = list(iter_settlement_xml(SETTLEMENT_XML))
+    assert all(isinstance(record, SettlementRecord) for record in records)
+    assert [
+        (record.kind, record.amount_type, record.amount_description, record.amount)
+        for record in records
+    ] == [
+        (TransactionKind.ORDER, "ItemPrice", "Principal", Decimal("20.00")),
+        (TransactionKind.ORDER, "ItemPrice", "Shipping", Decimal("3.00")),
+        (TransactionKind.ORDER, "ItemFees", "Commission", Decimal("-3.00")),
+        (TransactionKind.ORDER, "Promotion", "Shipping", Decimal("-3.00")),
+        (
+            TransactionKind.REFUND,
+            "ItemPriceAdjustments",
+            "Principal",
+            Decimal("-10.00"),
+        ),
+        (TransactionKind.REFUND, "ItemFeeAdjustments", "Commission", Decimal("1.50")),
+        (
+            TransactionKind.FEE,
+            "Subscription Fee",
+            "Subscription Fee",
+            Decimal("-39.99"),
+        ),
+        (
+            TransactionKind.ADJUSTMENT,
+            "WAREHOUSE_DAMAGE",
+            "WAREHOUSE_DAMAGE",
+            Decimal("48.99"),
+        ),
+    ]
+    first = records[0]
+    assert first.settlement_id == "5566778899"
+    assert first.order_id == "111-1111111-1111111"
+    assert first.merchant_order_id == "M-1"
+    assert first.shipment_id == "S-1"
+    assert first.sku == "MUG-1"
+    assert first.order_item_code == "IC-1"
+    assert first.quantity == 2
+    assert first.currency == "USD"
+    assert first.posted_date == datetime.datetime(
+        2020, 8, 2, 10, tzinfo=datetime.timezone.utc
+    )
+    assert records[4].adjustment_id == "ADJ-1"
+    # Amounts balance out to the settlement total.
+    assert sum(record.amount for record in records) == Decimal("17.50")
+
+
+def test_iter_settlement_xml_from_chunks():
+    chunks = (SETTLEMENT_XML[i : i + 50] for i in range(0, len(SETTLEMENT_XML), 50))
+    assert list(iter_settlement_xml(chunks)) == list(
+        iter_settlement_xml(SETTLEMENT_XML)
+    )
+
+
+def test_iter_settlement_flat_file_v2():
+    records = list(iter_settlement_flat_file(SETTLEMENT_V2_FLAT_FILE))
+    assert [(record.kind, record.amount) for record in records] == [
+        (TransactionKind.ORDER, Decimal("20.00")),
+        (TransactionKind.ORDER, Decimal("-3.00")),
+        (TransactionKind.REFUND, Decimal("-10.00")),
+        (TransactionKind.FEE, Decimal("-7.50")),
+    ]
+    first = records[0]
+    assert first.currency == "USD"
+    assert first.amount_type == "ItemPrice"
+    assert first.amount_description == "Principal"
+    assert first.quantity == 2
+    assert first.posted_date == datetime.datetime(
+        2020, 8, 2, 10, tzinfo=datetime.timezone.utc
+    )
+    assert records[2].adjustment_id == "ADJ-1"
+
+
+def test_iter_settlement_flat_file_v1():
+    records = list(iter_settlement_flat_file(SETTLEMENT_V1_FLAT_FILE))
+    assert [
+        (record.amount_type, record.amount_description, record.amount)
+        for record in records
+    ] == [
+        ("ItemPrice", "Principal", Decimal("20.00")),
+        ("ItemFees", "Commission", Decimal("-3.00")),
+    ]
+    assert records[0].currency == "EUR"
+    assert records[0].marketplace_name == "Amazon.de"
+    assert records[0].posted_date == datetime.datetime(2020, 8, 2)
+
+
+@pytest.mark.parametrize(
+    "report_type, content",
+    (
+        (ReportType.SETTLEMENT_V2_XML, SETTLEMENT_XML),
+        (ReportType.SETTLEMENT_V2_FLATFILE.value, SETTLEMENT_V2_FLAT_FILE),
+        (ReportType.SETTLEMENT_FLATFILE, SETTLEMENT_V1_FLAT_FILE),
+    ),
+)
+def test_iter_settlement_records_dispatch(report_type, content):
+    assert list(iter_settlement_records(content, report_type))
+
+
+def test_iter_settlement_records_wrong_report_type():
+    with pytest.raises(ValueError):
+        iter_settlement_records(b"", ReportType.ALL_LISTINGS)
@@ -0,0 +1,117 @@
+"""Testing for client-side throttling in ``mws.utils.throttle``."""
+
+import pytest
+from requests import Response
+
+from mws import MWS, Reports
+from mws.utils.throttle import Throttle, ThrottleRegistry, throttle_action
+from mws.utils.xml import MWS_ENCODING
+
+
+class FakeClock:
+    """Clock whose time only advances when ``sleep`` is called."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_throttle_action():
+    assert throttle_action("ListOrdersByNextToken") == "ListOrders"
+    assert throttle_action("ListOrders") == "ListOrders"
+
+
+def test_throttle_bursts_then_restores():
+    clock = FakeClock()
+    throttle = Throttle(2, 60, clock=clock, sleep=clock.sleep)
+    assert throttle.acquire() == 0
+    assert throttle.acquire() == 0
+    assert throttle.available == 0
+    assert throttle.try_acquire() is False
+    assert throttle.acquire() == 60
+    clock.now += 30
+    assert throttle.acquire() == 30
+    # Quota never restores beyond the maximum.
+    clock.now += 1000
+    assert throttle.available == 2
+
+
+def test_throttle_requires_quota():
+    with pytest.raises(ValueError):
+        Throttle(0, 1)
+
+
+def test_registry_shares_buckets_with_next_token_actions():
+    clock = FakeClock()
+    registry = ThrottleRegistry(clock=clock, sleep=clock.sleep)
+    assert registry.get("ListOrders") is None
+    assert registry.acquire("ListOrders") == 0
+    throttle = registry.get("ListOrdersByNextToken", (1, 60))
+    assert registry.get("ListOrders") is throttle
+    registry.acquire("ListOrders", (1, 60))
+    assert registry.acquire("ListOrdersByNextToken") == 60
+
+
+def test_registry_keeps_buckets_per_endpoint():
+    clock = FakeClock()
+    registry = ThrottleRegistry(clock=clock, sleep=clock.sleep)
+    na = "https://mws.amazonservices.com/Orders/2013-09-01"
+    eu = "https://mws-eu.amazonservices.com/Orders/2013-09-01"
+    registry.acquire("ListOrders", (1, 60), endpoint=na)
+    assert registry.acquire("ListOrders", (1, 60), endpoint=eu) == 0
+    assert registry.get("ListOrders", endpoint=na) is not registry.get(
+        "ListOrders", endpoint=eu
+    )
+    assert registry.acquire("ListOrders", (1, 60), endpoint=na) == 60
+
+
+def test_api_throttle_limits(mws_credentials):
+    api = Reports(**mws_credentials)
+    assert api.get_throttle_limits("GetReportRequestListByNextToken") == (10, 45)
+    assert api.get_throttle_limits("GetServiceStatus") == (2, 300)
+    assert api.get_throttle_limits("SomethingElse") is None
+
+
+def test_throttled_copy_shares_buckets(mws_credentials):
+    api = MWS(**mws_credentials)
+    assert api.throttle_requests is False
+    throttled = api.throttled()
+    assert throttled is not api
+    assert throttled.throttle_requests is True
+    assert throttled.throttles is api.throttles
+    assert api.throttle_requests is False
+
+
+class OkSession:
+    """Stands in for ``requests.Session``, answering every request with a GREEN status."""
+
+    def request(self, **kwargs):
+        response = Response()
+        response._content = (
+            b"<GetServiceStatusResponse><GetServiceStatusResult>"
+            b"<Status>GREEN</Status></GetServiceStatusResult></GetServiceStatusResponse>"
+        )
+        response.encoding = MWS_ENCODING
+        response.status_code = 200
+        return response
+
+
+def test_throttled_requests_draw_on_their_endpoint(mws_credentials):
+    api = MWS(session=OkSession(), throttle=True, **mws_credentials)
+    api._use_feature_mwsresponse = True
+    eu_api = api.throttled()
+    eu_api.domain = "https://mws-eu.amazonservices.com"
+    api.get_service_status()
+    eu_api.get_service_status()
+    eu_api.get_service_status()
+    na_bucket = api.throttles.get("GetServiceStatus", endpoint=api.endpoint)
+    eu_bucket = api.throttles.get("GetServiceStatus", endpoint=eu_api.endpoint)
+    assert na_bucket.available == 1
+    assert eu_bucket.available == 0
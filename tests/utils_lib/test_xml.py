@@ -4,7 +4,7 @@
 from pathlib import Path
 
 from mws.utils.collections import DotDict
-from mws.utils.xml import mws_xml_to_dict, mws_xml_to_dotdict
+from mws.utils.xml import as_list, mws_xml_to_dict, mws_xml_to_dotdict
 
 
 def test_mws_xml_to_dict_method(simple_xml_response_str):
@@ -62,3 +62,11 @@ def test_mws_xml_to_dotdict_multiple_results():
     assert isinstance(output, list)
     assert output[0].ASIN == "B085G58KWT"
     assert output[1].ASIN == "B07ZZW7QCM"
+
+
+def test_as_list():
+    items = [{"SKU": "A"}, {"SKU": "B"}]
+    assert as_list(items) is items
+    assert as_list({"SKU": "A"}) == [{"SKU": "A"}]
+    assert as_list("text") == ["text"]
+    assert as_list(None) == []